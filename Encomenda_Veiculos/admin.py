@@ -7,6 +7,9 @@ from .models import (
     Vehicle,
     InternalTransport,
     OCFStock,
+    ImportJob,
+    ImportJobFile,
+    ImportRowIssue,
 )
 
 # Register your models here.
@@ -17,3 +20,6 @@ admin.site.register(VP)
 admin.site.register(Vehicle)
 admin.site.register(InternalTransport)
 admin.site.register(OCFStock)
+admin.site.register(ImportJob)
+admin.site.register(ImportJobFile)
+admin.site.register(ImportRowIssue)
@@ -0,0 +1,77 @@
+from typing import Callable, NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Cast
+
+from .models import VP, Vehicle, Salesperson, Client
+
+# Options returned per request
+AUTOCOMPLETE_LIMIT = 20
+
+
+class AutocompleteSource(NamedTuple):
+    queryset: Callable
+    # Fields matched with istartswith, i.e. UPPER(field) LIKE 'QUERY%'. The
+    # vehicle, VP and client fields have a gin_trgm_ops index on UPPER(field)
+    # for it; salespeople and users are few enough to be scanned
+    fields: tuple
+    ordering: str
+    label: Callable = str
+
+
+AUTOCOMPLETE_SOURCES = {
+    "vehicle": AutocompleteSource(
+        # The VAN is an integer, matched through the same text cast as its trigram index
+        queryset=lambda: Vehicle.objects.annotate(van_text=Cast("van", models.TextField())).select_related("vp"),
+        fields=("van_text", "vin", "plate"),
+        ordering="van",
+    ),
+    "vp": AutocompleteSource(
+        queryset=lambda: VP.objects.all(),
+        fields=("vp_code", "modelo"),
+        ordering="vp_code",
+        label=lambda vp: " · ".join(filter(None, [vp.vp_code, vp.modelo, vp.version])),
+    ),
+    "salesperson": AutocompleteSource(
+        queryset=lambda: Salesperson.objects.select_related("user"),
+        fields=("user__username", "user__first_name", "user__last_name", "distributor"),
+        ordering="user__username",
+    ),
+    "client": AutocompleteSource(
+        queryset=lambda: Client.objects.all(),
+        fields=("name", "nif"),
+        ordering="name",
+        label=lambda client: " · ".join(filter(None, [client.name, client.nif])),
+    ),
+    "user": AutocompleteSource(
+        queryset=lambda: get_user_model().objects.all(),
+        fields=("username", "first_name", "last_name"),
+        ordering="username",
+        label=lambda user: user.get_full_name() or user.username,
+    ),
+}
+
+
+def _options(kind, query, limit):
+    source = AUTOCOMPLETE_SOURCES[kind]
+    queryset = source.queryset()
+    query = query.strip()
+    if query:
+        condition = Q()
+        for name in source.fields:
+            condition |= Q(**{f"{name}__istartswith": query})
+        queryset = queryset.filter(condition)
+    return source, queryset.order_by(source.ordering)[:limit]
+
+
+def autocomplete_options(kind, query, limit=AUTOCOMPLETE_LIMIT):
+    """Up to ``limit`` (pk, label) pairs of ``kind`` with a field starting with ``query``."""
+    source, queryset = _options(kind, query, limit)
+    return [(obj.pk, source.label(obj)) for obj in queryset]
+
+
+async def aautocomplete_options(kind, query, limit=AUTOCOMPLETE_LIMIT):
+    source, queryset = _options(kind, query, limit)
+    return [(obj.pk, source.label(obj)) async for obj in queryset]
@@ -0,0 +1,254 @@
+import csv
+import io
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from django.core.management.color import no_style
+from django.db import connection
+
+from .importers import STOCK_COLUMNS, StockFileReader, import_stock_chunks, iter_frame_chunks
+from .models import OCFStock, StockSummary, VP, Vehicle
+from .vp_cache import invalidate_vp_cache, preload_vp_cache
+
+# Distinct VP codes in a synthetic export, about the size of the real catalogue
+SYNTHETIC_VP_COUNT = 400
+
+
+# ============================================================
+# Synthetic factory exports
+# ============================================================
+def synthetic_stock_frame(rows, first_van=1, seed=0, vp_count=SYNTHETIC_VP_COUNT):
+    """
+    A factory stock export of ``rows`` vehicles with consecutive VANs from
+    ``first_van``, in the exact columns (and order) of STOCK_COLUMNS. VP
+    attributes follow the VP code, as in the real export; ``seed`` makes the
+    frame reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    vans = np.arange(first_van, first_van + rows)
+    vp = rng.integers(vp_count, size=rows)
+    days = pd.date_range("2023-01-01", periods=1000).date
+
+    def pick(values):
+        return np.asarray(values, dtype=object)[rng.integers(len(values), size=rows)]
+
+    def of_vp(values):
+        return np.asarray(values, dtype=object)[vp % len(values)]
+
+    def some_dates(blank=0.3):
+        dates = pick(days)
+        dates[rng.random(rows) < blank] = None
+        return dates
+
+    columns = {
+        "VAN Testo": vans,
+        "VIN_V": [f"ZCF{van:014d}" for van in vans],
+        "Ubicazione_Paese": pick(["IT", "PT", "ES", "FR"]),
+        "VP Codice": [f"VP{code:05d}" for code in vp],
+        "Gruppo Alternativo 1": of_vp(["A", "B", "C", None]),
+        "Gruppo Alternativo 2": of_vp(["V1", "V2", "V3"]),
+        "Motore_V": of_vp(["F1AGL411", "F1CFA401", "F1AGL4115"]),
+        "NIC Livello 1": of_vp(["Daily", "Ducato", "Scudo"]),
+        "NIC Livello 5": of_vp(["35S", "35C", "50C", "70C", "72C"]),
+        "CT - Descrizione estesa codice cabina comfort": of_vp(["Standard", "Comfort", None]),
+        "EP - Descrizione estesa potenza motore": of_vp(["136 CV", "156 CV", "180 CV", "207 CV"]),
+        "GT - Descrizione estesa tipo gearbox": of_vp(["Manual 6", "Hi-Matic 8"]),
+        "WB - Descrizione estesa interasse": of_vp(["3000", "3520", "4100"]),
+        "HI - Descrizione estesa compartimento di carico": of_vp(["H1", "H2", "H3"]),
+        "Colore_Codice (Numerico)": of_vp([101, 202, 303, 404]),
+        "Colore_Descrizione Estesa": of_vp(["Bianco", "Nero", "Grigio", "Blu"]),
+        "Flag NCF Stato": pick([1, 0]),
+        "OCF Data Giorno": some_dates(),
+        "Canale Di Vendita_Descrizione": pick(["Retail", "Fleet", "Rental"]),
+        "Canale Di Vendita Amministrativo_Descrizione Estesa": pick(["Dist A", "Dist B", "Dist C", None]),
+        "Ordine Di Vendita Data Giorno": some_dates(0.1),
+        "Ordine": rng.integers(100000, 999999, size=rows),
+        "Cliente_Nome": pick(["ACME LDA", "Transportes Silva SA", "Rent Norte", None]),
+        "Nome Cliente (Destinatario Merci)": pick(["ACME", "Silva", None]),
+        "Stato Fatturazione": pick(["Sold", "Not Sold"]),
+        "Stato Produttivo": pick(["Produced", "Planned"]),
+        "Fattura Data Giorno_V": some_dates(0.5),
+        "Ubicazione_Descrizione": pick(["Lisboa", "Porto", "Torino", "Suzzara"]),
+        "Location Data Giorno_V": some_dates(0.2),
+        "MAV Data Giorno_V": some_dates(0.8),
+        "Elemento di testo": pick(["nota", None, None, None]),
+    }
+    return pd.DataFrame(columns)[list(STOCK_COLUMNS)]
+
+
+def changed_stock_frame(frame):
+    """``frame`` with a new production state and location, so every row is imported as an update."""
+    changed = frame.copy()
+    changed["Stato Produttivo"] = changed["Stato Produttivo"].map({"Produced": "Planned", "Planned": "Produced"})
+    changed["Ubicazione_Descrizione"] = changed["Ubicazione_Descrizione"] + " 2"
+    return changed
+
+
+def write_stock_file(frame, file_format):
+    """``frame`` as the bytes of a .xlsx workbook or a .csv file, the way the factory sends them."""
+    buffer = io.BytesIO()
+    rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False)
+    if file_format == "xlsx":
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(frame.columns))
+        for row in rows:
+            sheet.append(row)
+        workbook.save(buffer)
+    else:
+        text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(frame.columns)
+        writer.writerows(rows)
+        text.detach()
+    return buffer.getvalue()
+
+
+# ============================================================
+# Measurements
+# ============================================================
+def _rss():
+    """Resident memory of this process in bytes (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+class PeakMemory:
+    """Context manager sampling the resident memory every ``interval`` seconds and keeping the peak."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = _rss()
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = _rss()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class QueryCounter:
+    """connection.execute_wrapper() counting queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+@dataclass
+class ImportBenchmark:
+    rows: int
+    new: int
+    changed: int
+    unchanged: int
+    file_format: str
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
+    queries: int = 0
+    db_seconds: float = 0.0
+    transactions: int = 0
+    transaction_ms_mean: float = 0.0
+    transaction_ms_max: float = 0.0
+    peak_rss_mb: float = None
+    # Counters of the import itself, to check the scenario did what it says
+    result: dict = field(default_factory=dict)
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def clear_stock():
+    """Empty the stock tables (and what references them) so every run starts from the same state."""
+    tables = [model._meta.db_table for model in (OCFStock, Vehicle, VP, StockSummary)]
+    connection.ops.execute_sql_flush(
+        connection.ops.sql_flush(no_style(), tables, reset_sequences=True, allow_cascade=True)
+    )
+    invalidate_vp_cache()
+
+
+def benchmark_stock_import(rows, new=0.5, changed=0.25, file_format="xlsx", seed=0):
+    """
+    Time the import of a synthetic export of ``rows`` rows: a ``new`` share
+    of VANs not in the database, a ``changed`` share already imported with
+    other values and the rest already imported as is. The stock tables are
+    cleared and the existing rows imported first, untimed. The file is read
+    in chunks, each chunk in its own transaction, as the import worker does.
+    """
+    new_rows = round(rows * new)
+    changed_rows = min(round(rows * changed), rows - new_rows)
+    existing = synthetic_stock_frame(rows - new_rows, first_van=1, seed=seed)
+    source = pd.concat([
+        synthetic_stock_frame(new_rows, first_van=len(existing) + 1, seed=seed + 1),
+        changed_stock_frame(existing.iloc[:changed_rows]),
+        existing.iloc[changed_rows:],
+    ]).sample(frac=1, random_state=seed)
+    content = write_stock_file(source, file_format)
+
+    clear_stock()
+    import_stock_chunks(iter_frame_chunks(existing))
+    preload_vp_cache()
+
+    benchmark = ImportBenchmark(
+        rows=rows, new=new_rows, changed=changed_rows, unchanged=rows - new_rows - changed_rows, file_format=file_format,
+    )
+    # A chunk's transaction runs from the moment the reader hands it over
+    # until the progress callback after its commit
+    handed_over, transactions = [], []
+
+    def chunks():
+        for frame in StockFileReader(io.BytesIO(content), f"benchmark.{file_format}"):
+            handed_over.append(time.perf_counter())
+            yield frame
+
+    def committed(processed, result):
+        transactions.append(time.perf_counter() - handed_over[-1])
+
+    queries = QueryCounter()
+    with PeakMemory() as memory, connection.execute_wrapper(queries):
+        start = time.perf_counter()
+        result = import_stock_chunks(chunks(), progress=committed)
+        benchmark.seconds = round(time.perf_counter() - start, 3)
+
+    benchmark.rows_per_second = round(rows / benchmark.seconds, 1)
+    benchmark.queries = queries.count
+    benchmark.db_seconds = round(queries.seconds, 3)
+    benchmark.transactions = len(transactions)
+    if transactions:
+        benchmark.transaction_ms_mean = round(sum(transactions) / len(transactions) * 1000, 1)
+        benchmark.transaction_ms_max = round(max(transactions) * 1000, 1)
+    if memory.peak is not None:
+        benchmark.peak_rss_mb = round(memory.peak / 2 ** 20, 1)
+    benchmark.result = {
+        "created": result.created,
+        "updated": result.updated,
+        "unchanged": result.unchanged,
+        "skipped": result.skipped,
+        "errors": result.errors,
+    }
+    return benchmark
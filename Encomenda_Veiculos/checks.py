@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries live in one process only
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_vp_cache_backend(app_configs, **kwargs):
+    """The VP cache (vp_cache) retires VPs in other processes only through a shared cache backend."""
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"The default cache backend ({backend}) is not shared between processes.",
+            hint=(
+                "VP changes made by the import worker or another web process stay invisible "
+                "until VP_CACHE_TIMEOUT; configure CACHES with a shared backend such as Redis or Memcached."
+            ),
+            id="Encomenda_Veiculos.W001",
+        )
+    ]
@@ -0,0 +1,134 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import transaction
+
+from .importers import BATCH_SIZE, CHUNK_ROWS
+from .models import Client, OCFStock
+
+# Company forms dropped from the end of a name, so "ACME, Lda." and "ACME"
+# are the same client
+LEGAL_FORMS = {
+    "LDA", "LIMITADA", "SA", "UNIPESSOAL", "SGPS", "SU", "CRL", "EIRL", "ACE",
+    "SL", "SRL", "SPA", "SAS", "SARL", "GMBH", "BV", "NV", "LTD", "INC",
+}
+# Factory names sometimes carry the client's NIF, e.g. "ACME LDA - PT501234567"
+NIF_IN_NAME = re.compile(r"(?<!\d)(\d{9})(?!\d)")
+NIF_WORD = re.compile(r"(?:PT)?\d{9}")
+# Several clients share the normalised name: never matched by name
+AMBIGUOUS = object()
+
+
+def normalise_client_name(name):
+    """
+    ``name`` in upper case without accents, punctuation, NIFs or a trailing
+    company form, with single spaces; None when nothing is left.
+    """
+    if not name:
+        return None
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(char for char in text if not unicodedata.combining(char)).upper()
+    # "S.A." -> "SA" before the other punctuation splits words
+    text = re.sub(r"[^\w\s]+", lambda match: "" if match.group() == "." else " ", text)
+    words = [word for word in text.replace("_", " ").split() if not NIF_WORD.fullmatch(word)]
+    while len(words) > 1 and words[-1] in LEGAL_FORMS:
+        words.pop()
+    return " ".join(words) or None
+
+
+class ClientIndex:
+    """
+    Clients by NIF and by normalised name, held in memory so thousands of
+    stock rows are matched without a query each.
+    """
+
+    def __init__(self, clients):
+        """``clients``: (id, name, nif) tuples."""
+        self.by_name = {}
+        self.by_nif = {}
+        for pk, name, nif in clients:
+            key = normalise_client_name(name)
+            if key is not None:
+                self.by_name[key] = pk if self.by_name.get(key, pk) == pk else AMBIGUOUS
+            if nif:
+                self.by_nif[nif] = pk
+        self._matches = {}
+
+    @classmethod
+    def load(cls):
+        return cls(Client.objects.order_by().values_list("id", "name", "nif").iterator(chunk_size=BATCH_SIZE * 10))
+
+    def _match(self, text):
+        for nif in NIF_IN_NAME.findall(text):
+            if nif in self.by_nif:
+                return self.by_nif[nif]
+        pk = self.by_name.get(normalise_client_name(text))
+        return None if pk is AMBIGUOUS else pk
+
+    def match(self, *names):
+        """Id of the client named by the first of ``names`` that matches one (NIF first, then name), or None."""
+        for text in names:
+            if not text:
+                continue
+            if text not in self._matches:
+                self._matches[text] = self._match(text)
+            if self._matches[text] is not None:
+                return self._matches[text]
+        return None
+
+
+def resolve_stock_clients(index=None, chunk_rows=CHUNK_ROWS):
+    """
+    Link the OCF entries flagged client_pending to the client their
+    client_name (or else client_final) names, and clear the flag. Entries
+    that match no client, or an ambiguous name, are left without one.
+
+    Only flagged entries are read, through a partial index, so it is cheap
+    to run after every import. Each chunk commits on its own; entries locked
+    by another resolver are skipped. Returns (entries resolved, entries
+    whose client changed).
+    """
+    pending = OCFStock.objects.filter(client_pending=True).order_by("id")
+    if not pending.exists():
+        return 0, 0
+    index = ClientIndex.load() if index is None else index
+    resolved = changed = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                pending.filter(id__gt=last_id).select_for_update(skip_locked=True)
+                .values_list("id", "client_name", "client_final", "client_id")[:chunk_rows]
+            )
+            if not rows:
+                break
+            # Client id -> entries to link to it: one UPDATE per client rather
+            # than a bulk_update CASE over every entry
+            links = defaultdict(list)
+            unchanged = []
+            for pk, client_name, client_final, client_id in rows:
+                match = index.match(client_name, client_final)
+                if match == client_id:
+                    unchanged.append(pk)
+                else:
+                    links[match].append(pk)
+            for client_id, ids in links.items():
+                OCFStock.objects.filter(id__in=ids).update(client_id=client_id, client_pending=False)
+            OCFStock.objects.filter(id__in=unchanged).update(client_pending=False)
+        resolved += len(rows)
+        changed += len(rows) - len(unchanged)
+        last_id = rows[-1][0]
+    return resolved, changed
+
+
+def queue_unlinked_stock():
+    """
+    Flag the named OCF entries without a client for resolve_stock_clients,
+    after clients were added or renamed. Returns how many were flagged.
+    """
+    return (
+        OCFStock.objects.filter(client=None, client_pending=False)
+        .exclude(client_name=None, client_final=None)
+        .update(client_pending=True)
+    )
@@ -0,0 +1,111 @@
+import csv
+import datetime
+
+from openpyxl import Workbook
+
+from .importers import STOCK_COLUMNS
+
+# Rows fetched per round trip of the server-side cursor
+EXPORT_CHUNK_ROWS = 2000
+# Not read by the import, added so the export is complete
+SALESPERSON_COLUMN = 'Vendedor'
+
+
+def stock_export_queryset(queryset):
+    return queryset.select_related('vehicle__vp', 'salesperson__user').order_by('vehicle_id')
+
+
+def stock_export_header():
+    return list(STOCK_COLUMNS) + [SALESPERSON_COLUMN]
+
+
+def _export_value(column, value):
+    """Stored value -> cell value the import turns back into the same value."""
+    if isinstance(value, bool):
+        expected = getattr(column.parse, 'expected', None)
+        if expected is not None:
+            return expected if value else None
+        return int(value)
+    return value
+
+
+def _export_row(ocf):
+    sources = {'ocf': ocf, 'vehicle': ocf.vehicle, 'vp': ocf.vehicle.vp}
+    row = [_export_value(column, getattr(sources[column.model], column.field)) for column in STOCK_COLUMNS.values()]
+    row.append(ocf.salesperson.user.username if ocf.salesperson else None)
+    return row
+
+
+def stock_export_rows(queryset):
+    """
+    One list of cell values per OCF entry, in stock_export_header() order.
+    The queryset is read through a server-side cursor, EXPORT_CHUNK_ROWS at a
+    time, so memory does not grow with the number of rows.
+    """
+    for ocf in stock_export_queryset(queryset).iterator(chunk_size=EXPORT_CHUNK_ROWS):
+        yield _export_row(ocf)
+
+
+async def astock_export_rows(queryset):
+    async for ocf in stock_export_queryset(queryset).aiterator(chunk_size=EXPORT_CHUNK_ROWS):
+        yield _export_row(ocf)
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    return value.isoformat() if isinstance(value, datetime.date) else value
+
+
+def stream_stock_csv(queryset):
+    """
+    CSV lines of the export, produced while rows come out of the cursor. For
+    WSGI, which serves only synchronous iterators without buffering them.
+    """
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM so Excel opens the file as UTF-8
+    yield writer.writerow(stock_export_header())
+    for row in stock_export_rows(queryset):
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+async def astream_stock_csv(queryset):
+    """
+    stream_stock_csv as an async iterator, for ASGI: a slow download holds
+    no worker thread.
+    """
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM so Excel opens the file as UTF-8
+    yield writer.writerow(stock_export_header())
+    async for row in astock_export_rows(queryset):
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def write_stock_xlsx(queryset, file):
+    """
+    Write the export to ``file`` as .xlsx. The write-only workbook flushes
+    rows to disk as they are appended instead of keeping every cell in memory.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Stock')
+    sheet.append(stock_export_header())
+    for row in stock_export_rows(queryset):
+        sheet.append(row)
+    workbook.save(file)
+
+
+# Columns of the rejected rows download of an import
+ROW_ISSUE_FIELDS = ['source', 'row', 'column', 'value', 'kind', 'reason']
+
+
+def stream_row_issues_csv(queryset):
+    """ImportRowIssue rows as CSV lines, read through a server-side cursor."""
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM so Excel opens the file as UTF-8
+    yield writer.writerow(ROW_ISSUE_FIELDS)
+    for values in queryset.values_list(*ROW_ISSUE_FIELDS).iterator(chunk_size=EXPORT_CHUNK_ROWS):
+        yield writer.writerow(values)
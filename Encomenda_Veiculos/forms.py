@@ -1,10 +1,15 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.core.validators import FileExtensionValidator
+from django.utils.translation import gettext_lazy as _
 from .models import Salesperson, Client, ClientContact, VP, Vehicle, InternalTransport, OCFStock
+from .widgets import AutocompleteSelect
 
 class SalespersonForm(forms.ModelForm):
     class Meta:
         model = Salesperson
         fields = '__all__'
+        widgets = {'user': AutocompleteSelect('user')}
 
 class ClientForm(forms.ModelForm):
     class Meta:
@@ -25,16 +30,176 @@ class VehicleForm(forms.ModelForm):
     class Meta:
         model = Vehicle
         fields = '__all__'
+        widgets = {'vp': AutocompleteSelect('vp')}
 
 class InternalTransportForm(forms.ModelForm):
     class Meta:
         model = InternalTransport
         fields = '__all__'
+        widgets = {'vehicle': AutocompleteSelect('vehicle')}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Vehicle choices are labelled with their VP code
+        self.fields['vehicle'].queryset = Vehicle.objects.select_related('vp')
 
 class OCFStockForm(forms.ModelForm):
     class Meta:
         model = OCFStock
         fields = '__all__'
+        widgets = {
+            'vehicle': AutocompleteSelect('vehicle'),
+            'salesperson': AutocompleteSelect('salesperson'),
+            'client': AutocompleteSelect('client'),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['vehicle'].queryset = Vehicle.objects.select_related('vp')
+        self.fields['salesperson'].queryset = Salesperson.objects.select_related('user')
+
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+class MultipleFileField(forms.FileField):
+    """FileField accepting several uploads; cleans to a list of files."""
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("widget", MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        if isinstance(data, (list, tuple)):
+            return [super(MultipleFileField, self).clean(item, initial) for item in data]
+        return [super().clean(data, initial)]
 
 class ImportFileForm(forms.Form):
-    file = forms.FileField()
+    file = MultipleFileField(
+        validators=[FileExtensionValidator(['xlsx', 'xls', 'csv', 'parquet'])],
+        help_text=_("Select several files to import them together; every sheet with a VAN column is imported."),
+    )
+    dry_run = forms.BooleanField(required=False, label=_("Preview only (dry run)"))
+
+class ClientImportFileForm(forms.Form):
+    file = forms.FileField(
+        validators=[FileExtensionValidator(['xlsx', 'xls', 'csv', 'parquet'])],
+        help_text=_("CRM client export; clients are matched by code, or by NIF when the code is blank."),
+    )
+
+class ResolvedModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField whose submitted value an async view looks up first with
+    aresolve(), through the async ORM; validating the field and rendering
+    its AutocompleteSelect then use that lookup instead of querying.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # str(submitted value) -> instance, or None when there is none
+        self.resolved = {}
+
+    def __deepcopy__(self, memo):
+        # Every form gets its own copy of the field, and its own lookups
+        result = super().__deepcopy__(memo)
+        result.resolved = {}
+        return result
+
+    async def aresolve(self, value):
+        if value in self.empty_values:
+            return
+        key = self.to_field_name or 'pk'
+        try:
+            instance = await self.queryset.aget(**{key: value})
+        except (ValueError, TypeError, ValidationError, self.queryset.model.DoesNotExist):
+            instance = None
+        self.resolved[str(value)] = instance
+
+    def to_python(self, value):
+        if value in self.empty_values or str(value) not in self.resolved:
+            return super().to_python(value)
+        instance = self.resolved[str(value)]
+        if instance is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+        return instance
+
+DATE_INPUT = forms.DateInput(attrs={'type': 'date'})
+YES_NO_ANY = [('', _("Any")), ('true', _("Yes")), ('false', _("No"))]
+
+class OCFStockFilterForm(forms.Form):
+    """GET filters of the OCF stock list and search API; empty fields do not filter."""
+    sold = forms.NullBooleanField(required=False, widget=forms.Select(choices=YES_NO_ANY), label=_("Sold"))
+    produced = forms.NullBooleanField(required=False, widget=forms.Select(choices=YES_NO_ANY), label=_("Produced"))
+    has_client = forms.NullBooleanField(required=False, widget=forms.Select(choices=YES_NO_ANY), label=_("Has Client"))
+    distributor = forms.CharField(required=False, label=_("Distributor"))
+    channel = forms.CharField(required=False, label=_("Channel"))
+    location = forms.CharField(required=False, label=_("Location"))
+    salesperson = ResolvedModelChoiceField(
+        queryset=Salesperson.objects.select_related('user'), required=False, label=_("Salesperson"),
+        widget=AutocompleteSelect('salesperson'),
+    )
+    client = ResolvedModelChoiceField(
+        queryset=Client.objects.all(), required=False, label=_("Client"),
+        widget=AutocompleteSelect('client'),
+    )
+    order_date_from = forms.DateField(required=False, widget=DATE_INPUT, label=_("Order date from"))
+    order_date_to = forms.DateField(required=False, widget=DATE_INPUT, label=_("Order date to"))
+    delivery_date_from = forms.DateField(required=False, widget=DATE_INPUT, label=_("Delivery date from"))
+    delivery_date_to = forms.DateField(required=False, widget=DATE_INPUT, label=_("Delivery date to"))
+    modelo = forms.CharField(required=False, label=_("Modelo"))
+    version = forms.CharField(required=False, label=_("Version"))
+    gama = forms.CharField(required=False, label=_("Gama"))
+
+    # Form field -> queryset lookup, all exact or range matches so they can use indexes
+    LOOKUPS = {
+        'sold': 'sold',
+        'produced': 'produced',
+        'has_client': 'has_client',
+        'distributor': 'distributor',
+        'channel': 'channel',
+        'location': 'location',
+        'salesperson': 'salesperson',
+        'client': 'client',
+        'order_date_from': 'order_date__gte',
+        'order_date_to': 'order_date__lte',
+        'delivery_date_from': 'delivery_date__gte',
+        'delivery_date_to': 'delivery_date__lte',
+        'modelo': 'vehicle__vp__modelo',
+        'version': 'vehicle__vp__version',
+        'gama': 'vehicle__vp__gama',
+    }
+
+    async def ais_valid(self):
+        """is_valid() for async views: the salesperson and client are looked up with the async ORM first."""
+        for name, field in self.fields.items():
+            if isinstance(field, ResolvedModelChoiceField):
+                await field.aresolve(self[name].data)
+        return self.is_valid()
+
+    def filter(self, queryset):
+        filters = {
+            lookup: self.cleaned_data[name]
+            for name, lookup in self.LOOKUPS.items()
+            if self.cleaned_data.get(name) not in (None, '')
+        }
+        return queryset.filter(**filters)
+
+# Widest window the transport calendar may load at once
+MAX_CALENDAR_DAYS = 366
+
+class TransportWindowForm(forms.Form):
+    """Date window [start, end) of the transport calendar and the field its rows show."""
+    start = forms.DateField(label=_("Start"))
+    end = forms.DateField(label=_("End"))
+    group = forms.ChoiceField(
+        required=False,
+        choices=[('origin', _("Origin")), ('destination', _("Destination"))],
+        label=_("Rows"),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start'), cleaned_data.get('end')
+        if start and end and not 0 < (end - start).days <= MAX_CALENDAR_DAYS:
+            raise forms.ValidationError(
+                _("The window must end after it starts and span at most %(days)s days."),
+                params={'days': MAX_CALENDAR_DAYS},
+            )
+        return cleaned_data
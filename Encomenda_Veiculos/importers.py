@@ -0,0 +1,1291 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import django
+import numpy as np
+import openpyxl
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import (
+    EmailValidator,
+    MaxLengthValidator,
+    MaxValueValidator,
+    MinValueValidator,
+    RegexValidator,
+)
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+from .models import VP, Vehicle, OCFStock, Client, ImportRowIssue
+from .summary import apply_stock_summary_counts, stock_summary_counts
+from .vp_cache import get_vps_by_code, invalidate_vp_cache
+
+# Rows written per INSERT/UPDATE statement and values per prefetch IN (...) query
+BATCH_SIZE = 1000
+# Rows imported per transaction when a file is processed in chunks
+CHUNK_ROWS = 5000
+
+
+@dataclass
+class StockImportResult:
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    unchanged: int = 0
+    errors: int = 0
+    # Source column -> row indexes whose cell could not be converted or
+    # fails the validators of its model field
+    invalid_cells: dict = field(default_factory=dict)
+    # Every rejected row as {'kind', 'row', 'column', 'value', 'reason'}, until
+    # the job stores them as ImportRowIssue rows (see jobs.store_row_issues)
+    issues: list = field(default_factory=list)
+
+    @property
+    def success(self):
+        return self.created + self.updated
+
+    def add(self, other):
+        self.created += other.created
+        self.updated += other.updated
+        self.skipped += other.skipped
+        self.unchanged += other.unchanged
+        self.errors += other.errors
+        for source, rows in other.invalid_cells.items():
+            self.invalid_cells.setdefault(source, []).extend(rows)
+        self.issues.extend(other.issues)
+
+
+def _chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# ============================================================
+# Column parsers: each one converts a whole source column at once and
+# returns NaN/None where a cell is empty or could not be converted
+# ============================================================
+def _text(series):
+    return series.map(str, na_action='ignore')
+
+
+def _integer(series):
+    # 1.5 is not an integer: left empty, so the cell is rejected rather than truncated
+    numbers = pd.to_numeric(series, errors='coerce')
+    return numbers.where(np.isfinite(numbers) & numbers.eq(np.trunc(numbers))).astype('Int64')
+
+
+def _date(series):
+    parsed = pd.to_datetime(series, errors='coerce')
+    # Cells that don't match the format inferred from the column get a second, per-cell pass
+    retry = parsed.isna() & series.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(series[retry], errors='coerce', format='mixed')
+    return parsed.dt.date
+
+
+def _flag(series):
+    # Numeric cells (and numeric text from CSV) are set when non-zero, anything else by truthiness
+    numeric = pd.to_numeric(series, errors='coerce')
+    return series.map(bool, na_action='ignore').mask(numeric.notna(), numeric != 0)
+
+
+def _equals(expected):
+    def parse(series):
+        return series.eq(expected).where(series.notna())
+    # Kept for the exporter, which writes the label back for True
+    parse.expected = expected
+    return parse
+
+
+# What a re-import does with the value of an existing row
+NEVER = 'never'          # keep the stored value
+OVERWRITE = 'overwrite'  # replace it with any non-empty source value
+FILL = 'fill'            # set it only while the stored value is empty
+UPDATE_POLICIES = (NEVER, OVERWRITE, FILL)
+
+
+class Column(NamedTuple):
+    model: str
+    field: str
+    parse: Callable
+    policy: str = NEVER
+
+    @property
+    def key(self):
+        return f"{self.model}.{self.field}"
+
+
+# Source column (as exported by the factory) -> target model field
+STOCK_COLUMNS = {
+    'VAN Testo': Column('vehicle', 'van', _integer),
+    'VIN_V': Column('vehicle', 'vin', _text),
+    'Ubicazione_Paese': Column('vehicle', 'country', _text),
+
+    'VP Codice': Column('vp', 'vp_code', _text),
+    'Gruppo Alternativo 1': Column('vp', 'variant', _text),
+    'Gruppo Alternativo 2': Column('vp', 'version', _text),
+    'Motore_V': Column('vp', 'engine_code', _text),
+    'NIC Livello 1': Column('vp', 'gama', _text),
+    'NIC Livello 5': Column('vp', 'modelo', _text),
+    'CT - Descrizione estesa codice cabina comfort': Column('vp', 'cabina', _text),
+    'EP - Descrizione estesa potenza motore': Column('vp', 'motor', _text),
+    'GT - Descrizione estesa tipo gearbox': Column('vp', 'gearbox', _text),
+    'WB - Descrizione estesa interasse': Column('vp', 'wheelbase', _text),
+    'HI - Descrizione estesa compartimento di carico': Column('vp', 'hi', _text),
+    'Colore_Codice (Numerico)': Column('vp', 'color_code_numeric', _integer),
+    'Colore_Descrizione Estesa': Column('vp', 'color_desc', _text),
+
+    'Flag NCF Stato': Column('ocf', 'has_client', _flag),
+    'OCF Data Giorno': Column('ocf', 'client_assigned_date', _date),
+    'Canale Di Vendita_Descrizione': Column('ocf', 'channel', _text),
+    'Canale Di Vendita Amministrativo_Descrizione Estesa': Column('ocf', 'distributor', _text),
+    'Ordine Di Vendita Data Giorno': Column('ocf', 'order_date', _date),
+    'Ordine': Column('ocf', 'order_number', _integer),
+    'Cliente_Nome': Column('ocf', 'client_name', _text),
+    'Nome Cliente (Destinatario Merci)': Column('ocf', 'client_final', _text),
+    'Stato Fatturazione': Column('ocf', 'sold', _equals('Sold')),
+    'Stato Produttivo': Column('ocf', 'produced', _equals('Produced'), OVERWRITE),
+    'Fattura Data Giorno_V': Column('ocf', 'delivery_date', _date),
+    'Ubicazione_Descrizione': Column('ocf', 'location', _text),
+    'Location Data Giorno_V': Column('ocf', 'location_date', _date),
+    'MAV Data Giorno_V': Column('ocf', 'warranty_start', _date),
+    'Elemento di testo': Column('ocf', 'notes', _text),
+}
+
+VAN_COLUMN = 'VAN Testo'
+VIN_COLUMN = 'VIN_V'
+VP_CODE_COLUMN = 'VP Codice'
+KEY_FIELDS = ('van', 'vp_code')
+
+IMPORT_MODELS = {'vp': VP, 'vehicle': Vehicle, 'ocf': OCFStock, 'client': Client}
+
+# Existing vehicles follow the VP code of their latest row
+VEHICLE_VP_POLICY = OVERWRITE
+
+# OCF entries get the ISO week of their order date while they have none;
+# the week can also be set by hand
+ORDER_WEEK_POLICY = FILL
+
+# Boolean OCF fields that are stored as False when the source cell is empty
+OCF_FLAG_FIELDS = ['has_client', 'sold', 'produced']
+
+# OCF fields matched to a Client record (client_links)
+CLIENT_NAME_FIELDS = {'client_name', 'client_final'}
+
+
+def update_policies(model):
+    """
+    Field -> update policy for ``model`` ('vp', 'vehicle' or 'ocf'), taken from
+    STOCK_COLUMNS and overridden by settings.STOCK_IMPORT_UPDATE_POLICIES,
+    e.g. ``{'ocf.location': 'overwrite', 'vp.modelo': 'fill'}``.
+    """
+    policies = {
+        column.field: column.policy
+        for column in STOCK_COLUMNS.values()
+        if column.model == model and column.field not in KEY_FIELDS
+    }
+    if model == 'vehicle':
+        policies['vp'] = VEHICLE_VP_POLICY
+    if model == 'ocf':
+        policies['order_week'] = ORDER_WEEK_POLICY
+
+    for key, policy in getattr(settings, 'STOCK_IMPORT_UPDATE_POLICIES', {}).items():
+        override_model, _, field_name = key.partition('.')
+        if override_model != model:
+            continue
+        if field_name not in policies or policy not in UPDATE_POLICIES:
+            raise ImproperlyConfigured(f"Invalid STOCK_IMPORT_UPDATE_POLICIES entry {key!r}: {policy!r}")
+        policies[field_name] = policy
+    return policies
+
+
+def parse_stock_frame(df, columns=None):
+    """
+    Convert every mapped source column of the export once, for the whole frame.
+
+    Returns the typed frame (one ``model.field`` column per mapping, ``None``
+    for empty cells) and, per source column, the index of the non-empty cells
+    that could not be converted. ``columns`` defaults to STOCK_COLUMNS.
+    """
+    df = df.rename(columns=lambda name: str(name).strip())
+    typed = {}
+    invalid_cells = {}
+
+    for source, column in (STOCK_COLUMNS if columns is None else columns).items():
+        raw = df[source] if source in df.columns else pd.Series(None, index=df.index, dtype=object)
+        values = column.parse(raw)
+        invalid = raw.notna() & values.isna()
+        if invalid.any():
+            invalid_cells[source] = list(df.index[invalid])
+        typed[column.key] = values.astype(object).where(values.notna(), None)
+
+    return pd.DataFrame(typed, index=df.index), invalid_cells
+
+
+def _model_frame(typed, model):
+    keys = [column.key for column in STOCK_COLUMNS.values() if column.model == model]
+    return typed[keys].rename(columns=lambda key: key.split('.', 1)[1])
+
+
+def _records(frame):
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def _collapse(frame, key, policies):
+    """
+    One row per ``key`` with the values a row-by-row import would leave behind:
+    NEVER fields keep the first row's value, OVERWRITE fields the last
+    non-empty one and FILL fields the first non-empty one.
+    """
+    if not frame[key].duplicated().any():
+        return frame.set_index(key)
+    grouped = frame.groupby(key, sort=False)
+    sources = {NEVER: grouped.nth(0).set_index(key), OVERWRITE: grouped.last(), FILL: grouped.first()}
+    return pd.DataFrame(
+        {name: sources[policies.get(name, NEVER)][name] for name in frame.columns if name != key},
+        index=sources[NEVER].index,
+    )
+
+
+def _fingerprint(values, policies):
+    """
+    Stable hash of already-typed field values, compared on re-import to skip
+    unchanged rows. The policies are part of it so a policy change re-applies
+    to every row once.
+    """
+    return hashlib.md5(repr((sorted(values.items()), sorted(policies.items()))).encode()).hexdigest()
+
+
+def _issue(kind, row, reason, column=None, value=None):
+    issue = {'kind': kind, 'column': column, 'value': value, 'reason': reason}
+    # Rows merged from several sheets are indexed by (source, row)
+    if isinstance(row, tuple):
+        issue['source'], row = row
+    issue['row'] = int(row)
+    return issue
+
+
+@dataclass
+class _ParsedStock:
+    vps: pd.DataFrame
+    vehicles: pd.DataFrame
+    ocf: pd.DataFrame
+    occurrences: pd.Series
+
+
+def _passes(validator, value):
+    try:
+        validator(value)
+    except ValidationError:
+        return False
+    return True
+
+
+def _validator_errors(values, field):
+    """
+    Reason per non-empty typed value that the regex, e-mail, length or range
+    validators of the model ``field`` reject, checked for the whole column at
+    once (e-mail addresses one by one). The database would refuse most of
+    them and fail the whole batch.
+    """
+    present = values.dropna()
+    reasons = pd.Series(None, index=present.index, dtype=object)
+    for validator in field.validators:
+        if isinstance(validator, RegexValidator):
+            failed = present.astype(str).str.contains(validator.regex) == validator.inverse_match
+            reason = str(validator.message)
+        elif isinstance(validator, EmailValidator):
+            failed = ~present.map(partial(_passes, validator)).astype(bool)
+            reason = str(validator.message)
+        elif isinstance(validator, MaxLengthValidator):
+            failed = present.astype(str).str.len() > validator.limit_value
+            reason = f"Longer than {validator.limit_value} characters"
+        elif isinstance(validator, MinValueValidator):
+            failed = present < validator.limit_value
+            reason = f"Less than {validator.limit_value}"
+        elif isinstance(validator, MaxValueValidator):
+            failed = present > validator.limit_value
+            reason = f"Greater than {validator.limit_value}"
+        else:
+            continue
+        reasons = reasons.mask(failed & reasons.isna(), reason)
+    return reasons.dropna()
+
+
+def _rejected_cells(typed, invalid_cells, columns):
+    """
+    Source column -> {row index: reason} for the cells that could not be
+    converted or whose value the model field's validators refuse.
+    """
+    rejected = {source: dict.fromkeys(rows, "Invalid value") for source, rows in invalid_cells.items()}
+    for source, column in columns.items():
+        errors = _validator_errors(typed[column.key], IMPORT_MODELS[column.model]._meta.get_field(column.field))
+        if not errors.empty:
+            rejected.setdefault(source, {}).update(errors.items())
+    return rejected
+
+
+def _drop_rejected(df, typed, rejected, skipped, skip_reason, result):
+    """
+    Count the ``skipped`` rows as skipped and the other rows with a
+    ``rejected`` cell (see _rejected_cells) as errors, record their issues
+    and return the typed frame of the remaining rows.
+    """
+    result.skipped += int(skipped.sum())
+    result.issues.extend(
+        _issue(ImportRowIssue.Kind.SKIPPED, index, skip_reason)
+        for index in typed.index[skipped.to_numpy()]
+    )
+
+    failed = pd.Series(False, index=typed.index)
+    for source, reasons in rejected.items():
+        rows = [index for index in reasons if not skipped.loc[index]]
+        if not rows:
+            continue
+        failed.loc[rows] = True
+        result.invalid_cells[source] = rows
+        result.issues.extend(
+            _issue(ImportRowIssue.Kind.INVALID, index, reasons[index], source, str(value))
+            for index, value in df.loc[rows, source].items()
+        )
+    result.errors += int((failed & ~skipped).sum())
+
+    return typed[~(skipped | failed)]
+
+
+def validate_stock_frame(df, result):
+    """
+    Parse the frame and drop the rows that cannot be imported: rows without a
+    usable VAN/VP code are skipped, rows with any other unconvertible cell or
+    value its model field would not accept count as errors. Returns the typed
+    frame of the remaining rows.
+    """
+    df = df.rename(columns=lambda name: str(name).strip())
+    typed, invalid_cells = parse_stock_frame(df)
+    rejected = _rejected_cells(typed, invalid_cells, STOCK_COLUMNS)
+
+    missing = typed['vehicle.van'].isna() | typed['vp.vp_code'].isna()
+    invalid_key = df.index.isin([*rejected.pop(VAN_COLUMN, {}), *rejected.pop(VP_CODE_COLUMN, {})])
+    return _drop_rejected(df, typed, rejected, missing | invalid_key, "Missing or invalid VAN/VP code", result)
+
+
+def reject_vin_conflicts(typed, result, batch_size=BATCH_SIZE):
+    """
+    Drop the rows of vehicles whose VIN the import would write while another
+    VAN already has it, in the database or earlier in the rows: VINs are
+    unique (uniq_vehicle_vin_nn), so the database would fail the whole batch.
+    The rows count as errors. Returns the remaining rows.
+    """
+    if typed.empty:
+        return typed
+    policy = update_policies('vehicle')['vin']
+    vans = pd.DataFrame({'van': typed['vehicle.van'], 'vin': typed['vehicle.vin']})
+    vins = _collapse(vans, 'van', {'vin': policy})['vin']
+
+    # Which VANs would actually write their VIN, given the update policy
+    state = _fetch_state(Vehicle, 'van', vins.index, ['vin'], batch_size)
+    current = pd.Series([state[van]['vin'] if van in state else None for van in vins.index], index=vins.index, dtype=object)
+    writes = vins.notna() & vins.ne(current)
+    if policy == NEVER:
+        writes &= ~vins.index.isin(list(state))
+    elif policy == FILL:
+        writes &= current.isna() | current.eq('')
+    written = vins[writes]
+
+    reasons = {}
+    owners = {}
+    for chunk in _chunks(written.unique(), batch_size):
+        owners.update(Vehicle.objects.filter(vin__in=chunk).values_list('vin', 'van'))
+    owner = written.map(owners)
+    taken = owner.notna() & owner.ne(written.index.to_series())
+    for van, vin in written[taken].items():
+        reasons[van] = f"VIN {vin} belongs to VAN {owners[vin]}"
+    written = written[~taken]
+    repeated = written.duplicated()
+    first_vans = dict(zip(written[~repeated], written.index[~repeated]))
+    for van, vin in written[repeated].items():
+        reasons[van] = f"VIN {vin} is also on VAN {first_vans[vin]}"
+    if not reasons:
+        return typed
+
+    conflicts = typed['vehicle.van'].isin(list(reasons)).to_numpy()
+    result.errors += int(conflicts.sum())
+    result.issues.extend(
+        _issue(ImportRowIssue.Kind.INVALID, index, reasons[van], VIN_COLUMN, vin)
+        for index, van, vin in typed.loc[conflicts, ['vehicle.van', 'vehicle.vin']].itertuples()
+    )
+    return typed[~conflicts]
+
+
+def _collapse_rows(typed, policies):
+    """Collapse valid typed rows to one row per VP code and per VAN (see _collapse)."""
+    vehicles = _model_frame(typed, 'vehicle')
+    vehicles['vp_code'] = typed['vp.vp_code']
+    ocf = _model_frame(typed, 'ocf')
+    ocf['order_week'] = ocf['order_date'].map(lambda day: day.isocalendar().week, na_action='ignore')
+    ocf['van'] = typed['vehicle.van']
+
+    return _ParsedStock(
+        vps=_collapse(_model_frame(typed, 'vp'), 'vp_code', policies['vp']),
+        vehicles=_collapse(vehicles, 'van', dict(policies['vehicle'], vp_code=policies['vehicle']['vp'])),
+        ocf=_collapse(ocf, 'van', policies['ocf']),
+        occurrences=typed['vehicle.van'].value_counts(),
+    )
+
+
+def _fetch_state(model, key, values, fields, batch_size):
+    """Current ``fields`` of the rows whose ``key`` is in ``values``, as key -> dict."""
+    state = {}
+    for chunk in _chunks(values, batch_size):
+        for row in model.objects.filter(**{f'{key}__in': chunk}).values(key, *fields):
+            state[row.pop(key)] = row
+    return state
+
+
+def _changed_fields(current, values, policies):
+    """Fields of an existing row that its update policy allows to change and whose value differs."""
+    changes = {}
+    for name, policy in policies.items():
+        value = values[name]
+        if policy == NEVER or value is None:
+            continue
+        if policy == FILL and current[name] not in (None, ''):
+            continue
+        if current[name] != value:
+            changes[name] = value
+    return changes
+
+
+def _bulk_update_changes(model, changes, batch_size):
+    """Issue one bulk_update per distinct set of changed fields, so each UPDATE only sets what changed."""
+    groups = defaultdict(list)
+    for obj, fields in changes:
+        groups[tuple(sorted(fields))].append(obj)
+    for fields, objs in groups.items():
+        model.objects.bulk_update(objs, fields, batch_size=batch_size)
+
+
+def _with_flag_defaults(values):
+    return {name: False if name in OCF_FLAG_FIELDS and value is None else value for name, value in values.items()}
+
+
+@dataclass
+class StockImportPlan:
+    """
+    The inserts and updates an import would issue, computed with read queries
+    only. ``*_changes`` hold ``(instance, changed fields)`` pairs; vehicles
+    keep their VP as a code in ``vehicle_vp_codes`` until the VPs exist.
+    """
+    result: StockImportResult
+    vp_ids: dict = field(default_factory=dict)
+    new_vps: list = field(default_factory=list)
+    vp_changes: list = field(default_factory=list)
+    new_vehicles: list = field(default_factory=list)
+    vehicle_changes: list = field(default_factory=list)
+    vehicle_vp_codes: dict = field(default_factory=dict)
+    new_ocf: list = field(default_factory=list)
+    ocf_changes: list = field(default_factory=list)
+    # model -> field -> number of existing rows whose value changes
+    field_changes: dict = field(default_factory=lambda: defaultdict(Counter))
+    # VANs whose vehicle or OCF entry is created or changed
+    written_vans: set = field(default_factory=set)
+
+    def _count_changes(self, model, changes):
+        for name in changes:
+            self.field_changes[model][name] += 1
+
+    def report(self):
+        """Summary of the plan, JSON-serialisable, for the dry-run preview."""
+        changed = {
+            'vp': len(self.vp_changes),
+            'vehicle': sum(1 for _, fields in self.vehicle_changes if 'updated_at' in fields),
+            'ocf': sum(1 for _, fields in self.ocf_changes if 'updated_at' in fields),
+        }
+        created = {'vp': len(self.new_vps), 'vehicle': len(self.new_vehicles), 'ocf': len(self.new_ocf)}
+        return {
+            'rows': {
+                'created': self.result.created,
+                'updated': self.result.updated,
+                'unchanged': self.result.unchanged,
+                'skipped': self.result.skipped,
+                'errors': self.result.errors,
+            },
+            'models': {
+                model: {
+                    'created': created[model],
+                    'updated': changed[model],
+                    'fields': dict(self.field_changes[model]),
+                }
+                for model in ('vp', 'vehicle', 'ocf')
+            },
+            'invalid_cells': {source: len(rows) for source, rows in self.result.invalid_cells.items()},
+        }
+
+
+def _names_client(record):
+    return any(record.get(name) is not None for name in CLIENT_NAME_FIELDS)
+
+
+def plan_stock_import(typed, result=None, batch_size=BATCH_SIZE, earlier_vans=frozenset()):
+    """
+    Compare validated rows (see validate_stock_frame) with the database and
+    return the StockImportPlan that would bring it in line with the file.
+    Only issues SELECTs, so it takes no write locks.
+
+    ``earlier_vans`` are VANs an earlier chunk of the same import created or
+    changed: their rows count as updated, like the repeats of a new VAN
+    within one frame.
+    """
+    plan = StockImportPlan(result=StockImportResult() if result is None else result)
+    if typed.empty:
+        return plan
+
+    policies = {model: update_policies(model) for model in ('vp', 'vehicle', 'ocf')}
+    parsed = _collapse_rows(typed, policies)
+    result = plan.result
+    now = timezone.now()
+    vans = list(parsed.vehicles.index)
+
+    # ============================================================
+    # VP
+    # ============================================================
+    vp_policies = policies['vp']
+    # The catalogue is small and preloaded per job: read it from the VP cache
+    vp_state = {
+        vp_code: {'id': vp.pk, **{name: getattr(vp, name) for name in vp_policies}}
+        for vp_code, vp in get_vps_by_code(parsed.vps.index).items()
+    }
+    plan.vp_ids = {vp_code: current['id'] for vp_code, current in vp_state.items()}
+    for vp_code, values in zip(parsed.vps.index, _records(parsed.vps)):
+        current = vp_state.get(vp_code)
+        if current is None:
+            plan.new_vps.append(VP(vp_code=vp_code, **values))
+            continue
+        changes = _changed_fields(current, values, vp_policies)
+        if changes:
+            plan._count_changes('vp', changes)
+            changes['updated_at'] = now
+            plan.vp_changes.append((VP(id=current['id'], **changes), list(changes)))
+
+    # ============================================================
+    # Vehicle
+    # ============================================================
+    vehicle_policies = dict(policies['vehicle'])
+    vp_policy = vehicle_policies.pop('vp')
+    vehicle_state = _fetch_state(Vehicle, 'van', vans, ['vp_id', 'import_fingerprint', *vehicle_policies], batch_size)
+    changed_vans = set()
+    for van, record in zip(parsed.vehicles.index, _records(parsed.vehicles)):
+        fingerprint = _fingerprint(record, policies['vehicle'])
+        vp_code = record.pop('vp_code')
+        current = vehicle_state.get(van)
+        if current is None:
+            plan.new_vehicles.append(Vehicle(van=van, import_fingerprint=fingerprint, **record))
+            plan.vehicle_vp_codes[van] = vp_code
+            continue
+        if current['import_fingerprint'] == fingerprint:
+            continue
+        changes = _changed_fields(current, record, vehicle_policies)
+        if vp_policy == OVERWRITE and plan.vp_ids.get(vp_code) != current['vp_id']:
+            changes['vp_id'] = None
+            plan.vehicle_vp_codes[van] = vp_code
+        if changes:
+            plan._count_changes('vehicle', ['vp' if name == 'vp_id' else name for name in changes])
+            changes['updated_at'] = now
+            changed_vans.add(van)
+        changes['import_fingerprint'] = fingerprint
+        plan.vehicle_changes.append((Vehicle(van=van, **changes), list(changes)))
+
+    # ============================================================
+    # OCFStock
+    # ============================================================
+    ocf_policies = policies['ocf']
+    ocf_state = _fetch_state(OCFStock, 'vehicle_id', vans, ['id', 'import_fingerprint', *ocf_policies], batch_size)
+    for van, record in zip(parsed.ocf.index, _records(parsed.ocf)):
+        occurrences = int(parsed.occurrences[van])
+        fingerprint = _fingerprint(record, ocf_policies)
+        current = ocf_state.get(van)
+        if current is None:
+            plan.new_ocf.append(OCFStock(
+                vehicle_id=van, import_fingerprint=fingerprint, client_pending=_names_client(record),
+                **_with_flag_defaults(record),
+            ))
+            result.created += (van not in vehicle_state) + 1
+            result.updated += occurrences - 1
+            plan.written_vans.add(van)
+            continue
+
+        changed = van in changed_vans
+        if current['import_fingerprint'] != fingerprint:
+            changes = _changed_fields(current, record, ocf_policies)
+            if changes:
+                plan._count_changes('ocf', changes)
+                changes['updated_at'] = now
+                if changes.keys() & CLIENT_NAME_FIELDS:
+                    # Matched to a client again by resolve_stock_clients
+                    changes['client_pending'] = True
+                changed = True
+            changes['import_fingerprint'] = fingerprint
+            plan.ocf_changes.append((OCFStock(id=current['id'], **changes), list(changes)))
+
+        if changed:
+            plan.written_vans.add(van)
+        if changed or van in earlier_vans:
+            result.updated += occurrences
+        else:
+            result.unchanged += occurrences
+
+    return plan
+
+
+@transaction.atomic(savepoint=False)
+def apply_stock_plan(plan, batch_size=BATCH_SIZE):
+    """
+    Write a StockImportPlan with bulk_create/bulk_update, add what it changed
+    to the stock summary and return its result.
+    """
+    # Entries whose dashboard values the plan may change: those of its VANs
+    # and the stock of VPs given another modelo, locked while it is counted
+    modelo_vps = [vp.id for vp, fields in plan.vp_changes if 'modelo' in fields]
+    touched = None
+    if plan.written_vans or modelo_vps:
+        touched = OCFStock.objects.filter(Q(vehicle_id__in=plan.written_vans) | Q(vehicle__vp_id__in=modelo_vps))
+        list(touched.select_for_update(of=('self',)).values_list('pk', flat=True))
+        summary_before = stock_summary_counts(touched)
+
+    vp_ids = dict(plan.vp_ids)
+    for vp in VP.objects.bulk_create(plan.new_vps, batch_size=batch_size):
+        vp_ids[vp.vp_code] = vp.pk
+    _bulk_update_changes(VP, plan.vp_changes, batch_size)
+    if plan.new_vps or plan.vp_changes:
+        # Bulk queries send no signals
+        transaction.on_commit(invalidate_vp_cache)
+
+    for vehicle in plan.new_vehicles:
+        vehicle.vp_id = vp_ids[plan.vehicle_vp_codes[vehicle.van]]
+    for vehicle, fields in plan.vehicle_changes:
+        if 'vp_id' in fields:
+            vehicle.vp_id = vp_ids[plan.vehicle_vp_codes[vehicle.van]]
+    Vehicle.objects.bulk_create(plan.new_vehicles, batch_size=batch_size)
+    _bulk_update_changes(Vehicle, plan.vehicle_changes, batch_size)
+
+    OCFStock.objects.bulk_create(plan.new_ocf, batch_size=batch_size)
+    _bulk_update_changes(OCFStock, plan.ocf_changes, batch_size)
+
+    if touched is not None:
+        apply_stock_summary_counts(summary_before, stock_summary_counts(touched))
+    return plan.result
+
+
+def _import_batch(write, typed, result, batch_size):
+    """
+    Call ``write(typed, result, batch_size)`` for one batch in its own
+    transaction and return what it returned. When the database still refuses
+    the batch, only this batch is rolled back, its rows count as errors and
+    None is returned.
+    """
+    batch = type(result)()
+    try:
+        with transaction.atomic():
+            written = write(typed, batch, batch_size)
+    except DatabaseError as error:
+        reason = f"Not saved: {str(error).splitlines()[0]}"[:255]
+        result.errors += len(typed)
+        result.issues.extend(_issue(ImportRowIssue.Kind.FAILED, index, reason) for index in typed.index)
+        return None
+    result.add(batch)
+    return written
+
+
+def _write_stock(typed, result, batch_size, earlier_vans=frozenset()):
+    plan = plan_stock_import(typed, result, batch_size, earlier_vans)
+    apply_stock_plan(plan, batch_size)
+    return plan
+
+
+def import_valid_rows(typed, result=None, batch_size=BATCH_SIZE, chunk_rows=CHUNK_ROWS, written_vans=None):
+    """
+    Plan and write already-validated rows, e.g. the rows kept by a dry run,
+    in batches of ``chunk_rows`` VANs that commit independently. All rows of
+    a VAN go in the same batch, so repeated VANs collapse as in one import.
+
+    ``written_vans`` is the set of VANs created or changed by earlier calls
+    of the same import (see plan_stock_import); the VANs of every committed
+    batch are added to it.
+    """
+    result = StockImportResult() if result is None else result
+    written_vans = set() if written_vans is None else written_vans
+    typed = reject_vin_conflicts(typed, result, batch_size)
+    if typed.empty:
+        return result
+    write = partial(_write_stock, earlier_vans=written_vans)
+    batches = pd.factorize(typed['vehicle.van'])[0] // chunk_rows
+    for _, batch in typed.groupby(batches, sort=True):
+        plan = _import_batch(write, batch, result, batch_size)
+        if plan is not None:
+            written_vans.update(plan.written_vans)
+    return result
+
+
+def import_stock_dataframe(df, batch_size=BATCH_SIZE, written_vans=None):
+    """
+    Set-based import of an OCF stock export.
+
+    Existing VPs, Vehicles and OCF entries are prefetched with a handful of
+    ``IN`` queries and all writes go through ``bulk_create``/``bulk_update``,
+    so the number of queries grows with the number of batches, not rows.
+    Existing rows are only updated in the fields their update policy allows
+    and whose value actually changed. Invalid rows are dropped before any
+    write and batches commit on their own (see import_valid_rows, which
+    ``written_vans`` is passed to).
+    """
+    result = StockImportResult()
+    return import_valid_rows(validate_stock_frame(df, result), result, batch_size, written_vans=written_vans)
+
+
+# ============================================================
+# Readers: only the mapped columns are loaded, as plain objects (no dtype
+# inference), and rows are handed out in CHUNK_ROWS-sized frames so memory
+# stays flat whatever the file size
+# ============================================================
+def _is_mapped(name, columns=STOCK_COLUMNS):
+    return str(name).strip() in columns
+
+
+class StockFileReader:
+    """
+    Iterate over a stock export (.xlsx, .xls, .csv or .parquet) as a sequence
+    of DataFrames holding only the columns listed in STOCK_COLUMNS. The frame
+    index is the 0-based data row of the file, so row numbers in reports stay
+    meaningful across chunks. Workbooks are read from ``sheet`` (a position
+    or a name), the first one by default. ``columns`` maps the source
+    columns of another kind of export, e.g. CLIENT_COLUMNS.
+    """
+
+    def __init__(self, file, name, chunk_rows=CHUNK_ROWS, sheet=0, columns=STOCK_COLUMNS):
+        self.file = file
+        self.suffix = Path(name).suffix.lower()
+        self.chunk_rows = chunk_rows
+        self.sheet = sheet
+        self.columns = columns
+
+    def _is_mapped(self, name):
+        return _is_mapped(name, self.columns)
+
+    @property
+    def sheet_names(self):
+        """Worksheet names of a workbook; CSV and Parquet files count as a single sheet 0."""
+        if self.suffix == '.xlsx':
+            workbook = openpyxl.load_workbook(self.file, read_only=True)
+            try:
+                return workbook.sheetnames
+            finally:
+                workbook.close()
+                self.file.seek(0)
+        if self.suffix == '.xls':
+            names = pd.ExcelFile(self.file).sheet_names
+            self.file.seek(0)
+            return names
+        return [0]
+
+    def _worksheet(self, workbook):
+        return workbook.worksheets[self.sheet] if isinstance(self.sheet, int) else workbook[self.sheet]
+
+    @property
+    def total_rows(self):
+        """Row count from the file metadata when it is cheap to get, otherwise None."""
+        if self.suffix == '.xlsx':
+            workbook = openpyxl.load_workbook(self.file, read_only=True, data_only=True)
+            try:
+                max_row = self._worksheet(workbook).max_row
+            finally:
+                workbook.close()
+                self.file.seek(0)
+            return max_row - 1 if max_row else None
+        if self.suffix == '.parquet':
+            return self._parquet_file().metadata.num_rows
+        return None
+
+    def __iter__(self):
+        self.file.seek(0)
+        if self.suffix == '.xlsx':
+            return self._iter_xlsx()
+        if self.suffix == '.csv':
+            return self._iter_csv()
+        if self.suffix == '.parquet':
+            return self._iter_parquet()
+        df = pd.read_excel(self.file, sheet_name=self.sheet, usecols=self._is_mapped, dtype=object)
+        return iter_frame_chunks(df, self.chunk_rows)
+
+    def _iter_xlsx(self):
+        workbook = openpyxl.load_workbook(self.file, read_only=True, data_only=True)
+        try:
+            rows = self._worksheet(workbook).iter_rows(values_only=True)
+            header = next(rows, ())
+            wanted = [(position, str(name).strip()) for position, name in enumerate(header) if self._is_mapped(name)]
+            names = [name for _, name in wanted]
+
+            buffer, index = [], []
+            for position, values in enumerate(rows):
+                row = [values[column] if column < len(values) else None for column, _ in wanted]
+                if all(value is None for value in row):
+                    continue
+                buffer.append(row)
+                index.append(position)
+                if len(buffer) == self.chunk_rows:
+                    yield pd.DataFrame(buffer, columns=names, index=index, dtype=object)
+                    buffer, index = [], []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=names, index=index, dtype=object)
+        finally:
+            workbook.close()
+
+    def _iter_csv(self):
+        yield from pd.read_csv(self.file, usecols=self._is_mapped, dtype=object, chunksize=self.chunk_rows)
+
+    def _parquet_file(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet imports require the 'pyarrow' package.")
+        return pq.ParquetFile(self.file)
+
+    def _iter_parquet(self):
+        parquet_file = self._parquet_file()
+        columns = [name for name in parquet_file.schema_arrow.names if self._is_mapped(name)]
+        start = 0
+        for batch in parquet_file.iter_batches(batch_size=self.chunk_rows, columns=columns):
+            frame = batch.to_pandas().astype(object)
+            frame.index = range(start, start + len(frame))
+            start += len(frame)
+            yield frame
+
+
+def iter_frame_chunks(df, size=CHUNK_ROWS):
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+
+def import_stock_chunks(frames, progress=None, result=None):
+    """
+    Import a sequence of frames, each one in its own transaction.
+
+    The rows of a VAN that an earlier chunk created or changed count as
+    updated, as the repeats of a VAN within one frame do. The counters then
+    match a single-frame import, except for a VAN an earlier chunk left
+    unchanged and a later one changes: its earlier rows stay unchanged.
+    ``progress`` is called after every committed chunk with the rows
+    processed so far and the running result.
+    """
+    result = StockImportResult() if result is None else result
+    written_vans = set()
+    processed = 0
+    for frame in frames:
+        result.add(import_stock_dataframe(frame, written_vans=written_vans))
+        processed += len(frame)
+        if progress is not None:
+            progress(processed, result)
+    return result
+
+
+# ============================================================
+# Multi-sheet and multi-file imports: parsing is CPU-bound pandas/openpyxl
+# work, so every sheet is read and validated in its own worker process and
+# the valid rows of all sheets go through a single write stage
+# ============================================================
+def _validate_sheet(content, name, sheet):
+    """
+    Read and validate one sheet in a worker process. Returns the typed valid
+    rows, the result and the number of rows read, or None when the sheet has
+    no VAN column (cover pages, pivot tables...).
+    """
+    result = StockImportResult()
+    frames, rows = [], 0
+    for frame in StockFileReader(io.BytesIO(content), name, sheet=sheet):
+        if not rows and VAN_COLUMN not in [str(column).strip() for column in frame.columns]:
+            return None
+        frames.append(validate_stock_frame(frame, result))
+        rows += len(frame)
+    if not rows:
+        return None
+
+    label = _sheet_label(name, sheet)
+    for issue in result.issues:
+        issue['source'] = label
+    return pd.concat(frames), result, rows
+
+
+def _sheet_label(name, sheet):
+    return Path(name).name if isinstance(sheet, int) else f"{Path(name).name} [{sheet}]"
+
+
+class StockSources:
+    """
+    Several stock exports, given as ``(name, content)`` pairs, imported as
+    one: every sheet of every file is parsed in a process pool and the valid
+    rows are merged in upload order (files, then sheets), so a VAN that
+    appears in several sheets is collapsed exactly like a repeated VAN in a
+    single sheet.
+    """
+
+    def __init__(self, sources, workers=None):
+        self.sheets = [
+            (content, name, sheet)
+            for name, content in sources
+            for sheet in StockFileReader(io.BytesIO(content), name).sheet_names
+        ]
+        workers = workers or getattr(settings, 'STOCK_IMPORT_WORKERS', None) or os.cpu_count() or 1
+        self.workers = max(1, min(workers, len(self.sheets)))
+
+    @property
+    def total_rows(self):
+        totals = [StockFileReader(io.BytesIO(content), name, sheet=sheet).total_rows for content, name, sheet in self.sheets]
+        return None if None in totals else sum(totals)
+
+    def _outcomes(self, progress):
+        if self.workers == 1:
+            for sheet in self.sheets:
+                yield _validate_sheet(*sheet)
+            return
+        # Workers only parse, they never touch the database
+        with ProcessPoolExecutor(self.workers, initializer=django.setup) as pool:
+            futures = [pool.submit(_validate_sheet, *sheet) for sheet in self.sheets]
+            if progress is not None:
+                running, processed = StockImportResult(), 0
+                for future in as_completed(futures):
+                    if future.result() is not None:
+                        _, sheet_result, rows = future.result()
+                        running.add(sheet_result)
+                        processed += rows
+                        progress(processed, running)
+            for future in futures:
+                yield future.result()
+
+    def validate(self, progress=None):
+        """
+        Parse and validate every sheet. Returns the typed valid rows of all
+        sheets, indexed by (sheet label, row), and their combined result;
+        ``progress`` is called as sheets finish with the rows read so far and
+        the running result.
+        """
+        result = StockImportResult()
+        frames, labels, processed = [], [], 0
+        for (_, name, sheet), outcome in zip(self.sheets, self._outcomes(progress)):
+            if outcome is None:
+                continue
+            typed, sheet_result, rows = outcome
+            frames.append(typed)
+            labels.append(_sheet_label(name, sheet))
+            result.add(sheet_result)
+            processed += rows
+            if progress is not None and self.workers == 1:
+                progress(processed, result)
+        if not frames:
+            raise ValueError(f"No sheet with a '{VAN_COLUMN}' column was found.")
+        return pd.concat(frames, keys=labels), result, processed
+
+
+# ============================================================
+# Dry-run plans: the validated rows a dry run keeps for its commit, stored
+# as data only (gzipped JSON) and typed again through the model fields, so
+# reading them runs no code and does not depend on the pandas version
+# ============================================================
+PLAN_FORMAT = 1
+
+
+class _PlanEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, np.generic):
+            return o.item()
+        return super().default(o)
+
+
+def dump_stock_rows(typed):
+    """Validated stock rows (see StockSources.validate) as the bytes of a plan file."""
+    data = {
+        'format': PLAN_FORMAT,
+        'index': {'names': list(typed.index.names), 'values': typed.index.tolist()},
+        'columns': {key: typed[key].tolist() for key in typed.columns},
+    }
+    return gzip.compress(json.dumps(data, cls=_PlanEncoder).encode())
+
+
+def load_stock_rows(content):
+    """The rows of a plan file written by dump_stock_rows, each column converted by its model field."""
+    data = json.loads(gzip.decompress(content))
+    if data.get('format') != PLAN_FORMAT or list(data['columns']) != [column.key for column in STOCK_COLUMNS.values()]:
+        raise ValueError("The dry run was stored in another format: run it again.")
+    columns = {}
+    for column in STOCK_COLUMNS.values():
+        to_python = IMPORT_MODELS[column.model]._meta.get_field(column.field).to_python
+        columns[column.key] = pd.Series(
+            [None if value is None else to_python(value) for value in data['columns'][column.key]], dtype=object,
+        )
+    names, values = data['index']['names'], data['index']['values']
+    if len(names) > 1:
+        index = pd.MultiIndex.from_tuples([tuple(value) for value in values], names=names)
+    else:
+        index = pd.Index(values, name=names[0])
+    return pd.DataFrame(columns).set_axis(index)
+
+
+# ============================================================
+# Clients: the CRM export is the master data, so every non-empty value
+# overwrites the stored one. Clients are matched by code, or by NIF when
+# the code is blank
+# ============================================================
+def _code(series):
+    """Stripped text, with the whole numbers Excel stores as floats (12345.0) written as integers."""
+    numeric = pd.to_numeric(series, errors='coerce')
+    whole = numeric.notna() & numeric.eq(numeric.round())
+    # An all-empty column maps to float NaNs, which have no .str accessor
+    text = series.map(str, na_action='ignore').astype(object).str.strip()
+    text[whole] = numeric[whole].astype('int64').astype(str)
+    return text.where(text.ne(''))
+
+
+def _clean_text(series):
+    text = series.map(str, na_action='ignore').astype(object).str.strip().str.replace(r'\s+', ' ', regex=True)
+    return text.where(text.ne(''))
+
+
+def _nif(series):
+    # 'PT 501 234 567', '501.234.567', 501234567.0 -> '501234567'
+    digits = _code(series).str.upper().str.removeprefix('PT').str.replace(r'\D', '', regex=True)
+    return digits.where(digits.ne(''))
+
+
+def _postal_code(series):
+    # '1000-001', '1000 001', '1000001', '1000-001 LISBOA' -> '1000-001'
+    parts = _code(series).str.extract(r'^(\d{4})\s*[-–]?\s*(\d{3})\b')
+    return parts[0] + '-' + parts[1]
+
+
+def _phone(series):
+    # The first of '912 345 678 / 213 456 789', digits only, 00351... as +351...
+    first = _code(series).str.split(r'[/;,]', n=1, regex=True).str[0]
+    phone = first.str.replace(r'[^\d+]', '', regex=True).str.replace(r'^00', '+', regex=True)
+    return phone.where(phone.ne(''))
+
+
+def _email(series):
+    # The first of 'geral@acme.pt; vendas@acme.pt', lower-cased
+    email = _clean_text(series).str.split(r'[;,\s]+', n=1, regex=True).str[0].str.lower()
+    return email.where(email.ne(''))
+
+
+CLIENT_COLUMNS = {
+    'Cliente_Codice': Column('client', 'code', _code, OVERWRITE),
+    'Cliente_Nome': Column('client', 'name', _clean_text, OVERWRITE),
+    'NIF': Column('client', 'nif', _nif, OVERWRITE),
+    'Morada': Column('client', 'address', _clean_text, OVERWRITE),
+    'Cod_Postal': Column('client', 'postal_code', _postal_code, OVERWRITE),
+    'Localidade': Column('client', 'city', _clean_text, OVERWRITE),
+    'Tel_geral': Column('client', 'phone', _phone, OVERWRITE),
+    'Mail_geral': Column('client', 'email', _email, OVERWRITE),
+    'Distribuidor': Column('client', 'distributor', _clean_text, OVERWRITE),
+    'Vendedor': Column('client', 'seller', _clean_text, OVERWRITE),
+}
+
+CLIENT_CODE_COLUMN = 'Cliente_Codice'
+CLIENT_NIF_COLUMN = 'NIF'
+CLIENT_POLICIES = {column.field: column.policy for column in CLIENT_COLUMNS.values()}
+
+# pg_trgm similarity of two upper-cased names above which a client is
+# flagged for review as a likely duplicate of another one
+CLIENT_DUPLICATE_SIMILARITY = 0.7
+
+
+@dataclass
+class ClientImportResult(StockImportResult):
+    # Clients flagged pending_review for a name similar to another client's
+    flagged: int = 0
+
+    def add(self, other):
+        super().add(other)
+        self.flagged += other.flagged
+
+
+def validate_client_frame(df, result):
+    """
+    Parse and normalise a CRM client export and drop the rows that cannot be
+    imported: rows with neither a code nor a NIF are skipped, rows with any
+    other unconvertible or invalid cell count as errors. Returns the typed
+    frame of the remaining rows.
+    """
+    df = df.rename(columns=lambda name: str(name).strip())
+    typed, invalid_cells = parse_stock_frame(df, CLIENT_COLUMNS)
+    rejected = _rejected_cells(typed, invalid_cells, CLIENT_COLUMNS)
+
+    missing = typed['client.code'].isna() & typed['client.nif'].isna()
+    invalid_key = df.index.isin(list(rejected.pop(CLIENT_CODE_COLUMN, {})))
+    return _drop_rejected(df, typed, rejected, missing | invalid_key, "Missing or invalid client code/NIF", result)
+
+
+def flag_similar_clients(ids, similarity=CLIENT_DUPLICATE_SIMILARITY, batch_size=BATCH_SIZE):
+    """
+    Flag the clients of ``ids`` whose upper-cased name is trigram-similar to
+    another client's as pending_review, in SQL so the client_name_trgm index
+    finds the candidates. Meant to run once per import, after its batches
+    are committed. Returns the number of clients flagged.
+    """
+    if not ids:
+        return 0
+    similar = (
+        Client.objects.alias(upper_name=Upper('name'))
+        .filter(upper_name__trigram_similar=Upper(OuterRef('name')))
+        .exclude(pk=OuterRef('pk'))
+    )
+    flagged = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Local to this transaction
+        cursor.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(similarity)])
+        # Rows just bulk inserted wait in the GIN pending list, which every
+        # lookup would scan: merge them into the index first
+        cursor.execute("SELECT gin_clean_pending_list('client_name_trgm'::regclass)")
+        for chunk in _chunks(ids, batch_size):
+            flagged += Client.objects.filter(pk__in=chunk, pending_review=False).filter(Exists(similar)).update(pending_review=True)
+    return flagged
+
+
+def _rows_of(frame, key, value):
+    return frame.index[frame[key].eq(value).to_numpy()]
+
+
+def _client_state(field, values, batch_size):
+    """Current id and imported fields of the clients whose ``field`` is in ``values``, as value -> dict."""
+    state = {}
+    for chunk in _chunks(values, batch_size):
+        for row in Client.objects.filter(**{f'{field}__in': chunk}).order_by().values('id', *CLIENT_POLICIES):
+            state[row[field]] = row
+    return state
+
+
+def _write_clients(typed, result, batch_size):
+    """
+    Upsert validated client rows: rows of the same code (or, without a code,
+    the same NIF) collapse into one client, matched to an existing client by
+    code or, for rows without a code, by NIF. Returns the ids of the new and
+    renamed clients, to check for duplicates (flag_similar_clients).
+
+    Codes are unique in the database (uniq_client_code_not_blank): when
+    another import inserts the same code first, the batch is refused.
+    """
+    if typed.empty:
+        return []
+    now = timezone.now()
+    frame = typed.rename(columns=lambda key: key.split('.', 1)[1])
+    frame['key'] = frame['code'].where(frame['code'].notna(), 'NIF ' + frame['nif'].astype(str))
+    occurrences = frame['key'].value_counts()
+    clients = _collapse(frame, 'key', CLIENT_POLICIES)
+
+    by_code = _client_state('code', clients['code'].dropna().unique(), batch_size)
+    by_nif = _client_state('nif', clients['nif'].dropna().unique(), batch_size)
+
+    new_clients, changes_list, renamed = [], [], []
+    # NIF -> key of the client of this batch that writes it, as the
+    # database keeps NIFs unique (uniq_client_nif_not_null)
+    claimed = {}
+    for key, record in zip(clients.index, _records(clients)):
+        count = int(occurrences[key])
+        if record['code'] is not None:
+            current = by_code.get(record['code'])
+        else:
+            current = by_nif.get(record['nif'])
+        if current is None and (record['code'] is None or record['name'] is None):
+            result.skipped += count
+            result.issues.extend(
+                _issue(ImportRowIssue.Kind.SKIPPED, index, "New client without a code or name")
+                for index in _rows_of(frame, 'key', key)
+            )
+            continue
+
+        changes = {} if current is None else _changed_fields(current, record, CLIENT_POLICIES)
+        nif = record['nif']
+        if nif is not None and (current is None or 'nif' in changes):
+            owner = by_nif.get(nif)
+            if owner is not None and (current is None or owner['id'] != current['id']):
+                reason = f"NIF {nif} belongs to client {owner['code']}"
+            elif nif in claimed:
+                reason = f"NIF {nif} is also on client {claimed[nif]}"
+            else:
+                reason = None
+            if reason is not None:
+                result.errors += count
+                result.issues.extend(
+                    _issue(ImportRowIssue.Kind.INVALID, index, reason, CLIENT_NIF_COLUMN, nif)
+                    for index in _rows_of(frame, 'key', key)
+                )
+                continue
+            claimed[nif] = record['code'] or nif
+
+        if current is None:
+            new_clients.append(Client(updated_at=now, **record))
+            result.created += 1
+            result.updated += count - 1
+        elif changes:
+            changes['updated_at'] = now
+            changes_list.append((Client(id=current['id'], **changes), list(changes)))
+            if 'name' in changes:
+                renamed.append(current['id'])
+            result.updated += count
+        else:
+            result.unchanged += count
+
+    created = Client.objects.bulk_create(new_clients, batch_size=batch_size)
+    _bulk_update_changes(Client, changes_list, batch_size)
+    return [client.pk for client in created] + renamed
+
+
+def import_client_rows(typed, result=None, batch_size=BATCH_SIZE, chunk_rows=CHUNK_ROWS, review_ids=None):
+    """
+    Upsert validated client rows in batches of ``chunk_rows`` rows that
+    commit independently; all rows of a code go in the same batch.
+
+    The new and renamed clients of the committed batches are checked for
+    duplicates at the end, or, when ``review_ids`` is a list, added to it
+    for the caller to check once for the whole import.
+    """
+    result = ClientImportResult() if result is None else result
+    if typed.empty:
+        return result
+    ids = [] if review_ids is None else review_ids
+    keys = typed['client.code'].where(typed['client.code'].notna(), typed['client.nif'])
+    batches = pd.factorize(keys)[0] // chunk_rows
+    for _, batch in typed.groupby(batches, sort=True):
+        ids.extend(_import_batch(_write_clients, batch, result, batch_size) or [])
+    if review_ids is None:
+        result.flagged += flag_similar_clients(ids, batch_size=batch_size)
+    return result
+
+
+def import_client_chunks(frames, progress=None, result=None):
+    """
+    Import a sequence of client export frames, each one in its own
+    transaction, then check the new and renamed clients for duplicates in
+    one pass. ``progress`` is called after every committed chunk with the
+    rows processed so far and the running result.
+    """
+    result = ClientImportResult() if result is None else result
+    review_ids = []
+    processed = 0
+    for frame in frames:
+        import_client_rows(validate_client_frame(frame, result), result, review_ids=review_ids)
+        processed += len(frame)
+        if progress is not None:
+            progress(processed, result)
+    result.flagged += flag_similar_clients(review_ids)
+    return result
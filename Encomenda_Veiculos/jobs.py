@@ -0,0 +1,257 @@
+import logging
+import threading
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .client_links import queue_unlinked_stock, resolve_stock_clients
+from .importers import (
+    BATCH_SIZE,
+    CLIENT_COLUMNS,
+    StockFileReader,
+    StockImportResult,
+    StockSources,
+    dump_stock_rows,
+    import_client_chunks,
+    import_stock_chunks,
+    import_valid_rows,
+    load_stock_rows,
+    plan_stock_import,
+    reject_vin_conflicts,
+)
+from .models import ImportJob, ImportRowIssue
+from .vp_cache import preload_vp_cache
+
+logger = logging.getLogger(__name__)
+
+
+# A running job's worker touches heartbeat_at this often; a job whose
+# heartbeat is older than STALE_AFTER lost its worker (crash, OOM kill) and is
+# claimed again, up to MAX_ATTEMPTS runs in all
+HEARTBEAT_INTERVAL = 30
+STALE_AFTER = timedelta(minutes=5)
+MAX_ATTEMPTS = 3
+
+
+def claim_next_job():
+    """
+    Mark the oldest pending job, or running job whose worker stopped
+    beating, as running and return it, or None if the queue is empty.
+    """
+    while True:
+        with transaction.atomic():
+            stale = timezone.now() - STALE_AFTER
+            job = (
+                ImportJob.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=ImportJob.Status.PENDING)
+                    | Q(status=ImportJob.Status.RUNNING, heartbeat_at__lt=stale)
+                    | Q(status=ImportJob.Status.RUNNING, heartbeat_at=None, started_at__lt=stale)
+                )
+                .order_by("created_at")
+                .first()
+            )
+            if job is None:
+                return None
+            now = timezone.now()
+            if job.status == ImportJob.Status.RUNNING:
+                logger.warning(f"Import job {job.pk} lost its worker after attempt {job.attempts}")
+                if job.attempts >= MAX_ATTEMPTS:
+                    job.status = ImportJob.Status.FAILED
+                    job.message = f"The worker stopped {job.attempts} times while running this job."
+                    job.finished_at = now
+                    job.save(update_fields=["status", "message", "finished_at"])
+                    continue
+                # The rerun reports its own rejected rows; stock and clients are upserts
+                ImportRowIssue.objects.filter(job=job).delete()
+            job.status = ImportJob.Status.RUNNING
+            job.started_at = job.heartbeat_at = now
+            job.attempts += 1
+            job.save(update_fields=["status", "started_at", "heartbeat_at", "attempts"])
+        return job
+
+
+class Heartbeat:
+    """Context manager touching the job's heartbeat_at every HEARTBEAT_INTERVAL seconds from a thread."""
+
+    def __init__(self, job, interval=HEARTBEAT_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def _beat(self):
+        try:
+            while not self._stop.wait(self.interval):
+                ImportJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now())
+        finally:
+            # The thread has a connection of its own
+            connection.close()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def _store_progress(job, processed, result):
+    job.processed_rows = processed
+    job.created_count = result.created
+    job.updated_count = result.updated
+    job.skipped_count = result.skipped
+    job.unchanged_count = result.unchanged
+    job.error_count = result.errors
+    job.save(update_fields=[
+        "processed_rows", "created_count", "updated_count", "skipped_count", "unchanged_count", "error_count",
+    ])
+
+
+def store_row_issues(job, result, source=""):
+    """
+    Save the rejected rows collected in ``result`` as ImportRowIssue rows of
+    ``job``, with bulk inserts, and empty the list. Issues without a source of
+    their own get ``source``.
+    """
+    ImportRowIssue.objects.bulk_create(
+        (ImportRowIssue(job=job, **{"source": source, **issue}) for issue in result.issues),
+        batch_size=BATCH_SIZE,
+    )
+    result.issues.clear()
+
+
+def _job_sources(job):
+    """Every file of the job, read in full, as StockSources."""
+    sources = []
+    for stored in job.source_files:
+        with stored.open("rb") as stock_file:
+            sources.append((stored.name, stock_file.read()))
+    stock_sources = StockSources(sources)
+
+    job.total_rows = stock_sources.total_rows
+    job.save(update_fields=["total_rows"])
+    return stock_sources
+
+
+def run_stock_preview(job):
+    """Validate every file and store the planned changes, without writing stock rows."""
+    typed, result, processed = _job_sources(job).validate(
+        progress=lambda processed, result: _store_progress(job, processed, result),
+    )
+    typed = reject_vin_conflicts(typed, result)
+    store_row_issues(job, result)
+    plan = plan_stock_import(typed, result)
+    _store_progress(job, processed, plan.result)
+
+    # The validated rows are kept so the commit can skip parsing the file again
+    job.plan_file.save(f"job-{job.pk}.json.gz", ContentFile(dump_stock_rows(typed)), save=False)
+    job.report = plan.report()
+    job.save(update_fields=["plan_file", "report"])
+    return plan.result
+
+
+def run_stock_commit(job):
+    """Import the rows validated by the job's dry run, in batches that commit independently."""
+    preview = job.preview
+    with preview.plan_file.open("rb") as plan_file:
+        typed = load_stock_rows(plan_file.read())
+
+    job.total_rows = preview.total_rows
+    job.save(update_fields=["total_rows"])
+
+    result = import_valid_rows(typed, StockImportResult(skipped=preview.skipped_count, errors=preview.error_count))
+    # Rows the database has come to refuse since the dry run
+    store_row_issues(job, result)
+    _store_progress(job, preview.processed_rows, result)
+    return result
+
+
+def run_stock_sources(job):
+    """Parse all sheets of all files in parallel, then write them in batches that commit independently."""
+    typed, result, processed = _job_sources(job).validate(
+        progress=lambda processed, result: _store_progress(job, processed, result),
+    )
+    store_row_issues(job, result)
+    result = import_valid_rows(typed, result)
+    store_row_issues(job, result)
+    _store_progress(job, processed, result)
+    return result
+
+
+def run_stock_job(job):
+    preload_vp_cache()
+    if job.dry_run:
+        return run_stock_preview(job)
+    if job.preview_id:
+        return run_stock_commit(job)
+
+    with job.file.open("rb") as stock_file:
+        single_sheet = len(StockFileReader(stock_file, job.file.name).sheet_names) == 1
+    if job.extra_files.exists() or not single_sheet:
+        return run_stock_sources(job)
+
+    # A single sheet is streamed chunk by chunk, each chunk in its own transaction
+    with job.file.open("rb") as stock_file:
+        reader = StockFileReader(stock_file, job.file.name)
+        job.total_rows = reader.total_rows
+        job.save(update_fields=["total_rows"])
+
+        def progress(processed, result):
+            store_row_issues(job, result, Path(job.file.name).name)
+            _store_progress(job, processed, result)
+
+        return import_stock_chunks(reader, progress=progress)
+
+
+def run_client_job(job):
+    """Upsert the clients of a CRM export chunk by chunk, flagging likely duplicates for review."""
+    with job.file.open("rb") as client_file:
+        reader = StockFileReader(client_file, job.file.name, columns=CLIENT_COLUMNS)
+        job.total_rows = reader.total_rows
+        job.save(update_fields=["total_rows"])
+
+        def progress(processed, result):
+            store_row_issues(job, result, Path(job.file.name).name)
+            _store_progress(job, processed, result)
+
+        result = import_client_chunks(reader, progress=progress)
+    if result.created or result.updated:
+        # New or renamed clients may name stock that matched none before
+        queue_unlinked_stock()
+    if result.flagged:
+        job.message = f"{result.flagged} clients flagged for review: their name is similar to another client's."
+    return result
+
+
+JOB_RUNNERS = {
+    ImportJob.Kind.STOCK: run_stock_job,
+    ImportJob.Kind.CLIENT: run_client_job,
+}
+
+
+def run_import_job(job):
+    with Heartbeat(job):
+        try:
+            JOB_RUNNERS[job.kind](job)
+        except Exception as e:
+            logger.exception(f"Import job {job.pk} failed")
+            job.status = ImportJob.Status.FAILED
+            job.message = str(e)
+        else:
+            job.status = ImportJob.Status.DONE
+        if not job.dry_run:
+            # Chunks committed before a failure are linked as well
+            resolve_stock_clients()
+        if job.preview_id:
+            # A dry run is committed once, whatever the outcome: its plan is done with
+            job.preview.plan_file.delete(save=False)
+            job.preview.save(update_fields=["plan_file"])
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "message", "finished_at"])
+    return job
@@ -0,0 +1,73 @@
+import json
+import platform
+
+import django
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from Encomenda_Veiculos.benchmarks import benchmark_stock_import
+from Encomenda_Veiculos.importers import BATCH_SIZE, CHUNK_ROWS
+
+
+class Command(BaseCommand):
+    help = (
+        "Time stock imports of synthetic factory exports of several sizes, in a throwaway "
+        "test database, and report rows/s, queries, peak memory and transaction durations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000], help="Export sizes to time.")
+        parser.add_argument("--new", type=float, default=0.5, help="Share of rows with VANs not yet imported.")
+        parser.add_argument("--changed", type=float, default=0.25, help="Share of rows already imported with other values.")
+        parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx", help="File format of the exports.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data.")
+        parser.add_argument("--output", help="Write the results as JSON to this file, to compare releases.")
+        parser.add_argument("--keepdb", action="store_true", help="Keep the test database between runs.")
+
+    def handle(self, *args, **options):
+        if not (0 <= options["new"] and 0 <= options["changed"] and options["new"] + options["changed"] <= 1):
+            raise CommandError("--new and --changed must be shares between 0 and 1 adding up to at most 1.")
+
+        # Never run against real stock: the benchmark empties the stock tables
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"])
+        try:
+            database = f"{connection.display_name} {'.'.join(map(str, connection.get_database_version()))}"
+            results = []
+            for rows in options["rows"]:
+                benchmark = benchmark_stock_import(
+                    rows, options["new"], options["changed"], options["format"], options["seed"],
+                )
+                results.append(benchmark.as_dict())
+                self.stdout.write(
+                    f"{rows} rows ({benchmark.new} new, {benchmark.changed} changed, {benchmark.unchanged} unchanged): "
+                    f"{benchmark.rows_per_second:.0f} rows/s, {benchmark.seconds:.2f} s, "
+                    f"{benchmark.queries} queries ({benchmark.db_seconds:.2f} s), "
+                    f"{benchmark.transactions} transactions (mean {benchmark.transaction_ms_mean:.0f} ms, "
+                    f"max {benchmark.transaction_ms_max:.0f} ms), peak RSS {benchmark.peak_rss_mb} MB"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        if options["output"]:
+            report = {
+                "date": timezone.now().isoformat(),
+                "environment": {
+                    "python": platform.python_version(),
+                    "django": django.get_version(),
+                    "pandas": pd.__version__,
+                    "database": database,
+                },
+                "settings": {
+                    "format": options["format"],
+                    "seed": options["seed"],
+                    "batch_size": BATCH_SIZE,
+                    "chunk_rows": CHUNK_ROWS,
+                },
+                "results": results,
+            }
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
@@ -0,0 +1,105 @@
+import socketserver
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class PooledWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    """WSGI server with a fixed set of worker threads, like gunicorn's gthread workers."""
+
+    def __init__(self, *args, workers, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.executor = ThreadPoolExecutor(workers)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown()
+
+
+def _connection_mode():
+    pool = connection.settings_dict["OPTIONS"].get("pool")
+    if pool:
+        return f"pool (max_size={pool['max_size'] if isinstance(pool, dict) else '?'})"
+    max_age = connection.settings_dict["CONN_MAX_AGE"]
+    return "new connection per request" if max_age == 0 else f"persistent (CONN_MAX_AGE={max_age})"
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the project from a local threaded WSGI server and time concurrent GET "
+        "requests to a URL, to compare database connection settings (DB_* environment)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/", help="Path to request.")
+        parser.add_argument("--requests", type=int, default=500, help="Number of timed requests.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Parallel clients and server threads.")
+        parser.add_argument("--user", help="Username to log in as, for pages that require a login.")
+
+    def handle(self, *args, **options):
+        headers = {"Host": "localhost", "Connection": "close"}
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+            client = Client()
+            client.force_login(user)
+            headers["Cookie"] = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        connection.close()
+
+        server = PooledWSGIServer(("127.0.0.1", 0), QuietHandler, workers=options["concurrency"])
+        server.set_app(get_wsgi_application())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+
+        def fetch(_):
+            client = HTTPConnection(host, port)
+            start = time.perf_counter()
+            client.request("GET", options["url"], headers=headers)
+            response = client.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - start
+            client.close()
+            if response.status != 200:
+                raise CommandError(f"{options['url']} answered {response.status}")
+            return elapsed * 1000
+
+        try:
+            with ThreadPoolExecutor(options["concurrency"]) as clients:
+                # Warm up every server thread before timing
+                list(clients.map(fetch, range(options["concurrency"] * 2)))
+                start = time.perf_counter()
+                timings = sorted(clients.map(fetch, range(options["requests"])))
+                wall = time.perf_counter() - start
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        def percentile(p):
+            return timings[min(len(timings) - 1, int(len(timings) * p / 100))]
+
+        self.stdout.write(f"Connections: {_connection_mode()}")
+        self.stdout.write(
+            f"{len(timings)} requests to {options['url']} with {options['concurrency']} clients: "
+            f"{len(timings) / wall:.0f} req/s, mean {statistics.mean(timings):.1f} ms, "
+            f"p50 {percentile(50):.1f} ms, p95 {percentile(95):.1f} ms, p99 {percentile(99):.1f} ms"
+        )
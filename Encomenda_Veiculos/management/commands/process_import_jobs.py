@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from Encomenda_Veiculos.jobs import claim_next_job, run_import_job
+
+
+class Command(BaseCommand):
+    help = "Poll the import job queue and run pending imports in this process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty instead of polling.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to wait between polls of an empty queue.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+            if job is not None:
+                self.stdout.write(f"Running {job}")
+                run_import_job(job)
+                self.stdout.write(f"Finished {job}")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from Encomenda_Veiculos.summary import SUMMARY_DIMENSIONS, rebuild_stock_summary
+
+
+class Command(BaseCommand):
+    help = "Recount the stock dashboard summary from the OCF stock table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dimensions", nargs="*", choices=list(SUMMARY_DIMENSIONS), help="Dimensions to recount (default: all).")
+
+    def handle(self, *args, **options):
+        rebuild_stock_summary(options["dimensions"] or None)
+        self.stdout.write("Stock summary rebuilt.")
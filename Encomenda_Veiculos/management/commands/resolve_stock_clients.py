@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from Encomenda_Veiculos.client_links import resolve_stock_clients
+from Encomenda_Veiculos.models import OCFStock
+
+
+class Command(BaseCommand):
+    help = "Link the OCF stock entries whose client names changed to the matching client records."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Match every named entry again, not only the changed ones.")
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            OCFStock.objects.exclude(client_name=None, client_final=None).update(client_pending=True)
+        resolved, changed = resolve_stock_clients()
+        self.stdout.write(f"{resolved} entries resolved, {changed} with a new client link.")
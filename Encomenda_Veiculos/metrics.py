@@ -0,0 +1,205 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.http import FileResponse
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Metrics of the request being handled. A context variable rather than a
+# thread local: sync_to_async copies the context into its thread, so queries
+# of async views are counted against the right request too
+current_metrics = ContextVar("request_metrics", default=None)
+
+
+@dataclass
+class RequestMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db_time: float = 0.0
+    render_time: float = 0.0
+    rendering: bool = False
+
+    def record(self, request, response, size):
+        """The log record of the finished request, as a dict."""
+        match = getattr(request, "resolver_match", None)
+        return {
+            "view": match.view_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "queries": self.queries,
+            "db_ms": round(self.db_time * 1000, 1),
+            "render_ms": round(self.render_time * 1000, 1),
+            "size": size,
+            "over_query_budget": self.queries > settings.REQUEST_QUERY_BUDGET,
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrapper() timing every query against the current request."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        # Templates rendered from within a template are already being timed
+        if metrics is None or metrics.rendering:
+            return super().render(context, request)
+        metrics.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.render_time += time.perf_counter() - start
+            metrics.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, adding render time to the request metrics."""
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+
+def _percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class RequestStats:
+    """The last ``window`` request records of each view, summarised as percentiles."""
+
+    FIGURES = ("total_ms", "queries", "db_ms", "render_ms", "size")
+
+    def __init__(self, window):
+        self.window = window
+        self._records = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._records[record["view"]].append(record)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def summary(self):
+        with self._lock:
+            records = {view: list(window) for view, window in self._records.items()}
+        summary = {}
+        for view, window in sorted(records.items(), key=lambda item: str(item[0])):
+            figures = {"count": len(window), "over_query_budget": sum(r["over_query_budget"] for r in window)}
+            for name in self.FIGURES:
+                values = sorted(r[name] for r in window if r[name] is not None)
+                if values:
+                    figures[name] = {f"p{p}": _percentile(values, p) for p in (50, 95, 99)} | {"max": values[-1]}
+            summary[view or "(unresolved)"] = figures
+        return summary
+
+
+# Per process: with several workers each one reports the requests it served
+request_stats = RequestStats(settings.REQUEST_METRICS_WINDOW)
+
+
+def start_request():
+    return current_metrics.set(RequestMetrics())
+
+
+def _log(record):
+    request_stats.add(record)
+    if record["over_query_budget"]:
+        logger.warning(json.dumps(record))
+    else:
+        logger.info(json.dumps(record))
+
+
+class _StreamedBody:
+    """
+    The body of a streamed response, produced with the request's metrics
+    active so its queries count. The request is recorded once the body is
+    sent, or closed early (client gone).
+    """
+
+    def __init__(self, content, metrics, request, response):
+        self.content = content
+        self.metrics = metrics
+        self.request = request
+        self.response = response
+        self.size = 0
+        self.recorded = False
+
+    def close(self):
+        if not self.recorded:
+            self.recorded = True
+            _log(self.metrics.record(self.request, self.response, self.size))
+
+
+class _MeteredStream(_StreamedBody):
+    def __iter__(self):
+        iterator = iter(self.content)
+        while True:
+            token = current_metrics.set(self.metrics)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                current_metrics.reset(token)
+            self.size += len(chunk)
+            yield chunk
+        self.close()
+
+
+class _AsyncMeteredStream(_StreamedBody):
+    async def __aiter__(self):
+        iterator = aiter(self.content)
+        while True:
+            token = current_metrics.set(self.metrics)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                break
+            finally:
+                current_metrics.reset(token)
+            self.size += len(chunk)
+            yield chunk
+        self.close()
+
+
+def finish_request(token, request, response):
+    """
+    Log the request that ``token`` started and add it to the rolling stats.
+    A streamed response is logged when its body has been sent, see
+    _StreamedBody; files are read, not computed, and logged at once.
+    """
+    metrics = current_metrics.get()
+    current_metrics.reset(token)
+    if isinstance(response, FileResponse):
+        # Sent from the file as it is (wsgi.file_wrapper), with its length
+        size = int(response["Content-Length"]) if response.has_header("Content-Length") else None
+        _log(metrics.record(request, response, size))
+    elif response.streaming:
+        stream = _AsyncMeteredStream if response.is_async else _MeteredStream
+        response.streaming_content = stream(response.streaming_content, metrics, request, response)
+    else:
+        _log(metrics.record(request, response, len(response.content)))
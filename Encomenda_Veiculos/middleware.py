@@ -0,0 +1,32 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import finish_request, start_request
+
+
+class RequestMetricsMiddleware:
+    """
+    Records every request's time, query count and time, template render time
+    and response size (Encomenda_Veiculos.metrics). Put it first in
+    MIDDLEWARE so the other middleware is included in the figures.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = start_request()
+        response = self.get_response(request)
+        finish_request(token, request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = start_request()
+        response = await self.get_response(request)
+        finish_request(token, request, response)
+        return response
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('stock', 'OCF Stock')], default='stock', max_length=20, verbose_name='Kind')),
+                ('file', models.FileField(upload_to='imports/%Y/%m/', verbose_name='File')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('dry_run', models.BooleanField(default=False, help_text='Only compute what the import would change.', verbose_name='Dry Run')),
+                ('plan_file', models.FileField(blank=True, null=True, upload_to='imports/plans/', verbose_name='Plan File')),
+                ('report', models.JSONField(blank=True, null=True, verbose_name='Report')),
+                ('total_rows', models.IntegerField(blank=True, null=True, verbose_name='Total Rows')),
+                ('processed_rows', models.IntegerField(default=0, verbose_name='Processed Rows')),
+                ('created_count', models.IntegerField(default=0, verbose_name='Created')),
+                ('updated_count', models.IntegerField(default=0, verbose_name='Updated')),
+                ('skipped_count', models.IntegerField(default=0, verbose_name='Skipped')),
+                ('unchanged_count', models.IntegerField(default=0, verbose_name='Unchanged')),
+                ('error_count', models.IntegerField(default=0, verbose_name='Errors')),
+                ('message', models.TextField(blank=True, null=True, verbose_name='Message')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'verbose_name': 'Import Job',
+                'verbose_name_plural': 'Import Jobs',
+                'db_table': 'import_job',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='ocfstock',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, db_column='IMPORT_HASH', editable=False, help_text='Hash of the source fields of the last import, used to skip unchanged rows.', max_length=32, null=True, verbose_name='Import Fingerprint'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, db_column='IMPORT_HASH', editable=False, help_text='Hash of the source fields of the last import, used to skip unchanged rows.', max_length=32, null=True, verbose_name='Import Fingerprint'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Created By'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='preview',
+            field=models.ForeignKey(blank=True, help_text='Dry run whose validated rows this job imports.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='commits', to='Encomenda_Veiculos.importjob', verbose_name='Preview'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['status', 'created_at'], name='import_job_status_7d9a2e_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0002_import_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJobFile',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('file', models.FileField(upload_to='imports/%Y/%m/', verbose_name='File')),
+                ('job', models.ForeignKey(help_text='Job that imports this file together with its main file.', on_delete=django.db.models.deletion.CASCADE, related_name='extra_files', to='Encomenda_Veiculos.importjob', verbose_name='Import Job')),
+            ],
+            options={
+                'verbose_name': 'Import Job File',
+                'verbose_name_plural': 'Import Job Files',
+                'db_table': 'import_job_file',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0003_import_job_file'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clientcontact',
+            index=models.Index(fields=['created_at', 'id'], name='client_cont_created_772055_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internaltransport',
+            index=models.Index(fields=['created_at', 'id'], name='internal_tr_created_4b1bc2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=models.Index(fields=['created_at', 'id'], name='ocf_stock_created_9c6ec3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesperson',
+            index=models.Index(fields=['created_at', 'id'], name='salesperson_created_5b221f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['created_at', 'van'], name='vehicle_created_157e2a_idx'),
+        ),
+    ]
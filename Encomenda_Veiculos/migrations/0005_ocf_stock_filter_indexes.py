@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0004_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=models.Index(condition=models.Q(('produced', True), ('sold', False)), fields=['created_at', 'id'], name='ocf_stock_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=models.Index(fields=['distributor', 'sold', 'produced'], name='ocf_stock_DISTRIB_003cb3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=models.Index(fields=['location', 'sold', 'produced'], name='ocf_stock_LOCALIZ_edb7f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=models.Index(fields=['channel'], name='ocf_stock_CANAL_11ef14_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=models.Index(fields=['order_date'], name='ocf_stock_DATA_4c8751_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vp',
+            index=models.Index(fields=['gama'], name='vp_GAMA_76f30f_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:21
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0005_ocf_stock_filter_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='client_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('nif'), name='gin_trgm_ops'), name='client_nif_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('client_name'), name='gin_trgm_ops'), name='ocf_stock_client_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('client_final'), name='gin_trgm_ops'), name='ocf_stock_client_final_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('van', models.TextField())), name='gin_trgm_ops'), name='vehicle_van_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('vin'), name='gin_trgm_ops'), name='vehicle_vin_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('plate'), name='gin_trgm_ops'), name='vehicle_plate_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='vp',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('vp_code'), name='gin_trgm_ops'), name='vp_code_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='vp',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('modelo'), name='gin_trgm_ops'), name='vp_modelo_trgm'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:34
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# summary.SUMMARY_DIMENSIONS as of this migration, so later changes to the
+# dashboard don't change what it does
+SUMMARY_DIMENSIONS = {
+    'sold': 'sold',
+    'produced': 'produced',
+    'has_client': 'has_client',
+    'distributor': 'distributor',
+    'channel': 'channel',
+    'location': 'location',
+    'modelo': 'vehicle__vp__modelo',
+    'order_week': 'order_week',
+    'location_date': 'location_date',
+}
+
+
+def fill_stock_summary(apps, schema_editor):
+    OCFStock = apps.get_model('Encomenda_Veiculos', 'OCFStock')
+    StockSummary = apps.get_model('Encomenda_Veiculos', 'StockSummary')
+    counts = Counter()
+    for dimension, lookup in SUMMARY_DIMENSIONS.items():
+        for value, n in OCFStock.objects.values_list(lookup).annotate(n=Count('pk')).order_by():
+            counts[dimension, '' if value is None else str(value)] += n
+    StockSummary.objects.bulk_create(
+        StockSummary(dimension=dimension, value=value, count=n) for (dimension, value), n in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0006_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSummary',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('dimension', models.CharField(max_length=50, verbose_name='Dimension')),
+                ('value', models.CharField(blank=True, max_length=255, verbose_name='Value')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+            ],
+            options={
+                'verbose_name': 'Stock Summary',
+                'verbose_name_plural': 'Stock Summaries',
+                'db_table': 'stock_summary',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stocksummary',
+            constraint=models.UniqueConstraint(fields=('dimension', 'value'), name='uniq_stock_summary_value'),
+        ),
+        migrations.RunPython(fill_stock_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0007_stock_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='internaltransport',
+            index=models.Index(fields=['transport_date'], include=('id', 'vehicle', 'origin', 'destination'), name='internal_transport_date_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0008_internal_transport_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRowIssue',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('skipped', 'Skipped'), ('invalid', 'Invalid')], max_length=20, verbose_name='Kind')),
+                ('source', models.CharField(blank=True, help_text='File (and sheet) of the row.', max_length=255, verbose_name='Source')),
+                ('row', models.IntegerField(help_text='0-based data row of the source, below the header.', verbose_name='Row')),
+                ('column', models.CharField(blank=True, max_length=255, null=True, verbose_name='Column')),
+                ('value', models.TextField(blank=True, null=True, verbose_name='Value')),
+                ('reason', models.CharField(max_length=255, verbose_name='Reason')),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='issues', to='Encomenda_Veiculos.importjob', verbose_name='Import Job')),
+            ],
+            options={
+                'verbose_name': 'Import Row Issue',
+                'verbose_name_plural': 'Import Row Issues',
+                'db_table': 'import_row_issue',
+                'indexes': [models.Index(fields=['job', 'id'], name='import_row_issue_job_idx')],
+            },
+        ),
+    ]
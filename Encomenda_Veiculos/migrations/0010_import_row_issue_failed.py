@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0009_import_row_issue'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importrowissue',
+            name='kind',
+            field=models.CharField(choices=[('skipped', 'Skipped'), ('invalid', 'Invalid'), ('failed', 'Failed')], max_length=20, verbose_name='Kind'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0010_import_row_issue_failed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='kind',
+            field=models.CharField(choices=[('stock', 'OCF Stock'), ('client', 'Clients')], default='stock', max_length=20, verbose_name='Kind'),
+        ),
+    ]
@@ -0,0 +1,679 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:20
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def switch_primary_key(table, code_column, references, code_sql):
+    """
+    SQL moving the primary key of ``table`` from ``code_column`` to a new
+    "id" identity column, filled in place for the existing rows. Each
+    (table, column) of ``references`` holds codes and is converted to the
+    matching ids. ``code_sql`` redefines the code column once it is no
+    longer the key.
+    """
+    statements = [f'ALTER TABLE "{table}" ADD COLUMN "id" bigint NOT NULL GENERATED BY DEFAULT AS IDENTITY']
+    columns = " OR ".join(
+        f"(indrelid = '\"{owner}\"'::regclass AND indkey[0] = "
+        f"(SELECT attnum FROM pg_attribute WHERE attrelid = indrelid AND attname = '{column}'))"
+        for owner, column in [*references, (table, code_column)]
+    )
+    # Foreign keys to the old key, and the LIKE indexes of code columns,
+    # cannot survive the change of type
+    statements.append(f"""
+        DO $$
+        DECLARE r record;
+        BEGIN
+            FOR r IN SELECT conname, conrelid::regclass AS owner FROM pg_constraint
+                     WHERE confrelid = '"{table}"'::regclass AND contype = 'f' LOOP
+                EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', r.owner, r.conname);
+            END LOOP;
+            FOR r IN SELECT indexrelid::regclass AS name FROM pg_index
+                     WHERE ({columns})
+                     AND pg_get_indexdef(indexrelid) LIKE '%pattern_ops%' LOOP
+                EXECUTE format('DROP INDEX %s', r.name);
+            END LOOP;
+        END $$
+    """)
+    for owner, column in references:
+        statements += [
+            f'ALTER TABLE "{owner}" ADD COLUMN "{column}_new" bigint',
+            f'UPDATE "{owner}" SET "{column}_new" = "{table}"."id" FROM "{table}" '
+            f'WHERE "{table}"."{code_column}" = "{owner}"."{column}"',
+            f'ALTER TABLE "{owner}" ALTER COLUMN "{column}" TYPE bigint USING "{column}_new"',
+            f'ALTER TABLE "{owner}" DROP COLUMN "{column}_new"',
+        ]
+    statements.append(f"""
+        DO $$
+        BEGIN
+            EXECUTE format('ALTER TABLE "{table}" DROP CONSTRAINT %I', (
+                SELECT conname FROM pg_constraint WHERE conrelid = '"{table}"'::regclass AND contype = 'p'
+            ));
+        END $$
+    """)
+    statements += [f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ("id")', *code_sql]
+    statements += [
+        f'ALTER TABLE "{owner}" ADD CONSTRAINT "{owner}_{column}_fk_{table}_id" FOREIGN KEY ("{column}") '
+        f'REFERENCES "{table}" ("id") DEFERRABLE INITIALLY DEFERRED'
+        for owner, column in references
+    ]
+    return statements
+
+
+# Client codes could have 64 characters while they were the key, the model
+# allows 20: stop with the codes to shorten rather than cut them, which
+# could make two codes equal
+CHECK_CLIENT_CODE_LENGTH = """
+    DO $$
+    DECLARE codes text;
+    BEGIN
+        SELECT string_agg(quote_literal("Cliente_Codice"), ', ') INTO codes
+        FROM (SELECT "Cliente_Codice" FROM "client" WHERE length("Cliente_Codice") > 20 LIMIT 20) AS long_codes;
+        IF codes IS NOT NULL THEN
+            RAISE EXCEPTION 'Client codes longer than 20 characters: %. Shorten them and run migrate again.', codes;
+        END IF;
+    END $$
+"""
+
+
+class Migration(migrations.Migration):
+    """
+    Client and VP were created with their codes as primary keys; the models
+    have an "id" primary key instead. Existing rows keep their codes and get
+    ids, and client contacts and vehicles are re-pointed to the ids. The
+    remaining operations only bring labels and options in line with the
+    models.
+    """
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0011_import_job_client_kind'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(CHECK_CLIENT_CODE_LENGTH),
+                migrations.RunSQL(switch_primary_key(
+                    'client', 'Cliente_Codice', [('client_contact', 'client_id')],
+                    ['ALTER TABLE "client" ALTER COLUMN "Cliente_Codice" TYPE varchar(20)'],
+                )),
+                migrations.RunSQL(switch_primary_key(
+                    'vp', 'VP Codice', [('vehicle', 'VP_FK')],
+                    [
+                        'ALTER TABLE "vp" ADD CONSTRAINT "vp_VP Codice_key" UNIQUE ("VP Codice")',
+                        'CREATE INDEX "vp_VP Codice_like" ON "vp" ("VP Codice" varchar_pattern_ops)',
+                    ],
+                )),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='client',
+                    name='id',
+                    field=models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='client',
+                    name='code',
+                    field=models.CharField(db_column='Cliente_Codice', max_length=20, verbose_name='Code'),
+                ),
+                migrations.AddField(
+                    model_name='vp',
+                    name='id',
+                    field=models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='vp',
+                    name='vp_code',
+                    field=models.CharField(db_column='VP Codice', max_length=255, unique=True, verbose_name='VP Code'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='pending_review',
+            field=models.BooleanField(db_column='PENDING_REVIEW', default=False, verbose_name='Pending Review'),
+        ),
+        migrations.AlterModelOptions(
+            name='client',
+            options={'ordering': ['name'], 'verbose_name': 'Client', 'verbose_name_plural': 'Clients'},
+        ),
+        migrations.AlterModelOptions(
+            name='internaltransport',
+            options={'ordering': ['-request_date'], 'verbose_name': 'Internal Transport', 'verbose_name_plural': 'Internal Transports'},
+        ),
+        migrations.AlterModelOptions(
+            name='ocfstock',
+            options={'ordering': ['-created_at'], 'verbose_name': 'OCF Stock', 'verbose_name_plural': 'OCF Stocks'},
+        ),
+        migrations.AlterModelOptions(
+            name='salesperson',
+            options={'ordering': ['user__username'], 'verbose_name': 'Salesperson', 'verbose_name_plural': 'Salespeople'},
+        ),
+        migrations.AlterModelOptions(
+            name='vehicle',
+            options={'ordering': ['-created_at'], 'verbose_name': 'Vehicle', 'verbose_name_plural': 'Vehicles'},
+        ),
+        migrations.AlterModelOptions(
+            name='vp',
+            options={'ordering': ['vp_code'], 'verbose_name': 'VP', 'verbose_name_plural': 'VPs'},
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='address',
+            field=models.CharField(blank=True, db_column='Morada', max_length=255, null=True, verbose_name='Address'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='city',
+            field=models.CharField(blank=True, db_column='Localidade', max_length=120, null=True, verbose_name='City'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Created At'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='distributor',
+            field=models.CharField(blank=True, db_column='Distribuidor', max_length=120, null=True, verbose_name='Distributor'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='email',
+            field=models.EmailField(blank=True, db_column='Mail_geral', max_length=254, null=True, verbose_name='Email'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='name',
+            field=models.CharField(db_column='Cliente_Nome', max_length=200, verbose_name='Name'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='nif',
+            field=models.CharField(blank=True, db_column='NIF', help_text='Portuguese taxpayer number (9 digits).', max_length=9, null=True, validators=[django.core.validators.RegexValidator(message='NIF must be 9 digits.', regex='^\\d{9}$')], verbose_name='NIF'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='phone',
+            field=models.CharField(blank=True, db_column='Tel_geral', max_length=30, null=True, validators=[django.core.validators.RegexValidator(message='Invalid phone number format.', regex='^[0-9+\\-\\s().]{7,20}$')], verbose_name='Phone'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='postal_code',
+            field=models.CharField(blank=True, db_column='Cod_Postal', max_length=8, null=True, validators=[django.core.validators.RegexValidator(message='Postal code must be NNNN-NNN.', regex='^\\d{4}-\\d{3}$')], verbose_name='Postal Code'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='seller',
+            field=models.CharField(blank=True, db_column='Vendedor', max_length=120, null=True, verbose_name='Seller'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, db_column='Ultimo_Atualizar', null=True, verbose_name='Updated At'),
+        ),
+        migrations.AlterField(
+            model_name='clientcontact',
+            name='client',
+            field=models.ForeignKey(help_text='Owning client.', on_delete=django.db.models.deletion.CASCADE, related_name='contacts', to='Encomenda_Veiculos.client', verbose_name='Client'),
+        ),
+        migrations.AlterField(
+            model_name='clientcontact',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Created At'),
+        ),
+        migrations.AlterField(
+            model_name='clientcontact',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True, verbose_name='Email'),
+        ),
+        migrations.AlterField(
+            model_name='clientcontact',
+            name='is_primary',
+            field=models.BooleanField(default=False, help_text='Marks this as the primary contact for the client.', verbose_name='Is Primary'),
+        ),
+        migrations.AlterField(
+            model_name='clientcontact',
+            name='job_title',
+            field=models.CharField(blank=True, max_length=120, null=True, verbose_name='Job Title'),
+        ),
+        migrations.AlterField(
+            model_name='clientcontact',
+            name='name',
+            field=models.CharField(help_text='Contact person name.', max_length=200, verbose_name='Name'),
+        ),
+        migrations.AlterField(
+            model_name='clientcontact',
+            name='notes',
+            field=models.TextField(blank=True, null=True, verbose_name='Notes'),
+        ),
+        migrations.AlterField(
+            model_name='clientcontact',
+            name='phone',
+            field=models.CharField(blank=True, max_length=30, null=True, validators=[django.core.validators.RegexValidator(message='Invalid phone number format.', regex='^[0-9+\\-\\s().]{7,20}$')], verbose_name='Phone'),
+        ),
+        migrations.AlterField(
+            model_name='clientcontact',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Updated At'),
+        ),
+        migrations.AlterField(
+            model_name='internaltransport',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Created At'),
+        ),
+        migrations.AlterField(
+            model_name='internaltransport',
+            name='destination',
+            field=models.CharField(blank=True, db_column='DESTINO', max_length=255, null=True, verbose_name='Destination'),
+        ),
+        migrations.AlterField(
+            model_name='internaltransport',
+            name='notes',
+            field=models.TextField(blank=True, db_column='NOTAS', null=True, verbose_name='Notes'),
+        ),
+        migrations.AlterField(
+            model_name='internaltransport',
+            name='origin',
+            field=models.CharField(blank=True, db_column='ORIGEM', max_length=255, null=True, verbose_name='Origin'),
+        ),
+        migrations.AlterField(
+            model_name='internaltransport',
+            name='request_date',
+            field=models.DateField(blank=True, db_column='DATA PEDIDO', null=True, verbose_name='Request Date'),
+        ),
+        migrations.AlterField(
+            model_name='internaltransport',
+            name='transport_date',
+            field=models.DateField(blank=True, db_column='DATA TRANSPORTE', null=True, verbose_name='Transport Date'),
+        ),
+        migrations.AlterField(
+            model_name='internaltransport',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Updated At'),
+        ),
+        migrations.AlterField(
+            model_name='internaltransport',
+            name='vehicle',
+            field=models.ForeignKey(blank=True, db_column='VAN', help_text='Vehicle (by VAN) used for this internal transport.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='internal_transports', to='Encomenda_Veiculos.vehicle', verbose_name='Vehicle'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='buyback',
+            field=models.BooleanField(db_column='BB', default=False, verbose_name='Buyback'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='channel',
+            field=models.CharField(blank=True, db_column='CANAL', max_length=255, null=True, verbose_name='Channel'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='client_assigned_date',
+            field=models.DateField(blank=True, db_column='OCF_DATA', null=True, verbose_name='Client Assigned Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='client_final',
+            field=models.CharField(blank=True, db_column='CLIENTE3', max_length=255, null=True, verbose_name='Final Client'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='client_name',
+            field=models.CharField(blank=True, db_column='CLIENTE', max_length=255, null=True, verbose_name='Client Name'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Created At'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='delivery_date',
+            field=models.DateField(blank=True, db_column='DATA ENTREGA', null=True, verbose_name='Delivery Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='distributor',
+            field=models.CharField(blank=True, db_column='DISTRIBUIDOR', max_length=255, null=True, verbose_name='Distributor'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='expected_delivery',
+            field=models.CharField(blank=True, db_column='ENTREGA_PREVISTA', max_length=255, null=True, verbose_name='Expected Delivery'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='extended_warranty',
+            field=models.BooleanField(db_column='EW', default=False, verbose_name='Extended Warranty'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='extended_warranty_date',
+            field=models.DateField(blank=True, db_column='EW_DATA', null=True, verbose_name='Extended Warranty Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='has_client',
+            field=models.BooleanField(db_column='OCF', default=False, help_text='True if vehicle assigned to a client', verbose_name='Has Client'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='has_service_campaign',
+            field=models.BooleanField(db_column='CAMPANHA_SERVICE', default=False, verbose_name='Has Service Campaign'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='location',
+            field=models.CharField(blank=True, db_column='LOCALIZAÇÃO', max_length=255, null=True, verbose_name='Location'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='location_date',
+            field=models.DateField(blank=True, db_column='LOCAL_DATA', null=True, verbose_name='Location Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='maintenance_contract',
+            field=models.BooleanField(db_column='CMR', default=False, verbose_name='Maintenance Contract'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='maintenance_contract_date',
+            field=models.DateField(blank=True, db_column='CMR_DATA', null=True, verbose_name='Maintenance Contract Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='notes',
+            field=models.TextField(blank=True, db_column='NOTAS', null=True, verbose_name='Notes'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='order_date',
+            field=models.DateField(blank=True, db_column='DATA', null=True, verbose_name='Order Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='order_number',
+            field=models.IntegerField(blank=True, db_column='NUMERO LATERAL', null=True, verbose_name='Order Number'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='order_week',
+            field=models.IntegerField(blank=True, db_column='SEMANA', help_text='Week number of order', null=True, verbose_name='Order Week'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='pdi_completed_date',
+            field=models.DateField(blank=True, db_column='DATA_PDI_OK', null=True, verbose_name='PDI Completed Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='pdi_notes',
+            field=models.TextField(blank=True, db_column='NOTAS_PDI', null=True, verbose_name='PDI Notes'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='pdi_request_date',
+            field=models.DateField(blank=True, db_column='DATA_PDI_PEDIDO', null=True, verbose_name='PDI Request Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='pdi_workshop',
+            field=models.CharField(blank=True, db_column='OFICINA_PDI', max_length=255, null=True, verbose_name='PDI Workshop'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='pre_pdi_date',
+            field=models.DateField(blank=True, db_column='DATA_PRE_PDI', null=True, verbose_name='Pre-PDI Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='produced',
+            field=models.BooleanField(db_column='PRODUZIDO', default=False, verbose_name='Produced'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='reservation_date',
+            field=models.DateField(blank=True, db_column='DATA RESERVA', null=True, verbose_name='Reservation Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='reservation_info',
+            field=models.CharField(blank=True, db_column='RESERVA', max_length=255, null=True, verbose_name='Reservation Info'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='reservation_notes',
+            field=models.TextField(blank=True, db_column='RESERVA_NOTAS', null=True, verbose_name='Reservation Notes'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='salesperson',
+            field=models.ForeignKey(blank=True, db_column='VENDEDOR', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ocf_sales', to='Encomenda_Veiculos.salesperson', verbose_name='Salesperson'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='service_campaign_date',
+            field=models.DateField(blank=True, db_column='CAMPANHA_SERVICE_DATA', null=True, verbose_name='Service Campaign Date'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='service_campaign_due',
+            field=models.DateField(blank=True, db_column='CAMPANHA_SERVICE_PREV', null=True, verbose_name='Service Campaign Due'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='sold',
+            field=models.BooleanField(db_column='VENDIDO', default=False, verbose_name='Sold'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='stock_notes',
+            field=models.TextField(blank=True, db_column='Notas_STOCK', null=True, verbose_name='Stock Notes'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Updated At'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='vehicle',
+            field=models.OneToOneField(db_column='VAN', help_text='The vehicle tracked in OCF stock.', on_delete=django.db.models.deletion.CASCADE, related_name='ocf_entry', to='Encomenda_Veiculos.vehicle', verbose_name='Vehicle'),
+        ),
+        migrations.AlterField(
+            model_name='ocfstock',
+            name='warranty_start',
+            field=models.DateField(blank=True, db_column='WSD', null=True, verbose_name='Warranty Start'),
+        ),
+        migrations.AlterField(
+            model_name='salesperson',
+            name='active',
+            field=models.BooleanField(db_column='ATIVO', default=True, verbose_name='Active'),
+        ),
+        migrations.AlterField(
+            model_name='salesperson',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Created At'),
+        ),
+        migrations.AlterField(
+            model_name='salesperson',
+            name='distributor',
+            field=models.CharField(blank=True, db_column='DISTRIBUIDOR', max_length=255, null=True, verbose_name='Distributor'),
+        ),
+        migrations.AlterField(
+            model_name='salesperson',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Updated At'),
+        ),
+        migrations.AlterField(
+            model_name='salesperson',
+            name='user',
+            field=models.OneToOneField(help_text='User account for this salesperson.', on_delete=django.db.models.deletion.CASCADE, related_name='salesperson_profile', to=settings.AUTH_USER_MODEL, verbose_name='User'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='country',
+            field=models.CharField(blank=True, db_column='Country', max_length=255, null=True, verbose_name='Country'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Created At'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='has_service_campaign',
+            field=models.BooleanField(blank=True, db_column='CAMPANHA_SERVICE', default=False, null=True, verbose_name='Has Service Campaign'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='lot',
+            field=models.IntegerField(blank=True, db_column='LOT', null=True, verbose_name='Lot'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='plate',
+            field=models.CharField(blank=True, db_column='MATRICULA', max_length=20, null=True, validators=[django.core.validators.RegexValidator(message='License plate should be 5–15 chars (letters/digits/hyphens/spaces).', regex='^[A-Z0-9\\- ]{5,15}$')], verbose_name='License Plate'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='production_year',
+            field=models.DateField(blank=True, db_column='ANO_PROD', null=True, verbose_name='Production Year'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='registration_date',
+            field=models.DateField(blank=True, db_column='DATA_MATRICULA', null=True, verbose_name='Registration Date'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='service_campaign_date',
+            field=models.DateField(blank=True, db_column='CAMPANHA_SERVICE_DATA', null=True, verbose_name='Service Campaign Date'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='service_campaign_due',
+            field=models.DateField(blank=True, db_column='CAMPANHA_SERVICE_PREV', null=True, verbose_name='Service Campaign Due'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Updated At'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='van',
+            field=models.IntegerField(db_column='VAN', primary_key=True, serialize=False, unique=True, verbose_name='VAN'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='vin',
+            field=models.CharField(blank=True, db_column='VIN', max_length=17, null=True, validators=[django.core.validators.RegexValidator(message='VIN must be 11–17 characters (alphanumeric, excluding I/O/Q).', regex='^[A-HJ-NPR-Z0-9]{11,17}$')], verbose_name='VIN'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='vp',
+            field=models.ForeignKey(db_column='VP_FK', on_delete=django.db.models.deletion.PROTECT, related_name='vehicles', to='Encomenda_Veiculos.vp', verbose_name='VP'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='cabina',
+            field=models.CharField(blank=True, db_column='CABINA', max_length=255, null=True, verbose_name='Cabina'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='co2',
+            field=models.IntegerField(blank=True, db_column='CO2', null=True, verbose_name='CO2'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='color_code_numeric',
+            field=models.IntegerField(blank=True, db_column='Colore_Codice (Numerico)', null=True, verbose_name='Color Code (Numeric)'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='color_desc',
+            field=models.CharField(blank=True, db_column='Colore_Descrizione Estesa', max_length=255, null=True, verbose_name='Color Description'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Created At'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='dee',
+            field=models.IntegerField(blank=True, db_column='DEE', null=True, verbose_name='DEE'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='engine_code',
+            field=models.CharField(blank=True, db_column='Motore_V', max_length=255, null=True, verbose_name='Engine Code'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='gama',
+            field=models.CharField(blank=True, db_column='GAMA', max_length=255, null=True, verbose_name='Gama'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='gearbox',
+            field=models.CharField(blank=True, db_column='CAIXA VEL', max_length=255, null=True, verbose_name='Gearbox'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='hi',
+            field=models.CharField(blank=True, db_column='HI', max_length=255, null=True, verbose_name='HI'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='homologation',
+            field=models.CharField(blank=True, db_column='Homologação', max_length=255, null=True, verbose_name='Homologation'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='modelo',
+            field=models.CharField(blank=True, db_column='MODELO', max_length=255, null=True, verbose_name='Modelo'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='motor',
+            field=models.CharField(blank=True, db_column='MOTOR', max_length=255, null=True, verbose_name='Motor'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='notas_vp',
+            field=models.TextField(blank=True, db_column='NOTAS_VP', null=True, verbose_name='VP Notes'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='tare_kg',
+            field=models.IntegerField(blank=True, db_column='TARA', null=True, verbose_name='Tare (kg)'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Updated At'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='variant',
+            field=models.CharField(blank=True, db_column='Variante', max_length=255, null=True, verbose_name='Variant'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='version',
+            field=models.CharField(blank=True, db_column='Versão', max_length=255, null=True, verbose_name='Version'),
+        ),
+        migrations.AlterField(
+            model_name='vp',
+            name='wheelbase',
+            field=models.CharField(blank=True, db_column='WB', max_length=255, null=True, verbose_name='Wheelbase'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def queue_named_stock(apps, schema_editor):
+    # Existing entries are matched by the next import or resolve_stock_clients
+    OCFStock = apps.get_model('Encomenda_Veiculos', 'OCFStock')
+    OCFStock.objects.exclude(client_name=None, client_final=None).update(client_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0012_client_vp_id_primary_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ocfstock',
+            name='client',
+            field=models.ForeignKey(blank=True, db_column='CLIENTE_ID', db_index=False, help_text='Client record the client names were matched to.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ocf_stock', to='Encomenda_Veiculos.client', verbose_name='Client'),
+        ),
+        migrations.AddField(
+            model_name='ocfstock',
+            name='client_pending',
+            field=models.BooleanField(db_column='CLIENTE_PENDENTE', default=False, editable=False, help_text='Client names changed since they were last matched to a client record.', verbose_name='Client Pending'),
+        ),
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=models.Index(fields=['client', 'created_at', 'id'], name='ocf_stock_CLIENTE_504b64_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocfstock',
+            index=models.Index(condition=models.Q(('client_pending', True)), fields=['id'], name='ocf_stock_client_pending_idx'),
+        ),
+        migrations.RunPython(queue_named_stock, migrations.RunPython.noop),
+    ]
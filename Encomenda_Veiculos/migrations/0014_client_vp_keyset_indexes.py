@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0013_ocf_stock_client'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['created_at', 'id'], name='client_created_4be202_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vp',
+            index=models.Index(fields=['created_at', 'id'], name='vp_created_54cd7e_idx'),
+        ),
+    ]
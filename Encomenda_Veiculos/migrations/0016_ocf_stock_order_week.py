@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Entries without an order week get the ISO week of their order date, as
+    the importer now does, and the dashboard's order_week counts are redone.
+    """
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0015_import_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'UPDATE "ocf_stock" SET "SEMANA" = EXTRACT(WEEK FROM "DATA") WHERE "SEMANA" IS NULL AND "DATA" IS NOT NULL',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            [
+                'LOCK TABLE "stock_summary" IN SHARE ROW EXCLUSIVE MODE',
+                "DELETE FROM \"stock_summary\" WHERE \"dimension\" = 'order_week'",
+                "INSERT INTO \"stock_summary\" (\"dimension\", \"value\", \"count\") "
+                "SELECT 'order_week', COALESCE(\"SEMANA\"::text, ''), COUNT(*) FROM \"ocf_stock\" GROUP BY \"SEMANA\"",
+            ],
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:05
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_codes(apps, schema_editor):
+    """
+    Codes lost their uniqueness with the switch to an id primary key (0012),
+    so imports may have created a client twice. The oldest client of a code
+    takes over the contacts and stock of the others, which are deleted, and
+    is flagged for review.
+    """
+    Client = apps.get_model('Encomenda_Veiculos', 'Client')
+    ClientContact = apps.get_model('Encomenda_Veiculos', 'ClientContact')
+    OCFStock = apps.get_model('Encomenda_Veiculos', 'OCFStock')
+    duplicates = (
+        Client.objects.exclude(code='').order_by().values('code')
+        .annotate(clients=Count('id'), keep=Min('id')).filter(clients__gt=1)
+    )
+    for duplicate in duplicates:
+        others = list(Client.objects.filter(code=duplicate['code']).exclude(id=duplicate['keep']).values_list('id', flat=True))
+        ClientContact.objects.filter(client_id__in=others).update(client_id=duplicate['keep'])
+        OCFStock.objects.filter(client_id__in=others).update(client_id=duplicate['keep'])
+        Client.objects.filter(id__in=others).delete()
+        Client.objects.filter(id=duplicate['keep']).update(pending_review=True)
+    # Check the deferred foreign keys now: the unique index cannot be built
+    # on a table with pending trigger events
+    schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+    """
+    Client codes are unique again, apart from the blank code of clients
+    added by hand; the unique index replaces the plain one.
+    """
+
+    dependencies = [
+        ('Encomenda_Veiculos', '0016_ocf_stock_order_week'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_codes, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='client',
+            name='client_Cliente_045b58_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='client',
+            constraint=models.UniqueConstraint(condition=models.Q(('code', ''), _negated=True), fields=('code',), name='uniq_client_code_not_blank'),
+        ),
+    ]
@@ -1,10 +1,14 @@
 # models.py
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Cast, Upper
 from django.core.validators import RegexValidator
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from . import vp_cache
+
 PT_NIF_REGEX = RegexValidator(regex=r"^\d{9}$", message=_("NIF must be 9 digits."))
 PT_POSTAL_REGEX = RegexValidator(regex=r"^\d{4}-\d{3}$", message=_("Postal code must be NNNN-NNN."))
 PHONE_REGEX = RegexValidator(regex=r"^[0-9+\-\s().]{7,20}$", message=_("Invalid phone number format."))
@@ -39,6 +43,7 @@ class Salesperson(models.Model):
         verbose_name_plural = _("Salespeople")
         ordering = ["user__username"]
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["distributor"]),
             models.Index(fields=["active"]),
         ]
@@ -86,9 +91,16 @@ class Client(models.Model):
         verbose_name_plural = _("Clients")
         ordering = ["name"]
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["name"]),
-            models.Index(fields=["code"]),
             models.Index(fields=["nif"]),
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="client_name_trgm"),
+            GinIndex(OpClass(Upper("nif"), name="gin_trgm_ops"), name="client_nif_trgm"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["nif"], name="uniq_client_nif_not_null", condition=models.Q(nif__isnull=False)),
+            # The client import upserts by code; clients added by hand have none
+            models.UniqueConstraint(fields=["code"], name="uniq_client_code_not_blank", condition=~models.Q(code="")),
         ]
 
     def __str__(self):
@@ -128,6 +140,7 @@ class ClientContact(models.Model):
         verbose_name_plural = _("Client Contacts")
         ordering = ["client_id", "name"]
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["client", "name"]),
             models.Index(fields=["client", "email"]),
             models.Index(fields=["client", "phone"]),
@@ -187,8 +200,12 @@ class VP(models.Model):
         verbose_name_plural = _("VPs")
         ordering = ["vp_code"]
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["vp_code"]),
             models.Index(fields=["modelo", "version"]),
+            models.Index(fields=["gama"]),
+            GinIndex(OpClass(Upper("vp_code"), name="gin_trgm_ops"), name="vp_code_trgm"),
+            GinIndex(OpClass(Upper("modelo"), name="gin_trgm_ops"), name="vp_modelo_trgm"),
         ]
 
     def __str__(self):
@@ -228,6 +245,12 @@ class Vehicle(models.Model):
         verbose_name=_("VP")
     )
 
+    import_fingerprint = models.CharField(
+        max_length=32, null=True, blank=True, editable=False, db_column="IMPORT_HASH",
+        verbose_name=_("Import Fingerprint"),
+        help_text=_("Hash of the source fields of the last import, used to skip unchanged rows.")
+    )
+
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created At"))
     updated_at = models.DateTimeField(default=timezone.now, verbose_name=_("Updated At"))
 
@@ -237,17 +260,33 @@ class Vehicle(models.Model):
         verbose_name_plural = _("Vehicles")
         ordering = ["-created_at"]
         indexes = [
+            models.Index(fields=["created_at", "van"]),
             models.Index(fields=["van"]),
             models.Index(fields=["vin"]),
             models.Index(fields=["plate"]),
             models.Index(fields=["vp"]),
+            # Trigram indexes for the partial matches of the global search, on UPPER()
+            # because that is what the icontains lookup compares
+            GinIndex(OpClass(Upper(Cast("van", models.TextField())), name="gin_trgm_ops"), name="vehicle_van_trgm"),
+            GinIndex(OpClass(Upper("vin"), name="gin_trgm_ops"), name="vehicle_vin_trgm"),
+            GinIndex(OpClass(Upper("plate"), name="gin_trgm_ops"), name="vehicle_plate_trgm"),
         ]
         constraints = [
+            models.UniqueConstraint(fields=["vin"], name="uniq_vehicle_vin_nn", condition=models.Q(vin__isnull=False)),
             models.UniqueConstraint(fields=["plate"], name="uniq_vehicle_plate_nn", condition=models.Q(plate__isnull=False)),
         ]
 
     def __str__(self):
-        return f"VAN {self.van} @ {self.vp.vp_code}"
+        # Lists load the VP with the vehicle; anywhere else its code comes from
+        # the VP cache, once per instance and VP
+        if Vehicle.vp.is_cached(self):
+            vp_code = self.vp.vp_code if self.vp else None
+        else:
+            if getattr(self, "_vp_code", (None, None))[0] != self.vp_id:
+                vp = vp_cache.get_vp(self.vp_id)
+                self._vp_code = (self.vp_id, vp.vp_code if vp else None)
+            vp_code = self._vp_code[1]
+        return f"VAN {self.van} @ {vp_code}"
 
 class InternalTransport(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -279,7 +318,15 @@ class InternalTransport(models.Model):
         verbose_name_plural = _("Internal Transports")
         ordering = ["-request_date"]
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["vehicle", "transport_date"]),
+            # Calendar window queries: a transport_date range answered from the
+            # index alone, without visiting the table
+            models.Index(
+                fields=["transport_date"],
+                include=["id", "vehicle", "origin", "destination"],
+                name="internal_transport_date_idx",
+            ),
             models.Index(fields=["origin"]),
             models.Index(fields=["destination"]),
         ]
@@ -317,6 +364,22 @@ class OCFStock(models.Model):
     order_number = models.IntegerField(null=True, blank=True, db_column="NUMERO LATERAL", verbose_name=_("Order Number"))
     client_name = models.CharField(max_length=255, null=True, blank=True, db_column="CLIENTE", verbose_name=_("Client Name"))
     client_final = models.CharField(max_length=255, null=True, blank=True, db_column="CLIENTE3", verbose_name=_("Final Client"))
+    client = models.ForeignKey(
+        "Client",
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="ocf_stock",
+        db_column="CLIENTE_ID",
+        # Covered by the (client, created_at, id) index
+        db_index=False,
+        verbose_name=_("Client"),
+        help_text=_("Client record the client names were matched to.")
+    )
+    client_pending = models.BooleanField(
+        default=False, editable=False, db_column="CLIENTE_PENDENTE",
+        verbose_name=_("Client Pending"),
+        help_text=_("Client names changed since they were last matched to a client record.")
+    )
 
     sold = models.BooleanField(default=False, db_column="VENDIDO", verbose_name=_("Sold"))
     produced = models.BooleanField(default=False, db_column="PRODUZIDO", verbose_name=_("Produced"))
@@ -348,6 +411,12 @@ class OCFStock(models.Model):
     notes = models.TextField(null=True, blank=True, db_column="NOTAS", verbose_name=_("Notes"))
     stock_notes = models.TextField(null=True, blank=True, db_column="Notas_STOCK", verbose_name=_("Stock Notes"))
 
+    import_fingerprint = models.CharField(
+        max_length=32, null=True, blank=True, editable=False, db_column="IMPORT_HASH",
+        verbose_name=_("Import Fingerprint"),
+        help_text=_("Hash of the source fields of the last import, used to skip unchanged rows.")
+    )
+
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created At"))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated At"))
 
@@ -357,12 +426,196 @@ class OCFStock(models.Model):
         verbose_name_plural = _("OCF Stocks")
         ordering = ["-created_at"]
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["has_client"]),
             models.Index(fields=["sold"]),
             models.Index(fields=["produced"]),
             models.Index(fields=["delivery_date"]),
             models.Index(fields=["salesperson"]),
+            # Stock of a client, in list order
+            models.Index(fields=["client", "created_at", "id"]),
+            models.Index(fields=["id"], condition=models.Q(client_pending=True), name="ocf_stock_client_pending_idx"),
+            # Stock list filters: "produced, not sold yet" is the daily view, so it
+            # gets its own partial index in list order
+            models.Index(fields=["created_at", "id"], condition=models.Q(sold=False, produced=True), name="ocf_stock_available_idx"),
+            models.Index(fields=["distributor", "sold", "produced"]),
+            models.Index(fields=["location", "sold", "produced"]),
+            models.Index(fields=["channel"]),
+            models.Index(fields=["order_date"]),
+            GinIndex(OpClass(Upper("client_name"), name="gin_trgm_ops"), name="ocf_stock_client_name_trgm"),
+            GinIndex(OpClass(Upper("client_final"), name="gin_trgm_ops"), name="ocf_stock_client_final_trgm"),
         ]
 
     def __str__(self):
         return f"OCF {self.vehicle.van} ({'Sold' if self.sold else 'Stock'})"
+
+
+class ImportJob(models.Model):
+    class Kind(models.TextChoices):
+        STOCK = "stock", _("OCF Stock")
+        CLIENT = "client", _("Clients")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=Kind.choices, default=Kind.STOCK, verbose_name=_("Kind"))
+    file = models.FileField(upload_to="imports/%Y/%m/", verbose_name=_("File"))
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING, verbose_name=_("Status"))
+    dry_run = models.BooleanField(default=False, verbose_name=_("Dry Run"), help_text=_("Only compute what the import would change."))
+    preview = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="commits",
+        verbose_name=_("Preview"),
+        help_text=_("Dry run whose validated rows this job imports.")
+    )
+    plan_file = models.FileField(upload_to="imports/plans/", null=True, blank=True, verbose_name=_("Plan File"))
+    report = models.JSONField(null=True, blank=True, verbose_name=_("Report"))
+
+    total_rows = models.IntegerField(null=True, blank=True, verbose_name=_("Total Rows"))
+    processed_rows = models.IntegerField(default=0, verbose_name=_("Processed Rows"))
+    created_count = models.IntegerField(default=0, verbose_name=_("Created"))
+    updated_count = models.IntegerField(default=0, verbose_name=_("Updated"))
+    skipped_count = models.IntegerField(default=0, verbose_name=_("Skipped"))
+    unchanged_count = models.IntegerField(default=0, verbose_name=_("Unchanged"))
+    error_count = models.IntegerField(default=0, verbose_name=_("Errors"))
+    message = models.TextField(null=True, blank=True, verbose_name=_("Message"))
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="import_jobs",
+        verbose_name=_("Created By")
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created At"))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Started At"))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Finished At"))
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name=_("Heartbeat At"),
+        help_text=_("Last sign of life from the worker running the job.")
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("Attempts"))
+
+    class Meta:
+        db_table = "import_job"
+        verbose_name = _("Import Job")
+        verbose_name_plural = _("Import Jobs")
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return None
+        return ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+
+    @property
+    def is_active(self):
+        return self.status in (self.Status.PENDING, self.Status.RUNNING)
+
+    @property
+    def can_commit(self):
+        return self.dry_run and self.status == self.Status.DONE and bool(self.plan_file)
+
+    @property
+    def source_files(self):
+        """The uploaded file followed by any additional files, in upload order."""
+        return [self.file] + [extra.file for extra in self.extra_files.order_by("id")]
+
+    @property
+    def row_issues(self):
+        """Rows the import rejected; a commit adds its own to those of the dry run, which validated the file."""
+        return ImportRowIssue.objects.filter(job_id__in=[self.pk, self.preview_id]).order_by("id")
+
+    def __str__(self):
+        return f"Import {self.id} ({self.get_kind_display()}, {self.get_status_display()})"
+
+
+class ImportJobFile(models.Model):
+    id = models.BigAutoField(primary_key=True)
+
+    job = models.ForeignKey(
+        "ImportJob",
+        on_delete=models.CASCADE,
+        related_name="extra_files",
+        verbose_name=_("Import Job"),
+        help_text=_("Job that imports this file together with its main file.")
+    )
+    file = models.FileField(upload_to="imports/%Y/%m/", verbose_name=_("File"))
+
+    class Meta:
+        db_table = "import_job_file"
+        verbose_name = _("Import Job File")
+        verbose_name_plural = _("Import Job Files")
+
+    def __str__(self):
+        return self.file.name
+
+
+class ImportRowIssue(models.Model):
+    """A source row an import job rejected, with the column and the reason."""
+
+    class Kind(models.TextChoices):
+        SKIPPED = "skipped", _("Skipped")
+        INVALID = "invalid", _("Invalid")
+        FAILED = "failed", _("Failed")
+
+    id = models.BigAutoField(primary_key=True)
+    job = models.ForeignKey(
+        "ImportJob",
+        on_delete=models.CASCADE,
+        related_name="issues",
+        # Covered by the (job, id) index
+        db_index=False,
+        verbose_name=_("Import Job")
+    )
+    kind = models.CharField(max_length=20, choices=Kind.choices, verbose_name=_("Kind"))
+    source = models.CharField(max_length=255, blank=True, verbose_name=_("Source"), help_text=_("File (and sheet) of the row."))
+    row = models.IntegerField(verbose_name=_("Row"), help_text=_("0-based data row of the source, below the header."))
+    column = models.CharField(max_length=255, null=True, blank=True, verbose_name=_("Column"))
+    value = models.TextField(null=True, blank=True, verbose_name=_("Value"))
+    reason = models.CharField(max_length=255, verbose_name=_("Reason"))
+
+    class Meta:
+        db_table = "import_row_issue"
+        verbose_name = _("Import Row Issue")
+        verbose_name_plural = _("Import Row Issues")
+        indexes = [
+            models.Index(fields=["job", "id"], name="import_row_issue_job_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.source} row {self.row}: {self.reason}"
+
+
+class StockSummary(models.Model):
+    """
+    Number of OCF stock entries per value of each dashboard dimension, so the
+    dashboard reads a few hundred rows instead of grouping the whole stock.
+    Kept current by Encomenda_Veiculos.summary.
+    """
+    id = models.BigAutoField(primary_key=True)
+    dimension = models.CharField(max_length=50, verbose_name=_("Dimension"))
+    # Grouped value as text, "" when the field is empty
+    value = models.CharField(max_length=255, blank=True, verbose_name=_("Value"))
+    count = models.IntegerField(default=0, verbose_name=_("Count"))
+
+    class Meta:
+        db_table = "stock_summary"
+        verbose_name = _("Stock Summary")
+        verbose_name_plural = _("Stock Summaries")
+        constraints = [
+            models.UniqueConstraint(fields=["dimension", "value"], name="uniq_stock_summary_value"),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.value}: {self.count}"
@@ -0,0 +1,167 @@
+import base64
+import json
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.translation import gettext as _
+
+# Upper bound for the ?page_size= query parameter
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise Http404(_("Invalid page cursor."))
+    if not isinstance(values, list):
+        raise Http404(_("Invalid page cursor."))
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Rows strictly after ``values`` in ``ordering``, written so the leading
+    column is also bounded on its own and an index on the ordering columns
+    can be range-scanned:
+    ``a <= x AND (a < x OR (a = x AND b < y))`` for ``("-a", "-b")``.
+    """
+    names = [field.lstrip("-") for field in ordering]
+    after = Q()
+    for position, (field, name) in enumerate(zip(ordering, names)):
+        lookup = "lt" if field.startswith("-") else "gt"
+        equal = dict(zip(names[:position], values))
+        after |= Q(**equal, **{f"{name}__{lookup}": values[position]})
+    leading = "lte" if ordering[0].startswith("-") else "gte"
+    return Q(**{f"{names[0]}__{leading}": values[0]}) & after
+
+
+def page_size(request, default=None):
+    """Rows per page: ?page_size= within 1..MAX_PAGE_SIZE, else ``default`` or settings.LIST_PAGE_SIZE."""
+    try:
+        size = int(request.GET.get("page_size", ""))
+    except ValueError:
+        size = default or settings.LIST_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _reverse(ordering):
+    return [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    has_next: bool
+    has_previous: bool
+    next_cursor: str = None
+    previous_cursor: str = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a fixed, unique ``ordering`` (the last field must
+    be unique, e.g. the primary key). Every page is a single indexed range
+    query of ``per_page + 1`` rows, so page N costs the same as page 1;
+    cursors are the ordering values of the first/last row of a page.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+
+    def _values(self, obj):
+        values = []
+        for field in self.ordering:
+            value = obj
+            for part in field.lstrip("-").split("__"):
+                value = getattr(value, part)
+            values.append(value)
+        return values
+
+    def _decode(self, cursor):
+        values = decode_cursor(cursor)
+        if len(values) != len(self.ordering) or any(isinstance(value, (dict, list)) for value in values):
+            raise Http404(_("Invalid page cursor."))
+        # Cursor values are strings again, let the fields convert them back
+        model = self.queryset.model
+        converted = []
+        try:
+            for field, value in zip(self.ordering, values):
+                name = field.lstrip("-")
+                if name == "pk":
+                    value = model._meta.pk.to_python(value)
+                elif "__" not in name:
+                    value = model._meta.get_field(name).to_python(value)
+                converted.append(value)
+        except (ValidationError, TypeError, ValueError):
+            # A tampered cursor is a missing page, not a server error
+            raise Http404(_("Invalid page cursor."))
+        return converted
+
+    def _rows(self, after, before):
+        if before:
+            ordering = _reverse(self.ordering)
+            return self.queryset.order_by(*ordering).filter(keyset_filter(ordering, self._decode(before)))[:self.per_page + 1]
+        queryset = self.queryset.order_by(*self.ordering)
+        if after:
+            queryset = queryset.filter(keyset_filter(self.ordering, self._decode(after)))
+        return queryset[:self.per_page + 1]
+
+    def _page(self, rows, after, before):
+        if before:
+            has_previous, has_next = len(rows) > self.per_page, True
+            rows = rows[:self.per_page][::-1]
+        else:
+            has_previous, has_next = bool(after), len(rows) > self.per_page
+            rows = rows[:self.per_page]
+
+        return KeysetPage(
+            object_list=rows,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_cursor=encode_cursor(self._values(rows[-1])) if rows else None,
+            previous_cursor=encode_cursor(self._values(rows[0])) if rows else None,
+        )
+
+    def page(self, after=None, before=None):
+        return self._page(list(self._rows(after, before)), after, before)
+
+    async def apage(self, after=None, before=None):
+        """page() for async views, reading the rows with the async ORM."""
+        return self._page([row async for row in self._rows(after, before)], after, before)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin replacing offset pagination with KeysetPaginator. Pages
+    are addressed with ``?after=<cursor>``/``?before=<cursor>`` and the page
+    size defaults to settings.LIST_PAGE_SIZE (``?page_size=`` overrides it,
+    up to MAX_PAGE_SIZE).
+    """
+    keyset_ordering = ("-created_at", "-pk")
+
+    def get_paginate_by(self, queryset):
+        return page_size(self.request, self.paginate_by)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.keyset_ordering, page_size)
+        page = paginator.page(after=self.request.GET.get("after"), before=self.request.GET.get("before"))
+        return paginator, page, page.object_list, page.has_other_pages()
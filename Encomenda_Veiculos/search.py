@@ -0,0 +1,117 @@
+from typing import Callable, NamedTuple
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Cast, Greatest
+from django.urls import reverse
+
+from .models import VP, Vehicle, OCFStock, Client
+
+# Shorter queries cannot use the trigram indexes and match almost everything
+MIN_QUERY_LENGTH = 3
+# Hits returned per model and in total
+MODEL_LIMIT = 10
+TOTAL_LIMIT = 30
+# Matching rows ranked per model: a very common term (a client name shared by
+# half the stock) would otherwise compute the similarity of every match
+CANDIDATE_LIMIT = 500
+
+
+class SearchTarget(NamedTuple):
+    kind: str
+    queryset: Callable
+    # Text fields (or annotations) matched with ILIKE '%q%'; each one has a
+    # gin_trgm_ops index so the match does not scan the table
+    fields: tuple
+    label: Callable
+    url: Callable
+
+
+def _vehicle_url(vehicle):
+    ocf = getattr(vehicle, "ocf_entry", None)
+    return reverse("Encomenda_Veiculos:ocfstock_detail", args=[ocf.pk]) if ocf else None
+
+
+SEARCH_TARGETS = [
+    SearchTarget(
+        kind="vehicle",
+        # The VAN is an integer, it is searched through the same text cast as its index
+        queryset=lambda: Vehicle.objects.annotate(van_text=Cast("van", models.TextField())).select_related("vp", "ocf_entry"),
+        fields=("van_text", "vin", "plate"),
+        label=lambda vehicle: " · ".join(filter(None, [str(vehicle), vehicle.vin, vehicle.plate])),
+        url=_vehicle_url,
+    ),
+    SearchTarget(
+        kind="ocf",
+        queryset=lambda: OCFStock.objects.select_related("vehicle__vp"),
+        fields=("client_name", "client_final"),
+        label=lambda ocf: " · ".join(filter(None, [str(ocf.vehicle), ocf.client_name, ocf.client_final])),
+        url=lambda ocf: reverse("Encomenda_Veiculos:ocfstock_detail", args=[ocf.pk]),
+    ),
+    SearchTarget(
+        kind="client",
+        queryset=lambda: Client.objects.all(),
+        fields=("name", "nif"),
+        label=lambda client: " · ".join(filter(None, [client.name, client.nif])),
+        url=lambda client: reverse("Encomenda_Veiculos:client_detail", args=[client.pk]),
+    ),
+    SearchTarget(
+        kind="vp",
+        queryset=lambda: VP.objects.all(),
+        fields=("vp_code", "modelo"),
+        label=lambda vp: " · ".join(filter(None, [vp.vp_code, vp.modelo, vp.version])),
+        url=lambda vp: reverse("Encomenda_Veiculos:vp_detail", args=[vp.pk]),
+    ),
+]
+
+
+def _search_target(target, query, limit):
+    condition = Q()
+    for name in target.fields:
+        condition |= Q(**{f"{name}__icontains": query})
+    scores = [TrigramWordSimilarity(query, name) for name in target.fields]
+    score = Greatest(*scores) if len(scores) > 1 else scores[0]
+    candidates = target.queryset().filter(condition).values("pk")[:CANDIDATE_LIMIT]
+    return target.queryset().filter(pk__in=candidates).annotate(score=score).order_by("-score")[:limit]
+
+
+def _hit(target, obj):
+    return {
+        "kind": target.kind,
+        "label": target.label(obj),
+        "url": target.url(obj),
+        "score": round(obj.score or 0, 3),
+    }
+
+
+def _ranked(hits, total_limit):
+    hits.sort(key=lambda hit: hit["score"], reverse=True)
+    return hits[:total_limit]
+
+
+def global_search(query, model_limit=MODEL_LIMIT, total_limit=TOTAL_LIMIT):
+    """
+    Hits for ``query`` across vehicles, OCF stock, clients and VPs, as dicts
+    (kind, label, url, score) ranked by trigram word similarity, best first.
+    """
+    query = query.strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        return []
+    hits = [
+        _hit(target, obj)
+        for target in SEARCH_TARGETS
+        for obj in _search_target(target, query, model_limit)
+    ]
+    return _ranked(hits, total_limit)
+
+
+async def aglobal_search(query, model_limit=MODEL_LIMIT, total_limit=TOTAL_LIMIT):
+    query = query.strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        return []
+    hits = []
+    for target in SEARCH_TARGETS:
+        async for obj in _search_target(target, query, model_limit):
+            hits.append(_hit(target, obj))
+    return _ranked(hits, total_limit)
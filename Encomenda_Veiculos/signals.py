@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .metrics import record_query
+from .models import ImportJob, OCFStock, VP, Vehicle
+from .summary import adjust_stock_summary, move_stock_modelo, stock_modelo, stock_summary_values
+from .vp_cache import invalidate_vp_cache
+
+
+# Single saves (forms, admin) update the dashboard counts in the same
+# transaction; imports write in bulk and apply the changes of each batch
+# (importers.apply_stock_plan).
+
+@receiver(pre_save, sender=OCFStock)
+def remember_stock_summary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._summary_before = stock_summary_values(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=OCFStock)
+def update_stock_summary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        adjust_stock_summary(getattr(instance, "_summary_before", None), stock_summary_values(instance.pk))
+
+
+@receiver(pre_delete, sender=OCFStock)
+def remove_from_stock_summary(sender, instance, **kwargs):
+    adjust_stock_summary(stock_summary_values(instance.pk), None)
+
+
+@receiver(pre_save, sender=VP)
+@receiver(pre_save, sender=Vehicle)
+def remember_stock_modelo(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._modelo_before = stock_modelo(sender, instance.pk)
+
+
+@receiver(post_save, sender=VP)
+@receiver(post_save, sender=Vehicle)
+def move_stock_entries_modelo(sender, instance, raw=False, **kwargs):
+    # A VP given another modelo, or a vehicle moved to another VP, moves the
+    # stock entries involved to the other modelo
+    if not raw:
+        move_stock_modelo(sender, instance.pk, getattr(instance, "_modelo_before", None))
+
+
+@receiver(post_save, sender=VP)
+@receiver(post_delete, sender=VP)
+def retire_cached_vps(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_vp_cache)
+
+
+@receiver(post_delete, sender=ImportJob)
+def delete_plan_file(sender, instance, **kwargs):
+    # The plan of a discarded dry run would otherwise stay in the media storage
+    if instance.plan_file:
+        plan_file = instance.plan_file
+        transaction.on_commit(lambda: plan_file.delete(save=False))
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Once per connection object: it can reconnect, e.g. after a health check
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,202 @@
+import datetime
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .models import OCFStock, StockSummary, VP, Vehicle
+
+# Dashboard dimension -> OCFStock field it counts entries by
+SUMMARY_DIMENSIONS = {
+    "sold": "sold",
+    "produced": "produced",
+    "has_client": "has_client",
+    "distributor": "distributor",
+    "channel": "channel",
+    "location": "location",
+    "modelo": "vehicle__vp__modelo",
+    # Filled from order_date by the importer
+    "order_week": "order_week",
+    # Counted per day, bucketed by age when the dashboard is read
+    "location_date": "location_date",
+}
+# Days since location_date: (label, last day of the bucket), the last one is open
+AGEING_BUCKETS = [("0-30", 30), ("31-60", 60), ("61-90", 90), ("91-180", 180), ("180+", None)]
+# Bars per chart, the remaining values are added up as "Other"
+DASHBOARD_TOP = 15
+# Field of VP / Vehicle holding the modelo their stock entries are counted
+# under, and the OCFStock lookup to those entries
+MODELO_FIELDS = {VP: "modelo", Vehicle: "vp__modelo"}
+MODELO_STOCK = {VP: "vehicle__vp", Vehicle: "vehicle"}
+
+
+def summary_value(value):
+    return "" if value is None else str(value)
+
+
+def lock_stock_summary(summary_model=StockSummary):
+    """
+    Lock the summary table against writes until the transaction ends. Taken
+    by rebuilds, so counts added by concurrent saves and imports are neither
+    lost nor duplicated; reads go on.
+    """
+    table = connection.ops.quote_name(summary_model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+
+
+def rebuild_stock_summary(dimensions=None):
+    """
+    Recount ``dimensions`` (all of them by default) from the stock table.
+
+    Counts and writes in one transaction holding lock_stock_summary: writers
+    that changed the stock before it are committed and counted, later ones
+    wait and add their changes to the new counts. Readers keep seeing the
+    previous counts until the new ones are committed.
+    """
+    dimensions = dimensions or list(SUMMARY_DIMENSIONS)
+    with transaction.atomic():
+        lock_stock_summary()
+        counts = Counter()
+        for dimension in dimensions:
+            grouped = OCFStock.objects.values_list(SUMMARY_DIMENSIONS[dimension]).annotate(n=Count("pk")).order_by()
+            for value, n in grouped:
+                # None and "" are both stored as ""
+                counts[dimension, summary_value(value)] += n
+        StockSummary.objects.filter(dimension__in=dimensions).delete()
+        StockSummary.objects.bulk_create(
+            StockSummary(dimension=dimension, value=value, count=n) for (dimension, value), n in counts.items()
+        )
+
+
+def stock_summary_values(pk):
+    """Dimension -> summary value of one OCF entry as stored, or None if there is no such entry."""
+    row = OCFStock.objects.filter(pk=pk).values_list(*SUMMARY_DIMENSIONS.values()).first()
+    return None if row is None else dict(zip(SUMMARY_DIMENSIONS, map(summary_value, row)))
+
+
+def _add(dimension, value, delta):
+    rows = StockSummary.objects.filter(dimension=dimension, value=value)
+    if not rows.update(count=F("count") + delta):
+        # First entry with this value; another save may be creating it too
+        StockSummary.objects.bulk_create([StockSummary(dimension=dimension, value=value)], ignore_conflicts=True)
+        rows.update(count=F("count") + delta)
+
+
+def stock_summary_counts(queryset):
+    """(dimension, summary value) -> number of the OCF entries of ``queryset``, in one grouped query."""
+    counts = Counter()
+    grouped = queryset.values_list(*SUMMARY_DIMENSIONS.values()).annotate(n=Count("pk")).order_by()
+    for *values, n in grouped:
+        for dimension, value in zip(SUMMARY_DIMENSIONS, values):
+            counts[dimension, summary_value(value)] += n
+    return counts
+
+
+def apply_stock_summary_counts(before, after):
+    """
+    Add to the summary what a bulk write changed: ``before`` and ``after``
+    are stock_summary_counts of the entries it touched, read in its
+    transaction with those entries locked.
+    """
+    # In a fixed order, so concurrent batches lock the summary rows alike
+    for dimension, value in sorted(before.keys() | after.keys()):
+        delta = after[dimension, value] - before[dimension, value]
+        if delta:
+            _add(dimension, value, delta)
+
+
+def adjust_stock_summary(before, after):
+    """
+    Move one entry from the ``before`` values to the ``after`` values (see
+    stock_summary_values), touching only the dimensions that changed. Either
+    side is None for an entry that is created or deleted.
+    """
+    for dimension in SUMMARY_DIMENSIONS:
+        if before and after and before[dimension] == after[dimension]:
+            continue
+        if before:
+            _add(dimension, before[dimension], -1)
+        if after:
+            _add(dimension, after[dimension], 1)
+
+
+def stock_modelo(model, pk):
+    """Modelo the stock entries of a VP or Vehicle are counted under, as a summary value; None if there is no such row."""
+    if pk is None:
+        return None
+    row = model.objects.filter(pk=pk).values_list(MODELO_FIELDS[model]).first()
+    return None if row is None else summary_value(row[0])
+
+
+def move_stock_modelo(model, pk, before):
+    """
+    Move the stock entries of a saved VP or Vehicle from modelo ``before``
+    (stock_modelo read before the save) to its current modelo.
+    """
+    after = stock_modelo(model, pk)
+    if before is None or after == before:
+        return
+    entries = OCFStock.objects.filter(**{MODELO_STOCK[model]: pk}).count()
+    if entries:
+        _add("modelo", before, -entries)
+        _add("modelo", after, entries)
+
+
+def _ranked(counts, limit=DASHBOARD_TOP):
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    rows = [(value or _("(none)"), count) for value, count in ranked[:limit]]
+    if len(ranked) > limit:
+        rows.append((_("Other"), sum(count for _value, count in ranked[limit:])))
+    return rows
+
+
+def _ageing(counts, today):
+    buckets = Counter()
+    for value, count in counts.items():
+        if not value:
+            buckets[_("No date")] += count
+            continue
+        days = (today - datetime.date.fromisoformat(value)).days
+        label = next(label for label, last in AGEING_BUCKETS if last is None or days <= last)
+        buckets[label] += count
+    labels = [label for label, _last in AGEING_BUCKETS] + [_("No date")]
+    return [(label, buckets[label]) for label in labels]
+
+
+def _dashboard(rows, today):
+    counts = defaultdict(dict)
+    for dimension, value, count in rows:
+        counts[dimension][value] = count
+    total = sum(counts["sold"].values())
+    return {
+        "total": total,
+        "flags": [
+            (_("Sold"), counts["sold"].get("True", 0)),
+            (_("Produced"), counts["produced"].get("True", 0)),
+            (_("Has Client"), counts["has_client"].get("True", 0)),
+        ],
+        "distributor": _ranked(counts["distributor"]),
+        "channel": _ranked(counts["channel"]),
+        "location": _ranked(counts["location"]),
+        "modelo": _ranked(counts["modelo"]),
+        "order_week": sorted(
+            ((int(week), count) for week, count in counts["order_week"].items() if week),
+        ),
+        "ageing": _ageing(counts["location_date"], today or timezone.localdate()),
+    }
+
+
+def _summary_rows():
+    return StockSummary.objects.filter(count__gt=0).values_list("dimension", "value", "count")
+
+
+def stock_dashboard(today=None):
+    """Dashboard figures from the summary table: one query, whatever the size of the stock."""
+    return _dashboard(_summary_rows(), today)
+
+
+async def astock_dashboard(today=None):
+    return _dashboard([row async for row in _summary_rows()], today)
@@ -0,0 +1,29 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """
+    TestCase mixin to catch N+1 queries: a page must run the same number of
+    queries whether it shows one row or many.
+    """
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertConstantQueries(self, url, add_rows, sizes=(1, 10)):
+        """
+        For each ``n`` in ``sizes``, call ``add_rows(n)`` to create ``n`` more
+        rows, render ``url`` and assert that all query counts match.
+        """
+        counts = []
+        for size in sizes:
+            add_rows(size)
+            counts.append(self.count_queries(url))
+        self.assertEqual(
+            len(set(counts)), 1,
+            f"{url} ran {', '.join(map(str, counts))} queries for {', '.join(map(str, sizes))} rows",
+        )
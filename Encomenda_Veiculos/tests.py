@@ -1,3 +1,937 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import shutil
+import tempfile
+from itertools import count
 
-# Create your tests here.
+import openpyxl
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.signals import request_finished
+from django.db import IntegrityError, close_old_connections, transaction
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .autocomplete import AUTOCOMPLETE_LIMIT
+from .benchmarks import benchmark_stock_import, changed_stock_frame, synthetic_stock_frame, write_stock_file
+from .client_links import normalise_client_name, resolve_stock_clients
+from .importers import (
+    CLIENT_COLUMNS,
+    STOCK_COLUMNS,
+    StockFileReader,
+    StockImportResult,
+    StockSources,
+    _nif,
+    _phone,
+    _postal_code,
+    dump_stock_rows,
+    import_client_chunks,
+    import_stock_chunks,
+    import_stock_dataframe,
+    import_valid_rows,
+    load_stock_rows,
+    validate_stock_frame,
+)
+from .jobs import run_import_job
+from .metrics import request_stats
+from .middleware import RequestMetricsMiddleware
+from .models import (
+    Client, ClientContact, ImportJob, ImportJobFile, ImportRowIssue, InternalTransport, OCFStock, Salesperson,
+    StockSummary, VP, Vehicle,
+)
+from .summary import rebuild_stock_summary
+from .testing import QueryCountMixin
+from .vp_cache import get_vp, get_vp_by_code, invalidate_vp_cache
+
+
+class ListQueryCountTests(QueryCountMixin, TestCase):
+    """Every list and import page runs as many queries for ten more rows as for one."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tester", password="secret")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.numbers = count(1)
+
+    def add_vehicles(self, n):
+        """``n`` vehicles, each with a VP of its own so a per-row VP lookup would show."""
+        numbers = [next(self.numbers) for _ in range(n)]
+        vps = VP.objects.bulk_create(VP(vp_code=f"VP{number:05d}") for number in numbers)
+        return Vehicle.objects.bulk_create(Vehicle(van=number, vp=vp) for number, vp in zip(numbers, vps))
+
+    def add_clients(self, n):
+        return Client.objects.bulk_create(
+            Client(code=f"C{number}", name=f"Client {number}") for number in (next(self.numbers) for _ in range(n))
+        )
+
+    def add_users(self, n):
+        User = get_user_model()
+        return User.objects.bulk_create(
+            User(username=f"user{number}", first_name="User", last_name=str(number))
+            for number in (next(self.numbers) for _ in range(n))
+        )
+
+    def test_client_list(self):
+        self.assertConstantQueries(reverse("Encomenda_Veiculos:client_list"), self.add_clients)
+
+    def test_vp_list(self):
+        def add_rows(n):
+            VP.objects.bulk_create(VP(vp_code=f"VP{next(self.numbers):05d}") for _ in range(n))
+
+        self.assertConstantQueries(reverse("Encomenda_Veiculos:vp_list"), add_rows)
+
+    def test_salesperson_list(self):
+        def add_rows(n):
+            Salesperson.objects.bulk_create(Salesperson(user=user) for user in self.add_users(n))
+
+        self.assertConstantQueries(reverse("Encomenda_Veiculos:salesperson_list"), add_rows)
+
+    def test_clientcontact_list(self):
+        def add_rows(n):
+            ClientContact.objects.bulk_create(
+                ClientContact(client=client, name=f"Contact of {client.name}") for client in self.add_clients(n)
+            )
+
+        self.assertConstantQueries(reverse("Encomenda_Veiculos:clientcontact_list"), add_rows)
+
+    def test_internaltransport_list(self):
+        def add_rows(n):
+            InternalTransport.objects.bulk_create(
+                InternalTransport(vehicle=vehicle, origin="Lisboa") for vehicle in self.add_vehicles(n)
+            )
+
+        self.assertConstantQueries(reverse("Encomenda_Veiculos:internaltransport_list"), add_rows)
+
+    def test_ocfstock_list(self):
+        def add_rows(n):
+            OCFStock.objects.bulk_create(OCFStock(vehicle=vehicle) for vehicle in self.add_vehicles(n))
+
+        self.assertConstantQueries(reverse("Encomenda_Veiculos:ocfstock_list"), add_rows)
+
+    def test_import_hub(self):
+        def add_rows(n):
+            ImportJob.objects.bulk_create(
+                ImportJob(file="imports/stock.xlsx", status=ImportJob.Status.DONE, created_by=user)
+                for user in self.add_users(n)
+            )
+
+        self.assertConstantQueries(reverse("Encomenda_Veiculos:import_hub"), add_rows)
+
+    def test_import_job_pages(self):
+        preview = ImportJob.objects.create(file="imports/stock.xlsx", dry_run=True, status=ImportJob.Status.DONE)
+        job = ImportJob.objects.create(file="imports/stock.xlsx", preview=preview, created_by=self.user)
+
+        def add_rows(n):
+            ImportJobFile.objects.bulk_create(ImportJobFile(job=job, file=f"imports/extra{next(self.numbers)}.xlsx") for _ in range(n))
+            # Half on the dry run, whose issues the commit shows as well
+            ImportRowIssue.objects.bulk_create(
+                ImportRowIssue(
+                    job=preview if number % 2 else job, kind=ImportRowIssue.Kind.INVALID,
+                    source="stock.xlsx", row=number, column="VAN Testo", value="x", reason="Invalid value",
+                )
+                for number in (next(self.numbers) for _ in range(n))
+            )
+
+        for name in ("import_job_detail", "import_job_issues"):
+            with self.subTest(name):
+                self.assertConstantQueries(reverse(f"Encomenda_Veiculos:{name}", args=[job.pk]), add_rows)
+
+
+class RequestMetricsTests(TestCase):
+    """Streamed responses are recorded once their body is sent, with the queries producing it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tester", password="secret")
+        vps = VP.objects.bulk_create(VP(vp_code=f"VP{number}") for number in range(3))
+        vehicles = Vehicle.objects.bulk_create(Vehicle(van=number, vp=vp) for number, vp in enumerate(vps, 1))
+        OCFStock.objects.bulk_create(OCFStock(vehicle=vehicle) for vehicle in vehicles)
+
+    def setUp(self):
+        request_stats.clear()
+
+    def export_record(self, logs):
+        records = [json.loads(record.getMessage()) for record in logs.records]
+        return next(record for record in records if record["view"] == "Encomenda_Veiculos:ocfstock_export")
+
+    def assertStreamRecorded(self, record, body):
+        self.assertEqual(record["size"], len(body))
+        # The session and the user are read before the view returns, the
+        # rows while the body is sent
+        self.assertEqual(record["queries"], 3)
+
+    def test_streamed_export(self):
+        self.client.force_login(self.user)
+        with self.assertLogs("Encomenda_Veiculos.metrics", "INFO") as logs:
+            response = self.client.get(reverse("Encomenda_Veiculos:ocfstock_export"))
+            self.assertFalse(request_stats.summary())
+            body = b"".join(response.streaming_content)
+        self.assertStreamRecorded(self.export_record(logs), body)
+        self.assertEqual(request_stats.summary()["Encomenda_Veiculos:ocfstock_export"]["count"], 1)
+
+    def test_stream_closed_early(self):
+        # Straight through the middleware: the test client's own wrapper
+        # would reconnect close_old_connections while the response closes
+        middleware = RequestMetricsMiddleware(lambda request: StreamingHttpResponse(iter([b"first\n", b"second\n"])))
+        response = middleware(RequestFactory().get("/export/"))
+        # Closing the response must not close the test's connection
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+        with self.assertLogs("Encomenda_Veiculos.metrics", "INFO") as logs:
+            first = next(iter(response))
+            # The client went away
+            response.close()
+        [record] = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual(record["size"], len(first))
+        self.assertEqual(request_stats.summary()["(unresolved)"]["count"], 1)
+
+    async def test_async_streamed_export(self):
+        await self.async_client.aforce_login(self.user)
+        with self.assertLogs("Encomenda_Veiculos.metrics", "INFO") as logs:
+            response = await self.async_client.get(reverse("Encomenda_Veiculos:ocfstock_export"))
+            body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertStreamRecorded(self.export_record(logs), body)
+
+
+class OCFStockSearchTests(TestCase):
+    """The JSON search of the OCF stock: the list filters, paged with cursors."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tester", password="secret")
+        daily = VP.objects.create(vp_code="VP1", modelo="Daily")
+        ducato = VP.objects.create(vp_code="VP2", modelo="Ducato")
+        for van in range(1, 8):
+            vehicle = Vehicle.objects.create(van=van, vp=daily if van % 2 else ducato)
+            OCFStock.objects.create(vehicle=vehicle, sold=van > 4)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def search(self, **params):
+        response = self.client.get(reverse("Encomenda_Veiculos:ocfstock_search"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_filters_and_cursors(self):
+        page = self.search(modelo="Daily", page_size=2)
+        self.assertEqual(len(page["results"]), 2)
+        self.assertIsNone(page["previous"])
+        vans = [row["van"] for row in page["results"]]
+        while page["next"]:
+            page = self.search(modelo="Daily", page_size=2, after=page["next"])
+            vans += [row["van"] for row in page["results"]]
+        self.assertEqual(sorted(vans), [1, 3, 5, 7])
+        self.assertIsNotNone(page["previous"])
+
+        rows = self.search(modelo="Daily", sold="false")["results"]
+        self.assertEqual(sorted(row["van"] for row in rows), [1, 3])
+        self.assertEqual({(row["vp_code"], row["modelo"], row["sold"]) for row in rows}, {("VP1", "Daily", False)})
+
+    def test_invalid_filter(self):
+        response = self.client.get(reverse("Encomenda_Veiculos:ocfstock_search"), {"order_date_from": "not a date"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("order_date_from", response.json()["errors"])
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(reverse("Encomenda_Veiculos:ocfstock_search"))
+        self.assertEqual(response.status_code, 302)
+
+
+class GlobalSearchTests(TestCase):
+    """The trigram search across vehicles, OCF stock, clients and VPs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tester", password="secret")
+        cls.silva = Client.objects.create(code="C1", name="Transportes Silva", nif="501234567")
+        Client.objects.create(code="C2", name="Silvas Lda")
+        vp = VP.objects.create(vp_code="VP1", modelo="Daily")
+        OCFStock.objects.create(vehicle=Vehicle.objects.create(van=1, vp=vp, vin="ZCF00000000000001"), client_name="Silva")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def search(self, query):
+        response = self.client.get(reverse("Encomenda_Veiculos:search"), {"q": query, "format": "json"})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_ranked_hits(self):
+        hits = self.search(" silva ")
+        self.assertEqual({hit["kind"] for hit in hits}, {"client", "ocf"})
+        # Whole-word matches first
+        self.assertEqual([hit["score"] for hit in hits[:2]], [1.0, 1.0])
+        self.assertEqual((len(hits), hits[-1]["label"]), (3, "Silvas Lda"))
+        self.assertLess(hits[-1]["score"], 1)
+        self.assertIn(reverse("Encomenda_Veiculos:client_detail", args=[self.silva.pk]), [hit["url"] for hit in hits])
+
+        [hit] = self.search("ZCF00000000000001")
+        self.assertEqual(hit["kind"], "vehicle")
+        self.assertEqual([hit["kind"] for hit in self.search("501234567")], ["client"])
+
+    def test_short_query(self):
+        self.assertEqual(self.search("si"), [])
+
+    def test_page(self):
+        response = self.client.get(reverse("Encomenda_Veiculos:search"), {"q": "daily"})
+        self.assertContains(response, "VP1")
+
+
+class StockExportTests(TestCase):
+    """The CSV and XLSX exports of the OCF stock read back into the same stock."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tester", password="secret")
+
+    def setUp(self):
+        invalidate_vp_cache()
+        self.client.force_login(self.user)
+        self.frame = synthetic_stock_frame(6)
+        import_stock_dataframe(self.frame)
+
+    def export(self, name, **params):
+        response = self.client.get(reverse(f"Encomenda_Veiculos:{name}"), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_exports_import_unchanged(self):
+        for name, file_name in (("ocfstock_export", "stock.csv"), ("ocfstock_export_xlsx", "stock.xlsx")):
+            with self.subTest(name):
+                response, content = self.export(name)
+                self.assertIn(f'filename="stock_{timezone.localdate():%Y%m%d}', response["Content-Disposition"])
+                result = import_stock_chunks(StockFileReader(io.BytesIO(content), file_name))
+                self.assertEqual((result.created, result.updated, result.unchanged, result.errors), (0, 0, 6, 0))
+
+    def test_filtered_export(self):
+        location = self.frame["Ubicazione_Descrizione"].iloc[0]
+        _response, content = self.export("ocfstock_export", location=location)
+        exported = pd.read_csv(io.BytesIO(content), encoding="utf-8-sig")
+        self.assertEqual(
+            sorted(exported["VAN Testo"]),
+            sorted(self.frame.loc[self.frame["Ubicazione_Descrizione"].eq(location), "VAN Testo"]),
+        )
+        self.assertEqual(list(exported.columns)[-1], "Vendedor")
+
+    def test_xlsx_format_and_errors(self):
+        response = self.client.get(reverse("Encomenda_Veiculos:ocfstock_export"), {"format": "xlsx", "sold": "true"})
+        self.assertRedirects(
+            response, f"{reverse('Encomenda_Veiculos:ocfstock_export_xlsx')}?format=xlsx&sold=true",
+            fetch_redirect_response=False,
+        )
+        for name in ("ocfstock_export", "ocfstock_export_xlsx"):
+            response = self.client.get(reverse(f"Encomenda_Veiculos:{name}"), {"order_date_to": "soon"})
+            self.assertEqual(response.status_code, 400)
+
+
+class TransportCalendarTests(TestCase):
+    """The transport calendar loads the transports of one [start, end) window at a time."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tester", password="secret")
+        vehicle = Vehicle.objects.create(van=1, vp=VP.objects.create(vp_code="VP1"))
+        cls.transports = {
+            day: InternalTransport.objects.create(
+                vehicle=vehicle, transport_date=day, origin=origin, destination="Lisboa",
+            )
+            for day, origin in (
+                (datetime.date(2026, 3, 31), "Porto"),
+                (datetime.date(2026, 4, 1), "Porto"),
+                (datetime.date(2026, 4, 15), None),
+                (datetime.date(2026, 4, 30), "Braga"),
+                (datetime.date(2026, 5, 1), "Porto"),
+                (None, "Porto"),
+            )
+        }
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def events(self, **params):
+        return self.client.get(reverse("Encomenda_Veiculos:internaltransport_events"), params)
+
+    def test_window_bounds(self):
+        data = self.events(start="2026-04-01", end="2026-05-01").json()
+        # The start day is in the window, the end day is not
+        self.assertEqual(data["rows"], ["", "Braga", "Porto"])
+        self.assertEqual(
+            data["events"],
+            [
+                [self.transports[datetime.date(2026, 4, 1)].pk, "2026-04-01", 2, 1],
+                [self.transports[datetime.date(2026, 4, 15)].pk, "2026-04-15", 0, 1],
+                [self.transports[datetime.date(2026, 4, 30)].pk, "2026-04-30", 1, 1],
+            ],
+        )
+        data = self.events(start="2026-04-01", end="2026-05-01", group="destination").json()
+        self.assertEqual((data["rows"], {event[2] for event in data["events"]}), (["Lisboa"], {0}))
+
+    def test_invalid_windows(self):
+        for params in (
+            {"start": "2026-04-01", "end": "2026-04-01"},
+            {"start": "2026-04-01", "end": "2027-04-03"},
+            {"start": "2026-04-01"},
+            {"start": "2026-04-01", "end": "2026-05-01", "group": "vehicle"},
+        ):
+            with self.subTest(**params):
+                self.assertEqual(self.events(**params).status_code, 400)
+
+
+class VPCacheTests(TestCase):
+    """VP lookups are served from the cache until a VP is saved or deleted."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tester", password="secret")
+        cls.vp = VP.objects.create(vp_code="VP1")
+        Vehicle.objects.create(van=1, vp=cls.vp)
+
+    def setUp(self):
+        invalidate_vp_cache()
+        self.client.force_login(self.user)
+
+    def test_lookups_cached(self):
+        self.assertEqual(get_vp(self.vp.pk).vp_code, "VP1")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_vp(self.vp.pk).vp_code, "VP1")
+            self.assertEqual(get_vp_by_code("VP1").pk, self.vp.pk)
+
+    def test_saved_vp_retired(self):
+        # The importer looks VPs up by code, Vehicle.__str__ by id
+        self.assertEqual(get_vp_by_code("VP1"), self.vp)
+        self.assertEqual(str(Vehicle.objects.get(van=1)), "VAN 1 @ VP1")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("Encomenda_Veiculos:vp_update", args=[self.vp.pk]),
+                {"vp_code": "VP9", "updated_at": "2026-10-17 10:00:00"},
+            )
+        self.assertRedirects(response, reverse("Encomenda_Veiculos:vp_list"), fetch_redirect_response=False)
+        self.assertEqual(str(Vehicle.objects.get(van=1)), "VAN 1 @ VP9")
+        self.assertIsNone(get_vp_by_code("VP1"))
+        self.assertEqual(get_vp_by_code("VP9").pk, self.vp.pk)
+
+    def test_deleted_vp_retired(self):
+        pk = VP.objects.create(vp_code="VP2").pk
+        self.assertEqual(get_vp(pk).vp_code, "VP2")
+        with self.captureOnCommitCallbacks(execute=True):
+            VP.objects.get(pk=pk).delete()
+        self.assertIsNone(get_vp(pk))
+        self.assertIsNone(get_vp_by_code("VP2"))
+
+
+class AutocompleteTests(TestCase):
+    """Options of the autocomplete selects: prefix matches, ordered and limited."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tester", password="secret")
+        cls.vp = VP.objects.create(vp_code="VP1", modelo="Daily", version="35S")
+        VP.objects.create(vp_code="XP2", modelo="Ducato")
+        for van in (123, 12, 45):
+            Vehicle.objects.create(van=van, vp=cls.vp, vin=f"ZCF{van:014d}")
+        Client.objects.bulk_create(Client(code=f"C{number}", name=f"Acme {number:02d}") for number in range(25))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def options(self, kind, query=""):
+        response = self.client.get(reverse("Encomenda_Veiculos:autocomplete", args=[kind]), {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [(option["id"], option["text"]) for option in response.json()["results"]]
+
+    def test_prefix_matches(self):
+        self.assertEqual([text for _pk, text in self.options("vehicle", "12")], ["VAN 12 @ VP1", "VAN 123 @ VP1"])
+        self.assertEqual([text for _pk, text in self.options("vehicle", "zcf00000000000045")], ["VAN 45 @ VP1"])
+        # Any of the fields, case-insensitive, from the start only
+        self.assertEqual(self.options("vp", "dai"), [(self.vp.pk, "VP1 · Daily · 35S")])
+        self.assertEqual(self.options("vp", "aily"), [])
+        self.assertEqual([text for _pk, text in self.options("user", "TEST")], ["tester"])
+
+    def test_limit_and_order(self):
+        texts = [text for _pk, text in self.options("client", " acme ")]
+        self.assertEqual(texts, [f"Acme {number:02d}" for number in range(AUTOCOMPLETE_LIMIT)])
+
+    def test_unknown_kind(self):
+        response = self.client.get(reverse("Encomenda_Veiculos:autocomplete", args=["ocfstock"]))
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncViewTests(TestCase):
+    """The async views under ASGI: no lazy query reaches the event loop."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user("tester", password="secret")
+        cls.salesperson = Salesperson.objects.create(
+            user=User.objects.create_user("maria", first_name="Maria", last_name="Sousa"),
+        )
+        cls.acme = Client.objects.create(code="C1", name="Acme Lda")
+        vp = VP.objects.create(vp_code="VP1", modelo="Daily")
+        OCFStock.objects.create(
+            vehicle=Vehicle.objects.create(van=1, vp=vp), salesperson=cls.salesperson, client=cls.acme, sold=True,
+        )
+        OCFStock.objects.create(vehicle=Vehicle.objects.create(van=2, vp=vp))
+
+    def setUp(self):
+        self.async_client.force_login(self.user)
+
+    async def test_stock_list_with_selected_filters(self):
+        response = await self.async_client.get(
+            reverse("Encomenda_Veiculos:ocfstock_list"), {"salesperson": self.salesperson.pk, "client": self.acme.pk},
+        )
+        # The selected options are labelled from the lookups of ais_valid()
+        self.assertContains(response, "Maria Sousa")
+        self.assertContains(response, "Acme Lda")
+        self.assertEqual([str(ocf.vehicle) for ocf in response.context["object_list"]], ["VAN 1 @ VP1"])
+
+    async def test_search_and_dashboard(self):
+        response = await self.async_client.get(reverse("Encomenda_Veiculos:ocfstock_search"), {"sold": "true"})
+        self.assertEqual([(row["van"], row["salesperson"]) for row in response.json()["results"]], [(1, "maria")])
+        response = await self.async_client.get(reverse("Encomenda_Veiculos:search"), {"q": "acme"})
+        self.assertContains(response, "Acme Lda")
+        response = await self.async_client.get(reverse("Encomenda_Veiculos:dashboard"))
+        self.assertEqual(response.context["dashboard"]["total"], 2)
+
+    async def test_export_streams_asynchronously(self):
+        response = await self.async_client.get(reverse("Encomenda_Veiculos:ocfstock_export"), {"sold": "true"})
+        self.assertTrue(response.is_async)
+        lines = b"".join([chunk async for chunk in response.streaming_content]).decode("utf-8-sig").splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith("1,"))
+
+    async def test_login_required(self):
+        await self.async_client.alogout()
+        response = await self.async_client.get(reverse("Encomenda_Veiculos:ocfstock_list"))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response["Location"].startswith(reverse("Encomenda_Veiculos:login")))
+
+
+class StockImportTests(TestCase):
+    """Counters and update policies of stock re-imports."""
+
+    def setUp(self):
+        # The VP cache outlives the rolled back rows of earlier tests
+        invalidate_vp_cache()
+
+    def test_upsert_counters(self):
+        frame = synthetic_stock_frame(20)
+        result = import_stock_dataframe(frame)
+        # A new VAN creates its vehicle and its OCF entry
+        self.assertEqual((result.created, result.updated, result.unchanged), (40, 0, 0))
+        self.assertEqual((Vehicle.objects.count(), OCFStock.objects.count()), (20, 20))
+
+        result = import_stock_dataframe(frame)
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 0, 20))
+
+        reimport = pd.concat([changed_stock_frame(frame.iloc[:5]), frame.iloc[5:], synthetic_stock_frame(3, first_van=21, seed=1)])
+        result = import_stock_dataframe(reimport)
+        self.assertEqual((result.created, result.updated, result.unchanged), (6, 5, 15))
+        self.assertEqual(OCFStock.objects.count(), 23)
+
+    def test_repeated_van_collapses_to_one_entry(self):
+        frame = synthetic_stock_frame(1)
+        result = import_stock_dataframe(pd.concat([frame, changed_stock_frame(frame)], ignore_index=True))
+        self.assertEqual((result.created, result.updated), (2, 1))
+        # Stato Produttivo is OVERWRITE: the last row wins
+        self.assertEqual(OCFStock.objects.get().produced, changed_stock_frame(frame)["Stato Produttivo"].iloc[0] == "Produced")
+
+    def test_update_policies(self):
+        frame = synthetic_stock_frame(2)
+        import_stock_dataframe(frame)
+        stored = {entry.vehicle_id: entry for entry in OCFStock.objects.all()}
+
+        changed = changed_stock_frame(frame)
+        changed.loc[1, "Stato Produttivo"] = None
+        result = import_stock_dataframe(changed)
+        entries = {entry.vehicle_id: entry for entry in OCFStock.objects.all()}
+
+        # OVERWRITE takes the new value, but never an empty one
+        self.assertEqual(entries[1].produced, not stored[1].produced)
+        self.assertEqual(entries[2].produced, stored[2].produced)
+        # NEVER keeps the stored value: a row changing nothing else is unchanged
+        self.assertEqual(
+            {van: entry.location for van, entry in entries.items()}, {van: entry.location for van, entry in stored.items()},
+        )
+        self.assertEqual((result.updated, result.unchanged), (1, 1))
+
+        with override_settings(STOCK_IMPORT_UPDATE_POLICIES={"ocf.location": "overwrite"}):
+            import_stock_dataframe(changed)
+        self.assertEqual(
+            sorted(OCFStock.objects.values_list("location", flat=True)),
+            sorted(changed["Ubicazione_Descrizione"]),
+        )
+
+    def test_rejected_rows(self):
+        frame = synthetic_stock_frame(5)
+        frame["VAN Testo"] = frame["VAN Testo"].astype(object)
+        frame.loc[0, "VAN Testo"] = None
+        frame.loc[1, "VAN Testo"] = 2.5
+        frame.loc[2, "VP Codice"] = None
+        frame.loc[3, "OCF Data Giorno"] = "not a date"
+
+        result = import_stock_dataframe(frame)
+        self.assertEqual((result.created, result.skipped, result.errors), (2, 3, 1))
+        self.assertEqual(result.invalid_cells, {"OCF Data Giorno": [3]})
+        self.assertEqual(
+            sorted((issue["row"], issue["kind"]) for issue in result.issues),
+            [(0, "skipped"), (1, "skipped"), (2, "skipped"), (3, "invalid")],
+        )
+        self.assertEqual(list(Vehicle.objects.values_list("van", flat=True)), [5])
+
+
+    def test_sheets_merged_as_one_import(self):
+        milano = synthetic_stock_frame(3)
+        torino = pd.concat(
+            [changed_stock_frame(milano.iloc[2:]), synthetic_stock_frame(2, first_van=4, seed=1)], ignore_index=True,
+        )
+        torino.loc[2, "VP Codice"] = None
+        workbook = openpyxl.Workbook(write_only=True)
+        workbook.create_sheet("Notes").append(["Stock of the week"])
+        for name, frame in (("Milano", milano), ("Torino", torino)):
+            sheet = workbook.create_sheet(name)
+            sheet.append(list(frame.columns))
+            for row in frame.astype(object).where(frame.notna(), None).itertuples(index=False):
+                sheet.append(row)
+        content = io.BytesIO()
+        workbook.save(content)
+
+        # In this process: the merge is the same whatever the number of workers
+        typed, result, processed = StockSources([("stock.xlsx", content.getvalue())], workers=1).validate()
+        # The cover sheet has no VAN column and is left out
+        self.assertEqual((len(typed), processed), (5, 6))
+        self.assertEqual(
+            [(issue["source"], issue["row"], issue["kind"]) for issue in result.issues],
+            [("stock.xlsx [Torino]", 2, "skipped")],
+        )
+
+        result = import_valid_rows(typed, result)
+        # VAN 3 is in both sheets: created once, then updated by Torino's row
+        self.assertEqual((result.created, result.updated, result.skipped), (8, 1, 1))
+        self.assertEqual(sorted(Vehicle.objects.values_list("van", flat=True)), [1, 2, 3, 4])
+        # Sheets merge in workbook order: the first row keeps its location
+        # (NEVER), the last one sets the production state (OVERWRITE)
+        entry = OCFStock.objects.get(vehicle=3)
+        self.assertEqual(entry.location, milano["Ubicazione_Descrizione"].iloc[2])
+        self.assertEqual(entry.produced, torino["Stato Produttivo"].iloc[0] == "Produced")
+
+
+class StockSummaryTests(TestCase):
+    """The dashboard counts kept by imports and saves are those a rebuild finds."""
+
+    def setUp(self):
+        invalidate_vp_cache()
+
+    def summary(self):
+        return {(row.dimension, row.value): row.count for row in StockSummary.objects.filter(count__gt=0)}
+
+    def assertSummaryCurrent(self):
+        kept = self.summary()
+        rebuild_stock_summary()
+        self.assertEqual(kept, self.summary())
+
+    def test_summary_follows_the_stock(self):
+        frame = synthetic_stock_frame(20)
+        import_stock_dataframe(frame)
+        self.assertTrue(self.summary())
+        self.assertSummaryCurrent()
+
+        import_stock_dataframe(pd.concat([changed_stock_frame(frame.iloc[:5]), synthetic_stock_frame(3, first_van=21, seed=1)]))
+        self.assertSummaryCurrent()
+
+        entry, deleted = OCFStock.objects.order_by("pk")[:2]
+        entry.sold = not entry.sold
+        entry.location = "Elsewhere"
+        entry.save()
+        self.assertSummaryCurrent()
+        deleted.delete()
+        self.assertSummaryCurrent()
+
+        first, second = VP.objects.filter(vehicles__isnull=False).distinct().order_by("pk")[:2]
+        first.modelo = "Daily 35S"
+        first.save()
+        self.assertSummaryCurrent()
+        second.modelo = "Ducato 35C"
+        second.save()
+        vehicle = Vehicle.objects.filter(vp=first, ocf_entry__isnull=False).first()
+        vehicle.vp = second
+        vehicle.save()
+        self.assertSummaryCurrent()
+        self.assertEqual(self.summary()["modelo", "Ducato 35C"], OCFStock.objects.filter(vehicle__vp=second).count())
+
+
+class ClientCodeTests(TestCase):
+    def test_codes_are_unique_unless_blank(self):
+        Client.objects.create(code="C1", name="ACME")
+        Client.objects.create(code="", name="Added by hand")
+        Client.objects.create(code="", name="Added by hand too")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Client.objects.create(code="C1", name="ACME again")
+
+
+class ClientImportTests(TestCase):
+    """Client exports: normalised values, matching by code or NIF, NIF conflicts and likely duplicates."""
+
+    def import_clients(self, *rows):
+        return import_client_chunks([pd.DataFrame(list(rows), columns=list(CLIENT_COLUMNS))])
+
+    def issues(self, result):
+        return sorted((issue["row"], issue["kind"], issue["reason"]) for issue in result.issues)
+
+    def normalised(self, normaliser, values):
+        series = normaliser(pd.Series(values, dtype=object))
+        # Empty values come back as NaN, made None when the frame is typed
+        return series.astype(object).where(series.notna(), None).tolist()
+
+    def test_normalisers(self):
+        self.assertEqual(
+            self.normalised(_nif, ["PT 501 234 567", "501.234.567", 501234567.0, "PT", None]),
+            ["501234567", "501234567", "501234567", None, None],
+        )
+        self.assertEqual(
+            self.normalised(_postal_code, ["1000-001", "1000 001", "1000001", "1000-001 LISBOA", "Lisboa"]),
+            ["1000-001"] * 4 + [None],
+        )
+        self.assertEqual(
+            self.normalised(_phone, ["00351 912 345 678 / 213 456 789", "(+351) 213-456-789; 912", 912345678.0, "-"]),
+            ["+351912345678", "+351213456789", "912345678", None],
+        )
+
+    def test_normalised_values_are_stored(self):
+        self.import_clients({
+            "Cliente_Codice": 12345.0, "Cliente_Nome": "  ACME   Lda ", "NIF": "PT 501 234 567",
+            "Cod_Postal": "1000 001 LISBOA", "Tel_geral": "00351 912 345 678 / 213 456 789",
+            "Mail_geral": "Geral@Acme.pt; vendas@acme.pt",
+        })
+        self.assertEqual(
+            Client.objects.values("code", "name", "nif", "postal_code", "phone", "email").get(),
+            {
+                "code": "12345", "name": "ACME Lda", "nif": "501234567", "postal_code": "1000-001",
+                "phone": "+351912345678", "email": "geral@acme.pt",
+            },
+        )
+
+    def test_matched_by_code_or_nif(self):
+        acme = Client.objects.create(code="C1", name="ACME", nif="501234567")
+        by_hand = Client.objects.create(code="", name="Beta", nif="502345678")
+        result = self.import_clients(
+            # Matched by code
+            {"Cliente_Codice": "C1", "Cliente_Nome": "ACME", "Localidade": "Lisboa"},
+            # No code: matched by NIF
+            {"Cliente_Codice": None, "Cliente_Nome": "Beta", "NIF": "502 345 678", "Localidade": "Porto"},
+            {"Cliente_Codice": "C2", "Cliente_Nome": "Gamma", "NIF": "503456789"},
+        )
+        self.assertEqual((result.created, result.updated, result.errors, result.skipped), (1, 2, 0, 0))
+        acme.refresh_from_db()
+        by_hand.refresh_from_db()
+        self.assertEqual((acme.city, acme.nif), ("Lisboa", "501234567"))
+        # Matching by NIF does not give the client a code
+        self.assertEqual((by_hand.code, by_hand.city), ("", "Porto"))
+        self.assertEqual(Client.objects.get(code="C2").nif, "503456789")
+
+    def test_nif_conflicts(self):
+        Client.objects.create(code="C1", name="ACME", nif="501234567")
+        result = self.import_clients(
+            {"Cliente_Codice": "C2", "Cliente_Nome": "Beta", "NIF": "501234567"},
+            {"Cliente_Codice": "C3", "Cliente_Nome": "Gamma", "NIF": "503456789"},
+            {"Cliente_Codice": "C4", "Cliente_Nome": "Delta", "NIF": "503456789"},
+        )
+        self.assertEqual((result.created, result.errors), (1, 2))
+        self.assertEqual(
+            self.issues(result),
+            [(0, "invalid", "NIF 501234567 belongs to client C1"), (2, "invalid", "NIF 503456789 is also on client C3")],
+        )
+        self.assertEqual(sorted(Client.objects.values_list("code", flat=True)), ["C1", "C3"])
+
+    def test_new_client_without_code_or_name(self):
+        result = self.import_clients(
+            {"Cliente_Codice": None, "Cliente_Nome": "Beta", "NIF": "502345678"},
+            {"Cliente_Codice": "C5", "Cliente_Nome": None},
+            {"Cliente_Codice": None, "Cliente_Nome": "Nobody"},
+        )
+        self.assertEqual((result.created, result.skipped), (0, 3))
+        self.assertEqual(
+            self.issues(result),
+            [
+                (0, "skipped", "New client without a code or name"),
+                (1, "skipped", "New client without a code or name"),
+                (2, "skipped", "Missing or invalid client code/NIF"),
+            ],
+        )
+        self.assertFalse(Client.objects.exists())
+
+    def test_similar_names_flagged_for_review(self):
+        Client.objects.create(code="C1", name="TRANSPORTES SILVA LDA")
+        result = self.import_clients(
+            {"Cliente_Codice": "C2", "Cliente_Nome": "Transportes Silva, Lda"},
+            {"Cliente_Codice": "C3", "Cliente_Nome": "Oficina do Norte"},
+        )
+        self.assertEqual(result.flagged, 1)
+        self.assertEqual(
+            dict(Client.objects.values_list("code", "pending_review")), {"C1": False, "C2": True, "C3": False},
+        )
+        # Unchanged clients are not checked again
+        self.assertEqual(self.import_clients({"Cliente_Codice": "C3", "Cliente_Nome": "Oficina do Norte"}).flagged, 0)
+
+
+class ClientLinkTests(TestCase):
+    """OCF entries flagged client_pending are linked to the client their names give."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Client.objects.create(code="C1", name="Acme Lda", nif="501234567")
+        Client.objects.create(code="C2", name="Acme, Lda.")
+        cls.beta = Client.objects.create(code="C3", name="Beta Transportes SA")
+        cls.gamma = Client.objects.create(code="C4", name="Gamma Unipessoal Lda")
+        cls.vp = VP.objects.create(vp_code="VP1")
+        cls.vans = count(1)
+
+    def entry(self, client_name, client_final=None, client=None, pending=True):
+        vehicle = Vehicle.objects.create(van=next(self.vans), vp=self.vp)
+        return OCFStock.objects.create(
+            vehicle=vehicle, client_name=client_name, client_final=client_final, client=client, client_pending=pending,
+        )
+
+    def assertLinked(self, entry, client):
+        entry.refresh_from_db()
+        self.assertEqual((entry.client, entry.client_pending), (client, False))
+
+    def test_ambiguous_name_is_not_linked(self):
+        self.assertEqual(normalise_client_name("Acme Lda"), normalise_client_name("Acme, Lda."))
+        entry = self.entry("ACME LDA")
+        self.assertEqual(resolve_stock_clients(), (1, 0))
+        self.assertLinked(entry, None)
+
+    def test_nif_in_the_name(self):
+        entry = self.entry("ACME LDA - PT501234567")
+        self.assertEqual(resolve_stock_clients(), (1, 1))
+        self.assertLinked(entry, self.acme)
+
+    def test_falls_back_to_the_final_client(self):
+        entry = self.entry("Stand Desconhecido", client_final="Beta Transportes, S.A.")
+        resolve_stock_clients()
+        self.assertLinked(entry, self.beta)
+
+    def test_only_pending_entries_are_touched(self):
+        settled = self.entry("Gamma Unipessoal", client=self.beta, pending=False)
+        renamed = self.entry("Gamma Unipessoal", client=self.beta)
+        current = self.entry("Gamma Unipessoal", client=self.gamma)
+        self.assertEqual(resolve_stock_clients(chunk_rows=1), (2, 1))
+        self.assertLinked(settled, self.beta)
+        self.assertLinked(renamed, self.gamma)
+        self.assertLinked(current, self.gamma)
+        self.assertEqual(resolve_stock_clients(), (0, 0))
+
+
+class ImportJobTests(TestCase):
+    """A dry run validates and plans an upload; committing it writes exactly that plan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tester", password="secret")
+
+    def setUp(self):
+        invalidate_vp_cache()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.client.force_login(self.user)
+
+    def test_dry_run_then_commit(self):
+        frame = synthetic_stock_frame(10)
+        frame.loc[0, "OCF Data Giorno"] = "not a date"
+        preview = ImportJob.objects.create(
+            file=ContentFile(write_stock_file(frame, "xlsx"), name="stock.xlsx"), dry_run=True, created_by=self.user,
+        )
+
+        run_import_job(preview)
+        preview.refresh_from_db()
+        self.assertEqual(preview.status, ImportJob.Status.DONE, preview.message)
+        self.assertTrue(preview.can_commit)
+        self.assertEqual(preview.report["rows"]["created"], 18)
+        self.assertEqual(preview.report["models"]["vehicle"]["created"], 9)
+        self.assertEqual((preview.error_count, preview.issues.count()), (1, 1))
+        self.assertFalse(Vehicle.objects.exists())
+        plan_name = preview.plan_file.name
+        self.assertTrue(plan_name.endswith(".json.gz"))
+
+        response = self.client.post(reverse("Encomenda_Veiculos:import_job_commit", args=[preview.pk]))
+        self.assertRedirects(response, reverse("Encomenda_Veiculos:import_hub"))
+        job = preview.commits.get()
+        run_import_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.DONE, job.message)
+        self.assertEqual((job.created_count, job.error_count), (18, 1))
+        # The rows rejected by the dry run are reported by the commit as well
+        self.assertEqual([issue.row for issue in job.row_issues], [0])
+        self.assertEqual(Vehicle.objects.count(), 9)
+        # The plan is deleted once committed
+        preview.refresh_from_db()
+        self.assertFalse(preview.plan_file)
+        self.assertFalse(default_storage.exists(plan_name))
+
+        # A dry run is committed once
+        self.client.post(reverse("Encomenda_Veiculos:import_job_commit", args=[preview.pk]))
+        self.assertEqual(preview.commits.count(), 1)
+
+    def test_discarded_dry_run_deletes_its_plan(self):
+        preview = ImportJob.objects.create(
+            file=ContentFile(write_stock_file(synthetic_stock_frame(3), "csv"), name="stock.csv"), dry_run=True,
+        )
+        run_import_job(preview)
+        plan_name = preview.plan_file.name
+        self.assertTrue(default_storage.exists(plan_name))
+        with self.captureOnCommitCallbacks(execute=True):
+            preview.delete()
+        self.assertFalse(default_storage.exists(plan_name))
+
+    def test_plan_rows_round_trip(self):
+        frame = synthetic_stock_frame(20)
+        frame.loc[3, "OCF Data Giorno"] = None
+        typed = pd.concat([validate_stock_frame(frame, StockImportResult())], keys=["stock.xlsx"])
+        pd.testing.assert_frame_equal(load_stock_rows(dump_stock_rows(typed)), typed)
+
+
+class BenchmarkTests(TestCase):
+    """The synthetic exports and the import benchmark of the benchmark_import command."""
+
+    def setUp(self):
+        invalidate_vp_cache()
+
+    def test_synthetic_frame(self):
+        frame = synthetic_stock_frame(50, first_van=101)
+        self.assertEqual(list(frame.columns), list(STOCK_COLUMNS))
+        self.assertEqual(list(frame["VAN Testo"]), list(range(101, 151)))
+        pd.testing.assert_frame_equal(frame, synthetic_stock_frame(50, first_van=101))
+
+    def test_stock_files_read_back(self):
+        frame = synthetic_stock_frame(30)
+        for file_format in ("xlsx", "csv"):
+            with self.subTest(file_format):
+                reader = StockFileReader(io.BytesIO(write_stock_file(frame, file_format)), f"stock.{file_format}")
+                result = StockImportResult()
+                typed = pd.concat(validate_stock_frame(chunk, result) for chunk in reader)
+                self.assertEqual(len(typed), 30)
+                self.assertEqual((result.skipped, result.errors), (0, 0))
+
+    def test_benchmark_stock_import(self):
+        benchmark = benchmark_stock_import(200, new=0.5, changed=0.25, file_format="csv")
+        self.assertEqual((benchmark.new, benchmark.changed, benchmark.unchanged), (100, 50, 50))
+        self.assertEqual(
+            benchmark.result, {"created": 200, "updated": 50, "unchanged": 50, "skipped": 0, "errors": 0},
+        )
+        self.assertEqual(benchmark.transactions, 1)
+        self.assertGreater(benchmark.queries, 0)
+        self.assertGreater(benchmark.rows_per_second, 0)
+        # The command writes the results as JSON
+        json.dumps(benchmark.as_dict())
@@ -7,9 +7,18 @@ urlpatterns = [
     path('login/', views.CustomLoginView.as_view(), name='login'),
     path('logout/', views.CustomLogoutView.as_view(), name='logout'),
     path('stockimport/', views.import_stock, name='import_stock'),
+    path('clientimport/', views.import_clients, name='import_clients'),
     path('imports/', views.import_hub, name='import_hub'),
+    path('imports/<int:pk>/', views.import_job_detail, name='import_job_detail'),
+    path('imports/<int:pk>/commit/', views.import_job_commit, name='import_job_commit'),
+    path('imports/<int:pk>/progress/', views.import_job_progress, name='import_job_progress'),
+    path('imports/<int:pk>/issues/', views.import_job_issues, name='import_job_issues'),
 
     path('', views.home, name='home'),
+    path('dashboard/', views.dashboard, name='dashboard'),
+    path('search/', views.search, name='search'),
+    path('autocomplete/<str:kind>/', views.autocomplete, name='autocomplete'),
+    path('metrics/', views.request_metrics, name='request_metrics'),
     # Client URLs
     path('clients/', views.ClientListView.as_view(), name='client_list'),
     path('clients/<int:pk>/', views.ClientDetailView.as_view(), name='client_detail'),
@@ -25,7 +34,10 @@ urlpatterns = [
     path('vps/<int:pk>/delete/', views.VPDeleteView.as_view(), name='vp_delete'),
 
     # OCFStock URLs
-    path('ocfstocks/', views.OCFStockListView.as_view(), name='ocfstock_list'),
+    path('ocfstocks/', views.ocfstock_list, name='ocfstock_list'),
+    path('ocfstocks/search/', views.ocfstock_search, name='ocfstock_search'),
+    path('ocfstocks/export/', views.ocfstock_export, name='ocfstock_export'),
+    path('ocfstocks/export/xlsx/', views.ocfstock_export_xlsx, name='ocfstock_export_xlsx'),
     path('ocfstocks/<int:pk>/', views.OCFStockDetailView.as_view(), name='ocfstock_detail'),
     path('ocfstocks/create/', views.OCFStockCreateView.as_view(), name='ocfstock_create'),
     path('ocfstocks/<int:pk>/update/', views.OCFStockUpdateView.as_view(), name='ocfstock_update'),
@@ -47,6 +59,8 @@ urlpatterns = [
 
     # InternalTransport URLs
     path('internaltransports/', views.InternalTransportListView.as_view(), name='internaltransport_list'),
+    path('internaltransports/calendar/', views.internaltransport_calendar, name='internaltransport_calendar'),
+    path('internaltransports/calendar/events/', views.internaltransport_events, name='internaltransport_events'),
     path('internaltransports/<int:pk>/', views.InternalTransportDetailView.as_view(), name='internaltransport_detail'),
     path('internaltransports/create/', views.InternalTransportCreateView.as_view(), name='internaltransport_create'),
     path('internaltransports/<int:pk>/update/', views.InternalTransportUpdateView.as_view(), name='internaltransport_update'),
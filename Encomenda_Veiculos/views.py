@@ -1,254 +1,193 @@
-import pandas as pd
+import tempfile
+from functools import wraps
+
+from django.conf import settings
 from django.contrib import messages
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import OCFStock, Client, Vehicle, VP, Salesperson, ClientContact, InternalTransport
-from .forms import OCFStockForm, ClientForm, VehicleForm, VPForm, SalespersonForm, ClientContactForm, InternalTransportForm, ImportFileForm
+from django.utils import timezone
+from .models import OCFStock, Client, VP, Salesperson, ClientContact, InternalTransport, ImportJob, ImportJobFile
+from .search import MIN_QUERY_LENGTH, aglobal_search
+from .autocomplete import AUTOCOMPLETE_SOURCES, aautocomplete_options
+from .exporters import astream_stock_csv, stream_row_issues_csv, stream_stock_csv, write_stock_xlsx
+from .summary import astock_dashboard
+from .metrics import request_stats
+from .pagination import KeysetPaginationMixin, KeysetPaginator, page_size
+from .forms import OCFStockForm, ClientForm, VPForm, SalespersonForm, ClientContactForm, InternalTransportForm, ImportFileForm, ClientImportFileForm, OCFStockFilterForm, TransportWindowForm
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.decorators import method_decorator
-from django.db import transaction
-from .forms import ImportFileForm
+from django.views.decorators.http import require_POST
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rejected rows listed on the import job page, the rest are on its issues page
+ROW_ISSUES_SHOWN = 20
+
+def async_login_required(view):
+    """
+    login_required for async views. The user is loaded with the async API and
+    replaces the lazy request.user, so templates and context processors do
+    not query the database from the event loop.
+    """
+    @login_required
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request.user = await request.auser()
+        return await view(request, *args, **kwargs)
+    return wrapper
+
 @login_required
 def home(request):
     return render(request, 'encomenda_veiculos/home.html')
 
+@staff_member_required
+def request_metrics(request):
+    """Rolling percentiles of the requests this process served, per view."""
+    return JsonResponse({'query_budget': settings.REQUEST_QUERY_BUDGET, 'views': request_stats.summary()})
+
+@async_login_required
+async def autocomplete(request, kind):
+    """Options of the AutocompleteSelect widgets: ?q= prefix matches as {"results": [{id, text}]}."""
+    if kind not in AUTOCOMPLETE_SOURCES:
+        raise Http404
+    options = await aautocomplete_options(kind, request.GET.get('q', ''))
+    return JsonResponse({'results': [{'id': pk, 'text': label} for pk, label in options]})
+
+@async_login_required
+async def dashboard(request):
+    return render(request, 'encomenda_veiculos/dashboard.html', {'dashboard': await astock_dashboard()})
+
+@async_login_required
+async def search(request):
+    query = request.GET.get('q', '').strip()
+    hits = await aglobal_search(query)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'query': query, 'results': hits})
+    return render(request, 'encomenda_veiculos/search.html', {
+        'query': query,
+        'hits': hits,
+        'min_length': MIN_QUERY_LENGTH,
+    })
+
 @login_required
 def import_hub(request):
-    return render(request, 'encomenda_veiculos/import_hub.html')
+    jobs = ImportJob.objects.select_related('created_by')[:20]
+    return render(request, 'encomenda_veiculos/import_hub.html', {'jobs': jobs})
 
 @login_required
 def import_stock(request):
     if request.method == 'POST':
         form = ImportFileForm(request.POST, request.FILES)
         if form.is_valid():
-            try:
-                # Get the uploaded file
-                excel_file = request.FILES['file']
-
-                # Read Excel file into pandas DataFrame
-                df = pd.read_excel(excel_file, sheet_name=0)
-
-                # Optional: Clean column names (remove extra spaces)
-                df.columns = df.columns.str.strip()
-
-                # Counters for tracking imports
-                success_count = 0
-                error_count = 0
-                skipped_count = 0
-                updated_count = 0
-                created_count = 0
-
-                # Use transaction to ensure data consistency
-                with transaction.atomic():
-                    # Iterate through DataFrame rows
-                    for index, row in df.iterrows():
-                        try:
-                            # Extract VAN and VP Code
-                            van_value = row.get('VAN Testo')
-                            vp_code_value = row.get('VP Codice')
-
-                            if pd.isna(van_value) or pd.isna(vp_code_value):
-                                skipped_count += 1
-                                logger.warning(f"Row {index}: Missing VAN or VP Code, skipping")
-                                continue
-
-                            # Convert VAN to integer
-                            try:
-                                van_int = int(van_value)
-                            except (ValueError, TypeError):
-                                skipped_count += 1
-                                logger.warning(f"Row {index}: Invalid VAN value '{van_value}', skipping")
-                                continue
-
-                            # Get or create VP
-                            vp, vp_created = VP.objects.get_or_create(
-                                vp_code=str(vp_code_value),
-                                defaults={
-                                    'variant': row.get('Gruppo Alternativo 1'),
-                                    'version': row.get('Gruppo Alternativo 2'),
-                                    'engine_code': row.get('Motore_V'),
-                                    'gama': row.get('NIC Livello 1'),
-                                    'modelo': row.get('NIC Livello 5'),
-                                    'cabina': row.get('CT - Descrizione estesa codice cabina comfort'),
-                                    'motor': row.get('EP - Descrizione estesa potenza motore'),
-                                    'gearbox': row.get('GT - Descrizione estesa tipo gearbox'),
-                                    'wheelbase': row.get('WB - Descrizione estesa interasse'),
-                                    'hi': row.get('HI - Descrizione estesa compartimento di carico'),
-                                    'color_code_numeric': int(row.get('Colore_Codice (Numerico)')) if pd.notna(
-                                        row.get('Colore_Codice (Numerico)')) else None,
-                                    'color_desc': row.get('Colore_Descrizione Estesa'),
-                                }
-                            )
-
-                            # ============================================================
-                            # UPDATE VP IF EXISTS - Review these fields to update
-                            # ============================================================
-                            if not vp_created:
-                                # TODO: Review which VP fields should be updated
-                                # Currently: NO VP fields are being updated on existing records
-                                # Uncomment below to update specific fields:
-
-                                # vp.variant = row.get('Gruppo Alternativo 1') or vp.variant
-                                # vp.version = row.get('Gruppo Alternativo 2') or vp.version
-                                # vp.engine_code = row.get('Motore_V') or vp.engine_code
-                                # vp.gama = row.get('NIC Livello 1') or vp.gama
-                                # vp.modelo = row.get('NIC Livello 5') or vp.modelo
-                                # vp.cabina = row.get('CT - Descrizione estesa codice cabina comfort') or vp.cabina
-                                # vp.motor = row.get('EP - Descrizione estesa potenza motore') or vp.motor
-                                # vp.gearbox = row.get('GT - Descrizione estesa tipo gearbox') or vp.gearbox
-                                # vp.wheelbase = row.get('WB - Descrizione estesa interasse') or vp.wheelbase
-                                # vp.hi = row.get('HI - Descrizione estesa compartimento di carico') or vp.hi
-                                # vp.color_code_numeric = int(row.get('Colore_Codice (Numerico)')) if pd.notna(row.get('Colore_Codice (Numerico)')) else vp.color_code_numeric
-                                # vp.color_desc = row.get('Colore_Descrizione Estesa') or vp.color_desc
-
-                                # vp.save()
-                                logger.info(f"VP already exists: {vp.vp_code} (no updates)")
-                            # ============================================================
-
-                            # Get or create Vehicle
-                            vehicle, vehicle_created = Vehicle.objects.get_or_create(
-                                van=van_int,
-                                defaults={
-                                    'vin': row.get('VIN_V') if pd.notna(row.get('VIN_V')) else None,
-                                    'country': row.get('Ubicazione_Paese'),
-                                    'vp': vp,
-                                }
-                            )
-
-                            # ============================================================
-                            # UPDATE VEHICLE IF EXISTS - Review these fields to update
-                            # ============================================================
-                            if not vehicle_created:
-                                # TODO: Review which Vehicle fields should be updated
-                                # Currently: Only VP reference is updated on existing vehicles
-
-                                vehicle.vp = vp  # Always update VP reference
-
-                                # Uncomment below to update other fields:
-                                # vehicle.vin = row.get('VIN_V') if pd.notna(row.get('VIN_V')) else vehicle.vin
-                                # vehicle.country = row.get('Ubicazione_Paese') or vehicle.country
-                                # vehicle.plate = ...  # Add if needed
-                                # vehicle.registration_date = ...  # Add if needed
-                                # vehicle.lot = ...  # Add if needed
-                                # vehicle.production_year = ...  # Add if needed
-
-                                vehicle.save()
-                                logger.info(f"Updated Vehicle: VAN {vehicle.van} (VP reference only)")
-                            else:
-                                created_count += 1
-                            # ============================================================
-
-                            # Get or create OCFStock
-                            ocf_stock, ocf_created = OCFStock.objects.get_or_create(
-                                vehicle=vehicle,
-                                defaults={
-                                    'has_client': bool(row.get('Flag NCF Stato')) if pd.notna(
-                                        row.get('Flag NCF Stato')) else False,
-                                    'client_assigned_date': pd.to_datetime(
-                                        row.get('OCF Data Giorno')).date() if pd.notna(
-                                        row.get('OCF Data Giorno')) else None,
-                                    'channel': row.get('Canale Di Vendita_Descrizione'),
-                                    'distributor': row.get('Canale Di Vendita Amministrativo_Descrizione Estesa'),
-                                    'order_date': pd.to_datetime(
-                                        row.get('Ordine Di Vendita Data Giorno')).date() if pd.notna(
-                                        row.get('Ordine Di Vendita Data Giorno')) else None,
-                                    'order_number': int(row.get('Ordine')) if pd.notna(row.get('Ordine')) else None,
-                                    'client_name': row.get('Cliente_Nome'),
-                                    'client_final': row.get('Nome Cliente (Destinatario Merci)'),
-                                    'sold': row.get('Stato Fatturazione') == 'Sold' if pd.notna(
-                                        row.get('Stato Fatturazione')) else False,
-                                    'produced': row.get('Stato Produttivo') == 'Produced' if pd.notna(
-                                        row.get('Stato Produttivo')) else False,
-                                    'delivery_date': pd.to_datetime(
-                                        row.get('Fattura Data Giorno_V')).date() if pd.notna(
-                                        row.get('Fattura Data Giorno_V')) else None,
-                                    'location': row.get('Ubicazione_Descrizione'),
-                                    'location_date': pd.to_datetime(
-                                        row.get('Location Data Giorno_V')).date() if pd.notna(
-                                        row.get('Location Data Giorno_V')) else None,
-                                    'warranty_start': pd.to_datetime(row.get('MAV Data Giorno_V')).date() if pd.notna(
-                                        row.get('MAV Data Giorno_V')) else None,
-                                    'notes': row.get('Elemento di testo'),
-                                }
-                            )
-
-                            # ============================================================
-                            # UPDATE OCFStock IF EXISTS - Review these fields to update
-                            # ============================================================
-                            if not ocf_created:
-                                # TODO: Review which OCFStock fields should be updated
-                                # Currently: ONLY "Stato Produttivo" (produced) field is updated
-
-                                # ===== ACTIVE UPDATE: Stato Produttivo =====
-                                stato_produttivo = row.get('Stato Produttivo')
-                                if pd.notna(stato_produttivo):
-                                    ocf_stock.produced = (stato_produttivo == 'Produced')
-                                    logger.info(f"Updated 'produced' status for VAN {vehicle.van}: {stato_produttivo}")
-                                # ===========================================
-
-                                # Client/Order Information - Uncomment fields to update
-                                # ocf_stock.has_client = bool(row.get('Flag NCF Stato')) if pd.notna(row.get('Flag NCF Stato')) else ocf_stock.has_client
-                                # ocf_stock.client_assigned_date = pd.to_datetime(row.get('OCF Data Giorno')).date() if pd.notna(row.get('OCF Data Giorno')) else ocf_stock.client_assigned_date
-                                # ocf_stock.channel = row.get('Canale Di Vendita_Descrizione') or ocf_stock.channel
-                                # ocf_stock.distributor = row.get('Canale Di Vendita Amministrativo_Descrizione Estesa') or ocf_stock.distributor
-                                # ocf_stock.order_date = pd.to_datetime(row.get('Ordine Di Vendita Data Giorno')).date() if pd.notna(row.get('Ordine Di Vendita Data Giorno')) else ocf_stock.order_date
-                                # ocf_stock.order_number = int(row.get('Ordine')) if pd.notna(row.get('Ordine')) else ocf_stock.order_number
-                                # ocf_stock.client_name = row.get('Cliente_Nome') or ocf_stock.client_name
-                                # ocf_stock.client_final = row.get('Nome Cliente (Destinatario Merci)') or ocf_stock.client_final
-
-                                # Status Fields - Uncomment fields to update
-                                # ocf_stock.sold = row.get('Stato Fatturazione') == 'Sold' if pd.notna(row.get('Stato Fatturazione')) else ocf_stock.sold
-
-                                # Delivery/Location - Uncomment fields to update
-                                # ocf_stock.delivery_date = pd.to_datetime(row.get('Fattura Data Giorno_V')).date() if pd.notna(row.get('Fattura Data Giorno_V')) else ocf_stock.delivery_date
-                                # ocf_stock.location = row.get('Ubicazione_Descrizione') or ocf_stock.location
-                                # ocf_stock.location_date = pd.to_datetime(row.get('Location Data Giorno_V')).date() if pd.notna(row.get('Location Data Giorno_V')) else ocf_stock.location_date
-
-                                # Warranty - Uncomment fields to update
-                                # ocf_stock.warranty_start = pd.to_datetime(row.get('MAV Data Giorno_V')).date() if pd.notna(row.get('MAV Data Giorno_V')) else ocf_stock.warranty_start
-
-                                # Notes - Uncomment fields to update
-                                # ocf_stock.notes = row.get('Elemento di testo') or ocf_stock.notes
-
-                                ocf_stock.save()
-                                updated_count += 1
-                            else:
-                                created_count += 1
-                            # ============================================================
-
-                            success_count += 1
-
-                        except Exception as e:
-                            error_count += 1
-                            logger.error(f"Error importing row {index}: {str(e)}")
-                            continue
-
-                # Success messages
-                if created_count > 0:
-                    messages.success(request, f'Successfully created {created_count} new records.')
-                if updated_count > 0:
-                    messages.info(request, f'Updated {updated_count} existing records (Stato Produttivo only).')
-                if skipped_count > 0:
-                    messages.info(request, f'Skipped {skipped_count} records (missing VAN or VP Code).')
-                if error_count > 0:
-                    messages.warning(request, f'Failed to import {error_count} records. Check logs for details.')
-
-                return redirect(reverse_lazy('Encomenda_Veiculos:home'))
-
-            except Exception as e:
-                logger.error(f"Error processing file: {str(e)}")
-                messages.error(request, f'Error processing file: {str(e)}')
+            # Only store the upload here, the import itself runs in the process_import_jobs worker
+            first, *others = form.cleaned_data['file']
+            # The worker must not claim the job before all of its files are attached
+            with transaction.atomic():
+                job = ImportJob.objects.create(
+                    kind=ImportJob.Kind.STOCK,
+                    file=first,
+                    dry_run=form.cleaned_data['dry_run'],
+                    created_by=request.user,
+                )
+                for other in others:
+                    ImportJobFile.objects.create(job=job, file=other)
+            messages.info(request, f'Import queued as job #{job.pk}.')
+            return redirect(reverse_lazy('Encomenda_Veiculos:import_hub'))
     else:
         form = ImportFileForm()
 
     return render(request, 'encomenda_veiculos/import_data.html', {'form': form})
 
+@login_required
+def import_clients(request):
+    if request.method == 'POST':
+        form = ClientImportFileForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Like stock imports, the upload is processed by the process_import_jobs worker
+            job = ImportJob.objects.create(
+                kind=ImportJob.Kind.CLIENT,
+                file=form.cleaned_data['file'],
+                created_by=request.user,
+            )
+            messages.info(request, f'Client import queued as job #{job.pk}.')
+            return redirect(reverse_lazy('Encomenda_Veiculos:import_hub'))
+    else:
+        form = ClientImportFileForm()
+
+    return render(request, 'encomenda_veiculos/import_data.html', {'form': form})
+
+@login_required
+def import_job_detail(request, pk):
+    job = get_object_or_404(ImportJob.objects.select_related('created_by', 'preview'), pk=pk)
+    return render(request, 'encomenda_veiculos/import_job_detail.html', {
+        'job': job,
+        'issues': job.row_issues[:ROW_ISSUES_SHOWN],
+    })
+
+@login_required
+def import_job_issues(request, pk):
+    """Every row an import rejected, paged, or as a CSV download with ?format=csv."""
+    job = get_object_or_404(ImportJob, pk=pk)
+    if request.GET.get('format') == 'csv':
+        response = StreamingHttpResponse(stream_row_issues_csv(job.row_issues), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="import_{job.pk}_issues.csv"'
+        return response
+    paginator = KeysetPaginator(job.row_issues, ('pk',), page_size(request))
+    page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+    return render(request, 'encomenda_veiculos/import_job_issues.html', {
+        'job': job,
+        'object_list': page.object_list,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+    })
+
+@login_required
+@require_POST
+def import_job_commit(request, pk):
+    with transaction.atomic():
+        # Locked so two submits of the same dry run cannot both find it uncommitted
+        preview = get_object_or_404(ImportJob.objects.select_for_update(), pk=pk)
+        if not preview.can_commit or preview.commits.exists():
+            messages.error(request, f'Job #{preview.pk} is not a finished dry run or was already committed.')
+            return redirect('Encomenda_Veiculos:import_job_detail', pk=preview.pk)
+
+        job = ImportJob.objects.create(
+            kind=preview.kind,
+            file=preview.file.name,
+            preview=preview,
+            created_by=request.user,
+        )
+        ImportJobFile.objects.bulk_create(
+            ImportJobFile(job=job, file=extra.file.name) for extra in preview.extra_files.all()
+        )
+    messages.info(request, f'Import of dry run #{preview.pk} queued as job #{job.pk}.')
+    return redirect(reverse_lazy('Encomenda_Veiculos:import_hub'))
+
+@login_required
+def import_job_progress(request, pk):
+    job = get_object_or_404(ImportJob, pk=pk)
+    return JsonResponse({
+        'id': job.pk,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows,
+        'created': job.created_count,
+        'updated': job.updated_count,
+        'skipped': job.skipped_count,
+        'unchanged': job.unchanged_count,
+        'errors': job.error_count,
+        'elapsed': job.elapsed,
+        'message': job.message,
+    })
+
 class CustomLoginView(LoginView):
     template_name = 'encomenda_veiculos/login.html'
     # You can specify a redirect URL here, but it's better to use LOGIN_REDIRECT_URL in settings.py
@@ -259,9 +198,10 @@ class CustomLogoutView(LogoutView):
 
 # Client Views
 @method_decorator(login_required, name='dispatch')
-class ClientListView(ListView):
+class ClientListView(KeysetPaginationMixin, ListView):
     model = Client
     template_name = 'encomenda_veiculos/client_list.html'
+    queryset = Client.objects.only('name', 'created_at')
 
 @method_decorator(login_required, name='dispatch')
 class ClientDetailView(DetailView):
@@ -290,9 +230,10 @@ class ClientDeleteView(DeleteView):
 
 # VP Views
 @method_decorator(login_required, name='dispatch')
-class VPListView(ListView):
+class VPListView(KeysetPaginationMixin, ListView):
     model = VP
     template_name = 'encomenda_veiculos/vp_list.html'
+    queryset = VP.objects.only('vp_code', 'created_at')
 
 @method_decorator(login_required, name='dispatch')
 class VPDetailView(DetailView):
@@ -320,15 +261,113 @@ class VPDeleteView(DeleteView):
     success_url = reverse_lazy('Encomenda_Veiculos:vp_list')
 
 # OCFStock Views
-@method_decorator(login_required, name='dispatch')
-class OCFStockListView(ListView):
-    model = OCFStock
-    template_name = 'encomenda_veiculos/ocfstock_list.html'
+# Vehicle.__str__ shows the VP code
+OCF_STOCK_LIST_QUERYSET = OCFStock.objects.select_related('vehicle__vp').only('created_at', 'vehicle__van', 'vehicle__vp__vp_code')
+
+@async_login_required
+async def ocfstock_list(request):
+    filter_form = OCFStockFilterForm(request.GET)
+    queryset = filter_form.filter(OCF_STOCK_LIST_QUERYSET) if await filter_form.ais_valid() else OCF_STOCK_LIST_QUERYSET.none()
+    paginator = KeysetPaginator(queryset, KeysetPaginationMixin.keyset_ordering, page_size(request))
+    page = await paginator.apage(after=request.GET.get('after'), before=request.GET.get('before'))
+    # The selected salesperson and client options were looked up by ais_valid()
+    return render(request, 'encomenda_veiculos/ocfstock_list.html', {
+        'object_list': page.object_list,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'filter_form': filter_form,
+    })
+
+@async_login_required
+async def ocfstock_search(request):
+    """JSON version of the filtered OCF stock list, paged with ?after=/?before= cursors."""
+    form = OCFStockFilterForm(request.GET)
+    if not await form.ais_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    queryset = form.filter(
+        OCFStock.objects.select_related('vehicle__vp', 'salesperson__user').only(
+            'created_at', 'sold', 'produced', 'has_client', 'distributor', 'channel', 'location',
+            'order_date', 'delivery_date', 'client_name', 'client_id', 'vehicle__van', 'vehicle__vin',
+            'vehicle__vp__vp_code', 'vehicle__vp__modelo', 'vehicle__vp__version', 'vehicle__vp__gama',
+            'salesperson__user__username',
+        )
+    )
+    paginator = KeysetPaginator(queryset, KeysetPaginationMixin.keyset_ordering, page_size(request))
+    page = await paginator.apage(after=request.GET.get('after'), before=request.GET.get('before'))
+    return JsonResponse({
+        'results': [
+            {
+                'id': ocf.pk,
+                'van': ocf.vehicle.van,
+                'vin': ocf.vehicle.vin,
+                'vp_code': ocf.vehicle.vp.vp_code,
+                'modelo': ocf.vehicle.vp.modelo,
+                'version': ocf.vehicle.vp.version,
+                'gama': ocf.vehicle.vp.gama,
+                'sold': ocf.sold,
+                'produced': ocf.produced,
+                'has_client': ocf.has_client,
+                'client_name': ocf.client_name,
+                'client': ocf.client_id,
+                'distributor': ocf.distributor,
+                'channel': ocf.channel,
+                'location': ocf.location,
+                'salesperson': ocf.salesperson.user.username if ocf.salesperson else None,
+                'order_date': ocf.order_date,
+                'delivery_date': ocf.delivery_date,
+            }
+            for ocf in page
+        ],
+        'next': page.next_cursor if page.has_next else None,
+        'previous': page.previous_cursor if page.has_previous else None,
+    })
+
+@async_login_required
+async def ocfstock_export(request):
+    """
+    Filtered OCF stock as a CSV file the stock import reads back, streamed as
+    rows are read: asynchronously under ASGI, from a plain iterator under
+    WSGI, which would otherwise collect an async one into memory first.
+    ?format=xlsx is served by ocfstock_export_xlsx.
+    """
+    if request.GET.get('format') == 'xlsx':
+        return redirect(f"{reverse('Encomenda_Veiculos:ocfstock_export_xlsx')}?{request.GET.urlencode()}")
+    form = OCFStockFilterForm(request.GET)
+    if not await form.ais_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    queryset = form.filter(OCFStock.objects.all())
+    lines = astream_stock_csv(queryset) if isinstance(request, ASGIRequest) else stream_stock_csv(queryset)
+    response = StreamingHttpResponse(lines, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="stock_{timezone.localdate():%Y%m%d}.csv"'
+    return response
+
+@login_required
+def ocfstock_export_xlsx(request):
+    """
+    Filtered OCF stock as .xlsx. The workbook is only complete once saved, so
+    it is written to a temporary file first; building it is CPU work, done
+    by this sync view in a worker thread rather than on the event loop.
+    """
+    form = OCFStockFilterForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    # Spilled to disk past 10 MB so large exports do not sit in memory
+    file = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+    write_stock_xlsx(form.filter(OCFStock.objects.all()), file)
+    file.seek(0)
+    return FileResponse(
+        file, as_attachment=True, filename=f'stock_{timezone.localdate():%Y%m%d}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
 
 @method_decorator(login_required, name='dispatch')
 class OCFStockDetailView(DetailView):
     model = OCFStock
     template_name = 'encomenda_veiculos/ocfstock_detail.html'
+    queryset = OCFStock.objects.select_related('vehicle__vp')
 
 @method_decorator(login_required, name='dispatch')
 class OCFStockCreateView(CreateView):
@@ -352,9 +391,12 @@ class OCFStockDeleteView(DeleteView):
 
 # Salesperson Views
 @method_decorator(login_required, name='dispatch')
-class SalespersonListView(ListView):
+class SalespersonListView(KeysetPaginationMixin, ListView):
     model = Salesperson
     template_name = 'encomenda_veiculos/salesperson_list.html'
+    queryset = Salesperson.objects.select_related('user').only(
+        'created_at', 'user__username', 'user__first_name', 'user__last_name'
+    )
 
 @method_decorator(login_required, name='dispatch')
 class SalespersonDetailView(DetailView):
@@ -383,9 +425,10 @@ class SalespersonDeleteView(DeleteView):
 
 # ClientContact Views
 @method_decorator(login_required, name='dispatch')
-class ClientContactListView(ListView):
+class ClientContactListView(KeysetPaginationMixin, ListView):
     model = ClientContact
     template_name = 'encomenda_veiculos/clientcontact_list.html'
+    queryset = ClientContact.objects.only('name', 'created_at')
 
 @method_decorator(login_required, name='dispatch')
 class ClientContactDetailView(DetailView):
@@ -414,14 +457,48 @@ class ClientContactDeleteView(DeleteView):
 
 # InternalTransport Views
 @method_decorator(login_required, name='dispatch')
-class InternalTransportListView(ListView):
+class InternalTransportListView(KeysetPaginationMixin, ListView):
     model = InternalTransport
     template_name = 'encomenda_veiculos/internaltransport_list.html'
+    queryset = InternalTransport.objects.select_related('vehicle__vp').only('created_at', 'vehicle__van', 'vehicle__vp__vp_code')
+
+@login_required
+def internaltransport_calendar(request):
+    return render(request, 'encomenda_veiculos/internaltransport_calendar.html')
+
+@async_login_required
+async def internaltransport_events(request):
+    """
+    Transports dated within ?start= (inclusive) and ?end= (exclusive) for the
+    calendar, with one row per origin (or ?group=destination). Kept compact:
+    the row names once, then [id, transport_date, row index, VAN] per transport.
+    """
+    form = TransportWindowForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    group = form.cleaned_data['group'] or 'origin'
+    transports = [
+        row async for row in InternalTransport.objects.filter(
+            transport_date__gte=form.cleaned_data['start'],
+            transport_date__lt=form.cleaned_data['end'],
+        ).order_by('transport_date', 'id').values_list('id', 'transport_date', group, 'vehicle_id')
+    ]
+    rows = sorted({place or '' for _pk, _date, place, _van in transports})
+    row_index = {place: index for index, place in enumerate(rows)}
+    return JsonResponse({
+        'rows': rows,
+        'events': [
+            [pk, transport_date.isoformat(), row_index[place or ''], van]
+            for pk, transport_date, place, van in transports
+        ],
+    })
 
 @method_decorator(login_required, name='dispatch')
 class InternalTransportDetailView(DetailView):
     model = InternalTransport
     template_name = 'encomenda_veiculos/internaltransport_detail.html'
+    queryset = InternalTransport.objects.select_related('vehicle__vp')
 
 @method_decorator(login_required, name='dispatch')
 class InternalTransportCreateView(CreateView):
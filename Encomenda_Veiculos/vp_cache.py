@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Module import: models imports this module for Vehicle.__str__
+from . import models
+
+# Bumped on every VP change; cache keys carry it, so a bump retires every
+# cached entry at once, in all processes sharing the cache backend (a shared
+# CACHES backend is required when there are several, see checks.py)
+VERSION_KEY = "vp-catalogue:version"
+
+
+class LRUCache:
+    """Small thread-safe LRU of at most ``size`` entries, each kept for ``timeout`` seconds."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Per-process copy in front of the cache framework, keyed by version as well
+local_cache = LRUCache(settings.VP_CACHE_SIZE, settings.VP_CACHE_TIMEOUT)
+
+
+def catalogue_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Never reuse a version after the key was evicted
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+def invalidate_vp_cache():
+    """Retire every cached VP. Call after changing VPs without save()/delete(), e.g. bulk queries."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+    local_cache.clear()
+
+
+def _key(version, field, value):
+    return f"vp-catalogue:{version}:{field}:{value}"
+
+
+def _remember(version, vps):
+    entries = {}
+    for vp in vps:
+        for field, value in (("id", vp.pk), ("vp_code", vp.vp_code)):
+            key = _key(version, field, value)
+            local_cache.set(key, vp)
+            entries[key] = vp
+    cache.set_many(entries, timeout=settings.VP_CACHE_TIMEOUT)
+    return len(entries) // 2
+
+
+def _lookup(field, values):
+    version = catalogue_version()
+    found, missing = {}, set()
+    for value in values:
+        vp = local_cache.get(_key(version, field, value))
+        if vp is None:
+            missing.add(value)
+        else:
+            found[value] = vp
+    if missing:
+        shared = cache.get_many([_key(version, field, value) for value in missing])
+        for vp in shared.values():
+            found[getattr(vp, field)] = vp
+            local_cache.set(_key(version, field, getattr(vp, field)), vp)
+        missing.difference_update(found)
+    if missing:
+        vps = list(models.VP.objects.filter(**{f"{field}__in": missing}))
+        _remember(version, vps)
+        found.update((getattr(vp, field), vp) for vp in vps)
+    return found
+
+
+def get_vps(pks):
+    """VPs by primary key as pk -> VP; unknown keys are left out."""
+    return _lookup("id", pks)
+
+
+def get_vps_by_code(codes):
+    """VPs by vp_code as code -> VP; unknown codes are left out."""
+    return _lookup("vp_code", codes)
+
+
+def get_vp(pk):
+    return get_vps([pk]).get(pk)
+
+
+def get_vp_by_code(code):
+    return get_vps_by_code([code]).get(code)
+
+
+def preload_vp_cache():
+    """
+    Load the whole catalogue in one query, e.g. before an import, under a new
+    version, so VPs deleted without a signal are not served from this or
+    any other process. Returns the number of VPs.
+    """
+    invalidate_vp_cache()
+    return _remember(catalogue_version(), models.VP.objects.all())
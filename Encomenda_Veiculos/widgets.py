@@ -0,0 +1,40 @@
+from django import forms
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select for large foreign keys: only the current value is rendered as an
+    option and js/autocomplete.js fetches the others from the autocomplete
+    endpoint of ``kind`` as the user types. Validation is unchanged, the
+    field still looks up just the submitted pk.
+    """
+
+    class Media:
+        js = ['js/autocomplete.js']
+
+    def __init__(self, kind, attrs=None):
+        super().__init__(attrs)
+        self.kind = kind
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse('Encomenda_Veiculos:autocomplete', args=[self.kind])
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = [pk for pk in value if pk not in ('', None)]
+        choices = [] if field.empty_label is None else [('', field.empty_label)]
+        if selected:
+            # Instances an async view already looked up (ResolvedModelChoiceField)
+            resolved = getattr(field, 'resolved', {})
+            if all(str(pk) in resolved for pk in selected):
+                instances = [resolved[str(pk)] for pk in selected if resolved[str(pk)] is not None]
+            else:
+                instances = field.queryset.filter(pk__in=selected)
+            choices += [(obj.pk, field.label_from_instance(obj)) for obj in instances]
+        return [
+            (None, [self.create_option(name, pk, label, str(pk) in value, index, attrs=attrs)], index)
+            for index, (pk, label) in enumerate(choices)
+        ]
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,12 +38,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'Encomenda_Veiculos.apps.EncomendaVeiculosConfig',
     'crispy_forms',
     'crispy_bootstrap4',
 ]
 
 MIDDLEWARE = [
+    'Encomenda_Veiculos.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -60,7 +63,8 @@ CRISPY_TEMPLATE_PACK = "bootstrap4"
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, also timing renders for the request metrics
+        'BACKEND': 'Encomenda_Veiculos.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates']
         ,
         'APP_DIRS': True,
@@ -81,17 +85,41 @@ WSGI_APPLICATION = 'Gestao_Stock.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connection settings come from the environment (DB_*), defaulting to the
+# local development database.
+#
+# DB_POOL_MAX_SIZE > 0 turns on psycopg's connection pool: each worker
+# process keeps DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE open connections, checked
+# before being handed out. Use it under ASGI, where persistent connections do
+# not apply. Otherwise connections are kept DB_CONN_MAX_AGE seconds (0 closes
+# them after every request) and checked before reuse.
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '0'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'gstock',
-        'USER': 'gstock',
-        'PASSWORD': 'gstock',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'NAME': os.environ.get('DB_NAME', 'gstock'),
+        'USER': os.environ.get('DB_USER', 'gstock'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'gstock'),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
 }
 
+if DB_POOL_MAX_SIZE:
+    # CONN_HEALTH_CHECKS also makes the pool check connections it hands out
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+        'max_size': DB_POOL_MAX_SIZE,
+        # Seconds a request waits for a free connection before failing
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        # Connections are replaced after this many seconds
+        'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', '1800')),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -147,6 +175,10 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# Uploaded files (import workbooks queued for the import worker)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / "media"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -155,3 +187,46 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'Encomenda_Veiculos:login'
 LOGIN_REDIRECT_URL = 'Encomenda_Veiculos:home'
 LOGOUT_REDIRECT_URL = 'Encomenda_Veiculos:home'
+
+# Stock import: update policy overrides for existing rows, keyed by "<model>.<field>"
+# ('vp', 'vehicle' or 'ocf') with values 'never', 'overwrite' or 'fill' (only while empty).
+# Defaults live in Encomenda_Veiculos.importers.STOCK_COLUMNS.
+STOCK_IMPORT_UPDATE_POLICIES = {}
+
+# Stock import: worker processes used to parse multi-sheet/multi-file imports
+# (None = one per CPU core).
+STOCK_IMPORT_WORKERS = None
+
+# Rows per page of the list views (?page_size= overrides it per request).
+LIST_PAGE_SIZE = 50
+
+# VP catalogue cache (Encomenda_Veiculos.vp_cache): VPs kept per process and
+# seconds they stay cached. Invalidation reaches other processes (e.g. the
+# import worker) only through a shared CACHES backend, which production
+# requires (manage.py check --deploy warns otherwise); with the default
+# per-process cache they see VP changes after the timeout.
+VP_CACHE_SIZE = 2048
+VP_CACHE_TIMEOUT = 3600
+
+# Request metrics (Encomenda_Veiculos.middleware.RequestMetricsMiddleware):
+# requests kept per view for the percentiles at /metrics/ (staff only), and
+# the query count above which a request is logged as a warning, to catch
+# N+1 queries.
+REQUEST_METRICS_WINDOW = 1000
+REQUEST_QUERY_BUDGET = 30
+
+# One JSON line per request from the metrics logger
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'Encomenda_Veiculos.metrics': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
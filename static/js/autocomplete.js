@@ -0,0 +1,30 @@
+// Turns <select data-autocomplete-url> into a search box: the options are
+// replaced with the matches of what is typed, fetched as {"results": [{id, text}]}.
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(select => {
+        const search = document.createElement('input');
+        search.type = 'search';
+        search.className = 'form-control mb-1';
+        search.placeholder = '…';
+        select.parentNode.insertBefore(search, select);
+
+        let timer = null;
+        search.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(async () => {
+                const url = `${select.dataset.autocompleteUrl}?${new URLSearchParams({q: search.value})}`;
+                const data = await (await fetch(url)).json();
+                const current = select.selectedOptions[0];
+                select.replaceChildren(...(current ? [current] : []));
+                for (const {id, text} of data.results) {
+                    if (current && String(id) === current.value) {
+                        continue;
+                    }
+                    select.add(new Option(text, id));
+                }
+                select.size = Math.min(select.options.length, 8);
+            }, 250);
+        });
+        select.addEventListener('change', () => { select.size = 0; });
+    });
+});